@@ -1,47 +1,189 @@
+import importlib.util
 import os
+import random
 from . import config
+from . import profiling
+from .cache import ResponseCache, cache_key
 
-try:
-    from openai import OpenAI
-    from dotenv import load_dotenv
-    AI_AVAILABLE = True
-except ImportError:
-    AI_AVAILABLE = False
+# Only probe for the packages here; importing openai costs noticeable startup time,
+# so it is deferred until the first question is asked.
+AI_AVAILABLE = all(importlib.util.find_spec(name) is not None for name in ('openai', 'dotenv'))
 
 class AIAssistant:
-    def __init__(self):
-        self.client = None
-        self.is_ready = False
-        self._initialize_client()
+    def __init__(self, client=None, cache=None, model=None, async_client=None):
+        # Pass ``client`` (anything with ``chat.completions.create``) and/or ``async_client``
+        # to bypass the OpenAI setup, e.g. a test stub.
+        self.client = client
+        self.async_client = async_client
+        self.is_ready = client is not None or async_client is not None
+        self._initialized = self.is_ready
+        self.model = model or config.AI_MODEL
+        self.cache = cache if cache is not None else ResponseCache()
+        self._loop = None
 
     def _initialize_client(self):
+        self._initialized = True
         if AI_AVAILABLE:
+            from openai import AsyncOpenAI, OpenAI
+            from dotenv import load_dotenv
+
             env_path = config.BASE_DIR / '.env'
             load_dotenv(dotenv_path=env_path)
             
             api_key = os.getenv("API_KEY")
             if api_key:
-                self.client = OpenAI(api_key=api_key)
+                # API_BASE_URL points the client at any OpenAI-compatible server, e.g. a local mock.
+                base_url = os.getenv("API_BASE_URL") or config.AI_BASE_URL
+                self.client = OpenAI(api_key=api_key, base_url=base_url)
+                self.async_client = AsyncOpenAI(api_key=api_key, base_url=base_url)
                 self.is_ready = True
 
-    def get_response(self, user_query, custom_system_prompt=None):
-        if not AI_AVAILABLE:
-            return "❌ Error: Missing libraries. Please run: pip install openai python-dotenv"
-        
-        if not self.is_ready or not self.client:
+    def _prepare(self, user_query, custom_system_prompt, context):
+        sys_prompt = custom_system_prompt if custom_system_prompt and custom_system_prompt.strip() \
+            else config.DEFAULT_SYSTEM_PROMPT
+        messages = [{"role": "system", "content": sys_prompt}]
+        if context:
+            messages.append({"role": "system", "content": f"Student data:\n{context}"})
+        messages.append({"role": "user", "content": user_query})
+        return cache_key(self.model, sys_prompt, user_query, context), messages
+
+    def _not_ready_error(self):
+        """Set up the client on first use; return an error message if the AI can't be used."""
+        if not self._initialized:
+            if not AI_AVAILABLE:
+                return "❌ Error: Missing libraries. Please run: pip install openai python-dotenv"
+            self._initialize_client()
+        if not self.is_ready:
             return "❌ Error: API_KEY not found in .env file."
+        return None
+
+    @profiling.timed('ai.get_response')
+    def get_response(self, user_query, custom_system_prompt=None, context=None):
+        key, messages = self._prepare(user_query, custom_system_prompt, context)
+        cached = self.cache.get(key)
+        if cached is not None:
+            profiling.count('ai.cache_hits')
+            return cached
 
-        sys_prompt = custom_system_prompt if custom_system_prompt and custom_system_prompt.strip() else config.DEFAULT_SYSTEM_PROMPT
+        error = self._not_ready_error()
+        if error:
+            return error
+        if not self.client:
+            return self.get_responses([user_query], custom_system_prompt, [context])[0]
 
+        profiling.count('ai.api_calls')
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": sys_prompt},
-                    {"role": "user", "content": user_query}
-                ]
-            )
-            return response.choices[0].message.content
-            
+            response = self.client.chat.completions.create(model=self.model, messages=messages)
+            answer = response.choices[0].message.content
         except Exception as e:
-            return f"❌ AI Connection Error: {str(e)}"
\ No newline at end of file
+            return f"❌ AI Connection Error: {str(e)}"
+
+        if answer:
+            self.cache.put(key, answer)
+        return answer
+
+    def stream_response(self, user_query, custom_system_prompt=None, context=None):
+        """Yield the answer piece by piece as the API produces it (cached answers arrive whole)."""
+        # From the first piece requested to the last one, like get_response's wall time.
+        with profiling.timer('ai.stream_response'):
+            key, messages = self._prepare(user_query, custom_system_prompt, context)
+            cached = self.cache.get(key)
+            if cached is not None:
+                profiling.count('ai.cache_hits')
+                yield cached
+                return
+
+            error = self._not_ready_error()
+            if error or not self.client:
+                yield error or self.get_response(user_query, custom_system_prompt, context)
+                return
+
+            parts = []
+            profiling.count('ai.api_calls')
+            try:
+                stream = self.client.chat.completions.create(model=self.model, messages=messages, stream=True)
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    piece = chunk.choices[0].delta.content
+                    if piece:
+                        parts.append(piece)
+                        yield piece
+            except Exception as e:
+                yield f"\n❌ AI Connection Error: {str(e)}"
+                return
+
+            if parts:
+                self.cache.put(key, ''.join(parts))
+
+    async def _ask_with_retry(self, semaphore, messages, key):
+        import asyncio
+        retries = config.AI_BATCH['max_retries']
+        async with semaphore:
+            for attempt in range(retries + 1):
+                try:
+                    response = await self._create_async(messages)
+                    answer = response.choices[0].message.content
+                    break
+                except Exception as e:
+                    if attempt == retries or not _retryable(e):
+                        return f"❌ AI Connection Error: {str(e)}"
+                    profiling.count('ai.retries')
+                    delay = config.AI_BATCH['backoff_seconds'] * 2 ** attempt
+                    await asyncio.sleep(delay * (1 + random.random()))
+        if answer:
+            self.cache.put(key, answer)
+        return answer
+
+    async def _create_async(self, messages):
+        import asyncio
+        if self.async_client is not None:
+            return await self.async_client.chat.completions.create(model=self.model, messages=messages)
+        return await asyncio.to_thread(self.client.chat.completions.create, model=self.model, messages=messages)
+
+    async def ask_many(self, queries, custom_system_prompt=None, contexts=None, concurrency=None):
+        """Answer ``queries`` concurrently, in order; ``contexts`` pairs one context with each query.
+
+        At most ``concurrency`` requests are in flight on the shared async client; failed
+        calls are retried with exponential backoff and jitter. Cached answers skip the API.
+        """
+        import asyncio
+
+        contexts = contexts or [None] * len(queries)
+        answers = [None] * len(queries)
+        todo = []
+        for i, (query, context) in enumerate(zip(queries, contexts)):
+            key, messages = self._prepare(query, custom_system_prompt, context)
+            answers[i] = self.cache.get(key)
+            if answers[i] is None:
+                todo.append((i, key, messages))
+        profiling.count('ai.cache_hits', len(queries) - len(todo))
+        if not todo:
+            return answers
+
+        error = self._not_ready_error()
+        if error:
+            for i, _, _ in todo:
+                answers[i] = error
+            return answers
+        profiling.count('ai.api_calls', len(todo))
+
+        semaphore = asyncio.Semaphore(concurrency or config.AI_BATCH['concurrency'])
+        results = await asyncio.gather(*(self._ask_with_retry(semaphore, messages, key) for _, key, messages in todo))
+        for (i, _, _), answer in zip(todo, results):
+            answers[i] = answer
+        return answers
+
+    def get_responses(self, queries, custom_system_prompt=None, contexts=None, concurrency=None):
+        # The async client pools its connections on the loop that opened them, so every
+        # call runs on this assistant's own loop rather than a fresh asyncio.run() loop.
+        import asyncio
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(self.ask_many(queries, custom_system_prompt, contexts, concurrency))
+
+
+def _retryable(error):
+    """Retry timeouts, connection errors, rate limits and 5xx; other 4xx responses won't change."""
+    status = getattr(error, 'status_code', None)
+    return status is None or status in (408, 409, 429) or status >= 500
@@ -0,0 +1,234 @@
+import json
+import sys
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from . import config
+
+MAX_REPORTED_ERRORS = 20
+
+
+class BatchReport:
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line_no, reason):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line_no}: {reason}")
+
+    def summary(self):
+        lines = [f"{self.accepted:,} accepted, {self.rejected:,} rejected"]
+        lines += [f"  - {e}" for e in self.errors]
+        if self.rejected > len(self.errors):
+            lines.append(f"  ... and {self.rejected - len(self.errors):,} more")
+        return "\n".join(lines)
+
+
+def table_columns(table):
+    col_type = config.TABLE_MAPPING.get(table)
+    if col_type is None:
+        raise ValueError(f"Unknown table '{table}'. Choose from: {', '.join(config.FILES)}")
+    return list(config.COLUMNS[col_type])
+
+
+def detect_format(path, fmt=None):
+    if fmt: return fmt
+    return 'jsonl' if str(path).endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def validate_chunk(chunk, columns, first_line, report):
+    """Check one DataFrame chunk against the table schema; return the valid rows as dicts."""
+    unknown = [c for c in chunk.columns if c not in columns]
+    if unknown:
+        raise ValueError(f"Unknown column(s) {unknown}. Expected: {columns}")
+    chunk = chunk.reindex(columns=columns)
+
+    bad = np.zeros(len(chunk), dtype=bool)
+    for col in [c for c in columns if c in config.NUMERIC_COLS]:
+        raw = chunk[col]
+        parsed = pd.to_numeric(raw, errors='coerce')
+        invalid = (parsed.isna() & raw.notna() & (raw.astype(str).str.strip() != '')).to_numpy()
+        for pos in np.flatnonzero(invalid & ~bad):
+            report.reject(first_line + pos, f"'{raw.iat[pos]}' is not a number in '{col}'")
+        bad |= invalid
+        chunk[col] = parsed
+
+    valid = chunk[~bad]
+    report.accepted += len(valid)
+    return valid.to_dict('records')
+
+
+def _csv_chunks(path, chunk_size):
+    line_no = 2  # Line 1 is the header
+    for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=True):
+        yield line_no, chunk
+        line_no += len(chunk)
+
+
+def _jsonl_records(path, report):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                report.reject(line_no, f"invalid JSON ({e.msg})")
+                continue
+            if not isinstance(record, dict):
+                report.reject(line_no, "expected a JSON object")
+                continue
+            yield line_no, record
+
+
+def _jsonl_batches(path, chunk_size, report):
+    records = _jsonl_records(path, report)
+    while True:
+        batch = list(islice(records, chunk_size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_file(system, table, path, fmt=None, chunk_size=None):
+    """Stream ``path`` into ``table`` chunk by chunk; rows that fail validation are skipped."""
+    columns = table_columns(table)
+    chunk_size = chunk_size or config.BATCH_CHUNK_ROWS
+    report = BatchReport()
+    with system.bulk():
+        if detect_format(path, fmt) == 'csv':
+            for line_no, chunk in _csv_chunks(path, chunk_size):
+                system.add_rows(table, validate_chunk(chunk, columns, line_no, report))
+        else:
+            for batch in _jsonl_batches(path, chunk_size, report):
+                rows = []
+                for line_no, record in batch:
+                    rows += _validate_record(record, columns, line_no, report)
+                system.add_rows(table, rows)
+    return report
+
+
+def _validate_record(record, columns, line_no, report):
+    unknown = [c for c in record if c not in columns]
+    if unknown:
+        report.reject(line_no, f"unknown column(s) {unknown}")
+        return []
+    row = {}
+    for col in columns:
+        value = record.get(col, np.nan)
+        if col in config.NUMERIC_COLS and not _is_blank(value):
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                report.reject(line_no, f"'{value}' is not a number in '{col}'")
+                return []
+        row[col] = np.nan if _is_blank(value) else value
+    report.accepted += 1
+    return [row]
+
+
+def cell_value(col, value):
+    """``value`` parsed as a number if ``col`` is numeric and it is not blank; ValueError if it is not one."""
+    if col in config.NUMERIC_COLS and not _is_blank(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"'{value}' is not a number in '{col}'") from None
+    return value
+
+
+def _is_blank(value):
+    if value is None:
+        return True
+    if isinstance(value, float) and np.isnan(value):
+        return True
+    return isinstance(value, str) and value.strip() == ''
+
+
+def _is_row(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def export_file(system, table, path, fmt=None, chunk_size=None):
+    table_columns(table)
+    df = system.get_data(table)
+    chunk_size = chunk_size or config.BATCH_CHUNK_ROWS
+    fmt = detect_format(path, fmt)
+    out = sys.stdout if str(path) == '-' else open(path, 'w', encoding='utf-8', newline='')
+    try:
+        for start in range(0, max(len(df), 1), chunk_size):
+            chunk = df.iloc[start:start + chunk_size]
+            if fmt == 'csv':
+                chunk.to_csv(out, index=False, header=(start == 0))
+            elif len(chunk):
+                chunk.to_json(out, orient='records', lines=True, force_ascii=False)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return len(df)
+
+
+def apply_file(system, path, chunk_size=None):
+    """Apply a JSONL stream of mutations.
+
+    Each line is one of::
+
+        {"op": "add", "table": "G9", "row": {"Code": "MA101", ...}}
+        {"op": "update", "table": "G9", "row": 0, "col": "Q1_Points", "value": 95}
+        {"op": "delete", "table": "G9", "row": 3}
+
+    Row numbers are 0-based positions at the time the line is applied. Consecutive
+    adds to the same table are inserted together; everything is written once at the end,
+    or rolled back if the run is interrupted.
+    """
+    chunk_size = chunk_size or config.BATCH_CHUNK_ROWS
+    report = BatchReport()
+    pending_table, pending = None, []
+
+    def flush():
+        if pending:
+            system.add_rows(pending_table, pending)
+            pending.clear()
+
+    with system.bulk():
+        for line_no, op in _jsonl_records(path, report):
+            table = op.get('table')
+            kind = op.get('op')
+            try:
+                columns = table_columns(table)
+            except ValueError as e:
+                report.reject(line_no, str(e))
+                continue
+
+            if kind == 'add':
+                if table != pending_table or len(pending) >= chunk_size:
+                    flush()
+                    pending_table = table
+                pending.extend(_validate_record(op.get('row') or {}, columns, line_no, report))
+                continue
+
+            flush()
+            if kind == 'update':
+                col = op.get('col')
+                try:
+                    value = cell_value(col, op.get('value'))
+                except ValueError as e:
+                    report.reject(line_no, str(e))
+                    continue
+                ok = _is_row(op.get('row')) and system.update_cell(table, op['row'], col, value)
+            elif kind == 'delete':
+                ok = _is_row(op.get('row')) and system.delete_row(table, op['row'])
+            else:
+                report.reject(line_no, f"unknown op '{kind}'")
+                continue
+
+            if ok:
+                report.accepted += 1
+            else:
+                report.reject(line_no, f"{kind} failed (row or column out of range)")
+        flush()
+    return report
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+from . import config
+
+
+class AppendBuffer:
+    """Growable per-column store for rows appended to a table but not yet merged into its DataFrame.
+
+    Columns are preallocated NumPy arrays whose capacity doubles when full, so appending
+    is amortized O(1); ``to_frame`` hands the pending rows to pandas in a single step.
+    """
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, columns):
+        self._capacity = self.INITIAL_CAPACITY
+        self._size = 0
+        self._cols = {}
+        for col in columns:
+            self._add_column(col)
+
+    def __len__(self):
+        return self._size
+
+    def _empty(self, col, capacity):
+        if col in config.NUMERIC_COLS:
+            return np.full(capacity, np.nan)
+        return np.full(capacity, np.nan, dtype=object)
+
+    def _add_column(self, col):
+        self._cols[col] = self._empty(col, self._capacity)
+
+    def _grow(self, needed):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self._capacity:
+            return
+        for col, values in self._cols.items():
+            grown = np.full(capacity, np.nan, dtype=values.dtype)
+            grown[:self._size] = values[:self._size]
+            self._cols[col] = grown
+        self._capacity = capacity
+
+    def _set(self, col, pos, value):
+        if col not in self._cols:
+            self._add_column(col)
+        values = self._cols[col]
+        try:
+            values[pos] = value
+        except (TypeError, ValueError):
+            # Non-numeric input in a numeric column: keep it verbatim, as pd.concat would.
+            values = values.astype(object)
+            values[pos] = value
+            self._cols[col] = values
+
+    def append(self, row):
+        self._grow(self._size + 1)
+        for col, value in row.items():
+            self._set(col, self._size, value)
+        self._size += 1
+
+    def extend(self, rows):
+        if hasattr(rows, '__len__'):
+            self._grow(self._size + len(rows))
+        for row in rows:
+            self.append(row)
+
+    def to_frame(self):
+        return pd.DataFrame({col: values[:self._size].copy() for col, values in self._cols.items()})
+
+    def clear(self):
+        for values in self._cols.values():
+            values[:self._size] = np.nan
+        self._size = 0
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from . import config
+
+
+def cache_key(model, system_prompt, query, context=None):
+    """Stable key for one completion; the context is folded in as a digest of its text."""
+    digest = hashlib.sha256((context or '').encode('utf-8')).hexdigest()
+    payload = json.dumps([model, system_prompt, query, digest], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier cache of AI responses: an in-memory LRU in front of one JSON file per entry.
+
+    Disk entries older than ``ttl`` seconds are treated as misses and removed. When the
+    directory grows past ``max_bytes`` the least recently used files are evicted
+    (reads touch the file's mtime).
+    """
+
+    def __init__(self, cache_dir=None, memory_entries=None, ttl=None, max_bytes=None):
+        settings = config.AI_CACHE
+        self.dir = Path(cache_dir or config.AI_CACHE_DIR)
+        self.memory_entries = settings['memory_entries'] if memory_entries is None else memory_entries
+        self.ttl = settings['ttl_seconds'] if ttl is None else ttl
+        self.max_bytes = settings['max_disk_bytes'] if max_bytes is None else max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _path(self, key):
+        return self.dir / f"{key}.json"
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[0]):
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return entry[1]
+            self._memory.pop(key, None)
+
+            path = self._path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                self.stats['misses'] += 1
+                return None
+            if self._expired(record.get('created', 0)):
+                self._unlink(path)
+                self.stats['misses'] += 1
+                return None
+            os.utime(path)
+            self._remember(key, record['created'], record['response'])
+            self.stats['disk_hits'] += 1
+            return record['response']
+
+    def put(self, key, value):
+        with self._lock:
+            created = time.time()
+            self._remember(key, created, value)
+            self.dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'created': created, 'response': value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def _unlink(self, path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        entries = []
+        for path in self.dir.glob('*.json'):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes and not self._expired(mtime):
+                break
+            self._unlink(path)
+            self._memory.pop(path.stem, None)
+            self.stats['evictions'] += 1
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            for path in self.dir.glob('*.json'):
+                self._unlink(path)
+
+    def hit_rate(self):
+        hits = self.stats['memory_hits'] + self.stats['disk_hits']
+        total = hits + self.stats['misses']
+        return hits / total if total else 0.0
@@ -0,0 +1,81 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from . import config
+from .views import GRADE_LEVELS
+
+STUDENTS_PER_TASK = 64
+
+
+def student_dirs(root=None):
+    root = config.STUDENTS_DIR if root is None else root
+    if not os.path.isdir(root):
+        return []
+    return sorted(entry.path for entry in os.scandir(root) if entry.is_dir())
+
+
+def _summarize_chunk(dirs, engine):
+    """Worker: load each student's tables and reduce them to small, mergeable aggregates."""
+    from .core import GradeSystem
+
+    levels, subjects = [], []
+    for data_dir in dirs:
+        # Per-student GROUP BYs (run in SQL by the sqlite engine) instead of every grade row.
+        summary = GradeSystem(engine=engine, data_dir=data_dir).grade_summary()
+        if summary['levels'].empty:
+            continue
+        student = os.path.basename(data_dir)
+        levels.append(summary['levels'].assign(Student=student))
+        subjects.append(summary['subjects'])
+    if not levels:
+        return None, None
+
+    students = pd.concat(levels, ignore_index=True)[['Student', 'Grade_Level', 'Total', 'Courses']]
+    subjects = pd.concat(subjects, ignore_index=True).groupby('Code', sort=False).agg(
+        Score_Sum=('Score_Sum', 'sum'), Rows=('Rows', 'sum'), Students=('Rows', 'count'),
+        Min=('Min', 'min'), Max=('Max', 'max')).reset_index()
+    return students, subjects
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def cohort_stats(root=None, workers=None, engine=None, chunk_size=STUDENTS_PER_TASK):
+    """Aggregate every student directory under ``root`` across a process pool.
+
+    Returns a dict of DataFrames:
+      - ``students``: total score and course count per student and grade level
+      - ``levels``: cohort distribution of per-student totals for each grade level
+      - ``subjects``: per-course-code average, min, max and number of students
+    """
+    dirs = student_dirs(root)
+    chunks = list(_chunks(dirs, chunk_size))
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(chunks) <= 1:
+        partials = [_summarize_chunk(chunk, engine) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            partials = list(pool.map(_summarize_chunk, chunks, [engine] * len(chunks)))
+
+    student_parts = [s for s, _ in partials if s is not None]
+    subject_parts = [s for _, s in partials if s is not None]
+    if not student_parts:
+        empty = pd.DataFrame()
+        return {'students': empty, 'levels': empty, 'subjects': empty, 'student_count': len(dirs)}
+
+    students = pd.concat(student_parts, ignore_index=True)
+    levels = students.groupby('Grade_Level')['Total'].agg(
+        ['count', 'mean', 'std', 'min', 'median', 'max']).rename(columns={'count': 'Students'})
+    levels = levels.reindex([g for g in GRADE_LEVELS if g in levels.index])
+
+    subjects = pd.concat(subject_parts, ignore_index=True).groupby('Code').agg(
+        Score_Sum=('Score_Sum', 'sum'), Rows=('Rows', 'sum'), Students=('Students', 'sum'),
+        Min=('Min', 'min'), Max=('Max', 'max'))
+    subjects.insert(0, 'Average', subjects['Score_Sum'] / subjects['Rows'])
+    subjects = subjects.drop(columns='Score_Sum').sort_values('Average', ascending=False)
+
+    return {'students': students, 'levels': levels, 'subjects': subjects, 'student_count': len(dirs)}
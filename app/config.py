@@ -6,14 +6,72 @@ DATA_DIR = BASE_DIR / "mydata"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
-FILES = {
-    'G9': DATA_DIR / 'G9.csv',
-    'G10': DATA_DIR / 'G10.csv',
-    'G11': DATA_DIR / 'G11.csv',
-    'G12': DATA_DIR / 'G12.csv',
-    'Self_Dev': DATA_DIR / 'Self_Dev.csv',
-    'Dream_Schools': DATA_DIR / 'Dream_Schools.csv',
-    'Dream_Majors': DATA_DIR / 'Dream_Majors.csv'
+TABLE_FILES = {
+    'G9': 'G9.csv',
+    'G10': 'G10.csv',
+    'G11': 'G11.csv',
+    'G12': 'G12.csv',
+    'Self_Dev': 'Self_Dev.csv',
+    'Dream_Schools': 'Dream_Schools.csv',
+    'Dream_Majors': 'Dream_Majors.csv'
+}
+
+
+def table_files(data_dir):
+    return {table: Path(data_dir) / name for table, name in TABLE_FILES.items()}
+
+
+FILES = table_files(DATA_DIR)
+
+
+# Multi-student layout: one data directory per student, e.g. students/<student_id>/G9.csv
+STUDENTS_DIR = BASE_DIR / "students"
+
+
+# Table storage format: 'csv' (default), 'npy' (memory-mapped columnar), 'parquet' (needs pyarrow)
+# or 'sqlite' (indexed database; combined grades and trends are queried in SQL).
+# Convert an existing mydata/ tree with: python main.py migrate --to npy
+STORAGE_ENGINE = 'csv'
+
+# 'sqlite' engine: one database file per data directory (WAL mode). 'synchronous' is the
+# SQLite durability level (FULL fsyncs every commit, like the CSV journal; NORMAL is faster
+# but may lose the last commits on power loss). Full-table writes insert batch_rows at a time.
+SQLITE = {
+    'file': 'sams.db',
+    'synchronous': 'FULL',
+    'batch_rows': 5000,
+}
+
+
+AI_MODEL = "gpt-4o"
+# OpenAI-compatible endpoint; None uses the official API. API_BASE_URL in .env overrides it.
+AI_BASE_URL = None
+
+
+# Concurrent advisory queries (AIAssistant.ask_many): requests in flight at once, and
+# retries with exponential backoff (backoff_seconds, doubled per attempt, plus jitter).
+AI_BATCH = {
+    'concurrency': 8,
+    'max_retries': 3,
+    'backoff_seconds': 0.5,
+}
+
+
+# AI response cache: answers are keyed on model, system prompt, question and the student
+# data sent as context, kept in an in-memory LRU and as JSON files under AI_CACHE_DIR.
+AI_CACHE_DIR = BASE_DIR / ".ai_cache"
+AI_CACHE = {
+    'memory_entries': 128,
+    'ttl_seconds': 7 * 24 * 3600,
+    'max_disk_bytes': 5 * 1024 * 1024,
+}
+
+
+# Student data digest sent with every AI question (context.build_context): token budget
+# (estimated at ~4 characters per token) and how many strongest/weakest courses to list.
+AI_CONTEXT = {
+    'max_tokens': 600,
+    'top_subjects': 3,
 }
 
 
@@ -24,11 +82,16 @@ Keep answers concise and actionable.
 """
 
 
+# Column name -> dtype, in display order. Repetitive text is stored as 'category' and
+# scores as float32; the dtypes are applied on load, on insert and on every cell edit.
 COLUMNS = {
-    'Grades': ['Sem', 'Level', 'Code', 'Course', 'Weight', 'Q1_Points', 'Q2_Points', 'Q3_Points', 'Q4_Points'],
-    'Self_Dev': ['Course', 'From', 'Skill', 'Status', 'Proficiency'],
-    'Dream_Schools': ['University', 'School'],
-    'Dream_Majors': ['Major']
+    'Grades': {
+        'Sem': 'category', 'Level': 'category', 'Code': 'category', 'Course': 'category',
+        'Weight': 'float32', 'Q1_Points': 'float32', 'Q2_Points': 'float32', 'Q3_Points': 'float32', 'Q4_Points': 'float32',
+    },
+    'Self_Dev': {'Course': 'string', 'From': 'category', 'Skill': 'category', 'Status': 'category', 'Proficiency': 'float32'},
+    'Dream_Schools': {'University': 'string', 'School': 'string'},
+    'Dream_Majors': {'Major': 'string'}
 }
 
 
@@ -40,4 +103,69 @@ TABLE_MAPPING = {
 
 NUMERIC_COLS = [
     'Weight', 'Q1_Points', 'Q2_Points', 'Q3_Points', 'Q4_Points', 'Proficiency'
-]
\ No newline at end of file
+]
+
+# Tables read and parsed at the same time by GradeSystem.load_tables() (one thread per file).
+LOAD_WORKERS = 4
+
+# Text columns covered by GradeSystem.search(): typo-tolerant lookups over character
+# n-grams of their values. Hits scoring below min_score (1.0 = exact) are left out.
+SEARCH_COLS = {
+    'Grades': ['Code', 'Course'],
+    'Self_Dev': ['Skill'],
+    'Dream_Schools': ['University'],
+    'Dream_Majors': ['Major'],
+}
+SEARCH = {'ngram': 3, 'min_score': 0.45, 'limit': 20}
+
+# Undo/redo and named snapshots (GradeSystem.undo/redo/snapshot/restore). Every change is
+# logged as a delta under <data dir>/<dirname>/; every checkpoint_every steps the tables
+# changed since the last checkpoint are copied there too, so going back or forward never
+# replays more than that many steps. Once more than max_steps are kept, the oldest are
+# dropped (a checkpoint at a time, so up to checkpoint_every more remain); 0 keeps all.
+HISTORY = {'enabled': True, 'dirname': 'history', 'checkpoint_every': 100, 'max_steps': 1000}
+
+# Rows per page in the table viewer (ConsoleUI._display_df).
+PAGE_SIZE = 20
+
+# Mutations are fsynced to a per-table journal; once a journal holds this many
+# entries it is folded back into its base file on a background thread.
+JOURNAL_COMPACT_THRESHOLD = 1000
+
+
+# Rows read, validated and inserted per step by the batch import/export/apply commands.
+BATCH_CHUNK_ROWS = 50_000
+
+
+# GPA engine. Each quarter (Q1-Q4_Points) is scored out of QUARTER_MAX points; the
+# course percentage is the mean of the quarters entered so far.
+GPA = {
+    'quarter_max': 100,
+    # (minimum percentage, grade points), checked from the top down
+    'scale': [
+        (93, 4.0), (90, 3.7), (87, 3.3), (83, 3.0), (80, 2.7), (77, 2.3),
+        (73, 2.0), (70, 1.7), (67, 1.3), (65, 1.0), (0, 0.0),
+    ],
+    # Added to the grade points of a passing course, keyed by the 'Level' column (case-insensitive)
+    'level_boosts': {'honors': 0.5, 'ap': 1.0, 'ib': 1.0},
+    # Credits used when 'Weight' is empty
+    'default_weight': 1.0,
+}
+
+
+# Headless chart rendering (python main.py render): output/cache directory.
+RENDER_DIR = BASE_DIR / "charts"
+
+
+# Local HTTP/JSON API (python main.py serve). Requests are handled by a pool of 'workers'
+# threads; mutations go to a single writer thread that commits whatever has queued up
+# (at most 'batch_max_ops') as one transaction. 'max_rows' caps one page of rows and
+# 'idle_timeout' closes keep-alive connections that stop sending requests.
+SERVER = {
+    'host': '127.0.0.1',
+    'port': 8765,
+    'workers': 8,
+    'batch_max_ops': 500,
+    'max_rows': 10_000,
+    'idle_timeout': 15,
+}
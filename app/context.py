@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from . import config
+
+# Rough OpenAI tokenizer ratio for short English/numeric text; avoids a tokenizer dependency.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _fmt(value, digits=1):
+    if value is None or value is pd.NA or (isinstance(value, (float, np.floating)) and np.isnan(value)):
+        return '-'
+    if isinstance(value, (int, float, np.number)):
+        return f"{float(value):.{digits}f}".rstrip('0').rstrip('.')
+    return str(value).strip()
+
+
+def _text_rows(df, columns):
+    if df is None or df.empty:
+        return []
+    rows = df.reindex(columns=columns).astype(object)
+    rows = rows.where(rows.notna(), None)
+    return [tuple(_fmt(v) for v in row) for row in rows.itertuples(index=False)]
+
+
+def _year_lines(report):
+    years = report['years']
+    lines = []
+    courses = report['courses']
+    counts = courses.groupby('Grade_Level').size() if not courses.empty else pd.Series(dtype=int)
+    means = courses.groupby('Grade_Level')['Percent'].mean() if not courses.empty else pd.Series(dtype=float)
+    for grade, row in years.iterrows():
+        lines.append(f"{grade}: {counts.get(grade, 0)} courses, avg {_fmt(means.get(grade), 1)}%, "
+                     f"GPA {_fmt(row['Unweighted_GPA'], 2)} unweighted / {_fmt(row['Weighted_GPA'], 2)} weighted, "
+                     f"{_fmt(row['Credits'])} credits")
+    cum = report['cumulative']
+    if cum['Credits']:
+        lines.append(f"Cumulative: GPA {_fmt(cum['Unweighted_GPA'], 2)} unweighted / "
+                     f"{_fmt(cum['Weighted_GPA'], 2)} weighted, {_fmt(cum['Credits'])} credits")
+    return lines
+
+
+def _subject_lines(report, top):
+    courses = report['courses']
+    if courses.empty:
+        return [], []
+    scored = courses.dropna(subset=['Percent'])
+    course = scored['Course'].astype(object)
+    label = scored['Code'].astype(object).fillna(course) if 'Code' in scored else course
+    scored = scored.assign(_label=label.astype(str))
+    # Stable tie-breaks keep the digest (and the AI cache key) identical across runs.
+    ranked = scored.sort_values(['Percent', 'Grade_Level', '_label'], ascending=[False, True, True], kind='mergesort')
+
+    def line(row):
+        name, course = row['_label'], _fmt(row.get('Course'))
+        if course not in ('-', name):
+            name = f"{name} {course}"
+        level = _fmt(row.get('Level'))
+        where = row['Grade_Level'] if level == '-' else f"{row['Grade_Level']}, {level}"
+        return f"{name} ({where}): {_fmt(row['Percent'], 1)}%"
+
+    best = [line(r) for _, r in ranked.head(top).iterrows()]
+    # Courses already listed as strongest are not repeated when there are fewer than 2 * top.
+    worst = [line(r) for _, r in ranked.iloc[max(top, len(ranked) - top):].iloc[::-1].iterrows()]
+    return best, worst
+
+
+def build_context(system, max_tokens=None, top_subjects=None):
+    """Summarize the student's tables into a compact, deterministic text digest for the AI.
+
+    Sections are added in priority order (GPA by year, strongest and weakest courses,
+    skills, target schools and majors) until the estimated token count would exceed
+    ``max_tokens``; the section that hits the limit ends with a "+N more" note.
+    """
+    settings = config.AI_CONTEXT
+    max_tokens = settings['max_tokens'] if max_tokens is None else max_tokens
+    top = settings['top_subjects'] if top_subjects is None else top_subjects
+
+    report = system.gpa_report()
+    best, worst = _subject_lines(report, top)
+    skills = []
+    for course, origin, skill, status, prof in _text_rows(
+            system.get_data('Self_Dev'), ['Course', 'From', 'Skill', 'Status', 'Proficiency']):
+        via = f" via {course}" if course != '-' and skill != '-' else ''
+        via += f" ({origin})" if origin != '-' else ''
+        skills.append(f"{skill if skill != '-' else course}{via}: proficiency {prof}, {status}")
+    schools = [f"{uni}" + (f" - {school}" if school != '-' else '')
+               for uni, school in _text_rows(system.get_data('Dream_Schools'), ['University', 'School'])]
+    majors = [major for (major,) in _text_rows(system.get_data('Dream_Majors'), ['Major'])]
+
+    sections = [
+        ('GPA by year', _year_lines(report)),
+        ('Strongest courses', best),
+        ('Weakest courses', worst),
+        ('Skills', skills),
+        ('Target schools', schools),
+        ('Target majors', majors),
+    ]
+
+    out, used = [], 0
+    for title, lines in sections:
+        if not lines:
+            continue
+        block = [f"[{title}]"] + [f"- {text}" for text in lines]
+        costs = [estimate_tokens(text) + 1 for text in block]
+        if used + costs[0] + costs[1] > max_tokens:
+            break
+        for i, (text, cost) in enumerate(zip(block, costs)):
+            if used + cost > max_tokens:
+                more = f"- (+{len(block) - i} more)"
+                if used + estimate_tokens(more) + 1 <= max_tokens:
+                    out.append(more)
+                return "\n".join(out)
+            out.append(text)
+            used += cost
+    return "\n".join(out)
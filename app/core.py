@@ -1,74 +1,903 @@
+import bisect
+import hashlib
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 from . import config
 from .ai import AIAssistant
+from .buffer import AppendBuffer
+from .context import build_context
+from .history import History, invert
+from .views import CombinedGradesView, GRADE_LEVELS
+from .index import TableIndex
+from .search import SearchIndex
+from . import profiling
+from . import schema
+from . import storage
+
+SCORE_COLS = ['Q1_Points', 'Q2_Points', 'Q3_Points', 'Q4_Points']
+
+
+def compute_gpa(grades, settings=None):
+    """Vectorized GPA over a frame of grade rows carrying a ``Grade_Level`` column.
+
+    Returns a dict with per-course rows (``courses``), ``semesters`` (per Grade_Level/Sem),
+    ``years`` (per Grade_Level) and a ``cumulative`` dict, each with credit-weighted
+    ``Unweighted_GPA`` and ``Weighted_GPA`` (with Honors/AP boosts).
+    """
+    settings = settings or config.GPA
+    empty = pd.DataFrame(columns=['Credits', 'Unweighted_GPA', 'Weighted_GPA'])
+    if grades is None or grades.empty:
+        return {'courses': pd.DataFrame(), 'semesters': empty, 'years': empty,
+                'cumulative': {'Credits': 0.0, 'Unweighted_GPA': np.nan, 'Weighted_GPA': np.nan}}
+
+    score_cols = [c for c in SCORE_COLS if c in grades.columns]
+    scores = grades[score_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    entered = (~np.isnan(scores)).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        percent = np.nansum(scores, axis=1) / entered / settings['quarter_max'] * 100
+    percent[entered == 0] = np.nan
+
+    cutoffs, points = zip(*sorted(settings['scale']))
+    cutoffs, points = np.asarray(cutoffs, dtype=float), np.asarray(points, dtype=float)
+    bucket = np.searchsorted(cutoffs, np.nan_to_num(percent, nan=-1.0), side='right') - 1
+    unweighted = np.where(bucket >= 0, points[np.clip(bucket, 0, None)], 0.0)
+
+    levels = grades['Level'] if 'Level' in grades.columns else pd.Series('', index=grades.index)
+    # Looked up once per distinct Level, not per row; missing levels (code -1) get the trailing 0.
+    codes, uniques = pd.factorize(levels)
+    per_level = pd.Index(uniques).astype(str).str.strip().str.lower().map(settings['level_boosts'])
+    boosts = np.append(np.nan_to_num(np.asarray(per_level, dtype=float)), 0.0)[codes]
+    weighted = unweighted + np.where(unweighted > 0, boosts, 0.0)
+
+    weights = grades['Weight'] if 'Weight' in grades.columns else pd.Series(np.nan, index=grades.index)
+    credits = pd.to_numeric(weights, errors='coerce').fillna(settings['default_weight']).to_numpy(dtype=float)
+    credits = np.where(np.isnan(percent), 0.0, credits)
+
+    courses = grades[[c for c in ['Grade_Level', 'Sem', 'Level', 'Code', 'Course'] if c in grades.columns]].copy()
+    courses['Percent'] = percent
+    courses['Credits'] = credits
+    courses['Unweighted_GPA'] = np.where(np.isnan(percent), np.nan, unweighted)
+    courses['Weighted_GPA'] = np.where(np.isnan(percent), np.nan, weighted)
+
+    totals = pd.DataFrame({
+        'Grade_Level': grades['Grade_Level'].to_numpy(),
+        'Sem': grades['Sem'].to_numpy() if 'Sem' in grades.columns else np.nan,
+        'Credits': credits,
+        'U': credits * unweighted,
+        'W': credits * weighted,
+    })
+
+    def _rollup(frame):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({
+                'Credits': frame['Credits'],
+                'Unweighted_GPA': frame['U'] / frame['Credits'].where(frame['Credits'] > 0),
+                'Weighted_GPA': frame['W'] / frame['Credits'].where(frame['Credits'] > 0),
+            })
+
+    order = {g: i for i, g in enumerate(GRADE_LEVELS)}
+    sums = ['Credits', 'U', 'W']
+    semesters = _rollup(totals.groupby(['Grade_Level', 'Sem'], sort=False)[sums].sum())
+    semesters = semesters.sort_index(key=lambda idx: idx.map(order) if idx.name == 'Grade_Level' else idx)
+    years = _rollup(totals.groupby('Grade_Level', sort=False)[sums].sum())
+    years = years.sort_index(key=lambda idx: idx.map(order))
+    overall = _rollup(totals[sums].sum().to_frame().T).iloc[0]
+
+    return {'courses': courses, 'semesters': semesters, 'years': years, 'cumulative': overall.to_dict()}
+
+
+def _digest(df):
+    # Content of a table, for telling whether it still is the copy a checkpoint saw.
+    h = hashlib.sha256(repr(list(df.columns)).encode('utf-8'))
+    if len(df):
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
 
 class GradeSystem:
-    def __init__(self):
+    def __init__(self, engine=None, data_dir=None):
         self.data = {} 
-        self._load_all_data()
-        self.ai_agent = AIAssistant()
+        self.storage = storage.get_engine(engine)
+        self.files = config.FILES if data_dir is None else config.table_files(data_dir)
+        if data_dir is not None:
+            Path(data_dir).mkdir(parents=True, exist_ok=True)
+        settings = config.HISTORY
+        history_dir = Path(config.DATA_DIR if data_dir is None else data_dir) / settings['dirname']
+        self.history = (History(history_dir, settings['checkpoint_every'], settings['max_steps'])
+                        if settings['enabled'] else None)
+        self._step = []
+        self._bulk_rows = {}  # Rows changed per table by the open bulk() run, which is one step
+        self._replaying = False
+        self._checkpoints = storage.NpyEngine()  # Private copies: the cheapest format to write, whatever the engine
+        self._dirty = set()
+        self._journals = {}
+        self._buffers = {}
+        self._compactions = {}
+        self._deferred = set()  # Compactions put off by an open transaction
+        self._versions = {}
+        self._indexes = {}
+        self._search_indexes = {}
+        self._tombstones = {}
+        self._bulk_depth = 0
+        self._bulk_save = False
+        self._pending = {}
+        self._stamps = {}
+        self._conflicts = {}
+        self._gpa_cache = None
+        self._summary_cache = None
+        self._context_cache = None
+        self._combined_view = CombinedGradesView(self)
+        self._lock = threading.RLock()
+        self._ai_agent = None
+        for table_name, filename in self.files.items():
+            if config.TABLE_MAPPING.get(table_name):
+                self._journals[table_name] = self.storage.journal(self.storage.path(filename))
+            else:
+                print(f"[System Warning] No mapping found for table '{table_name}' in config.")
+
+    @property
+    def ai_agent(self):
+        if self._ai_agent is None:
+            self._ai_agent = AIAssistant()
+        return self._ai_agent
 
     def _safe_load(self, filename, col_type):
         try:
-            return pd.read_csv(filename)
+            path = self.storage.path(filename)
+            return schema.apply(self.storage.read(path, schema.read_dtypes(col_type)), col_type)
         except FileNotFoundError:
-            default_cols = config.COLUMNS.get(col_type, [])
-            return pd.DataFrame(columns=default_cols)
+            return schema.empty_frame(col_type)
+
+    def _read_table(self, key):
+        # Stamped before reading: a write that lands mid-read shows up as a change later.
+        stamp = self._stamp(key, self._stamps.get(key))
+        return stamp, self._safe_load(self.files[key], config.TABLE_MAPPING[key])
+
+    def _install(self, key, stamp, df, conflicts=None):
+        self._stamps[key] = stamp
+        self._reset(key, df)
+        self._replay_journal(key, conflicts)
+
+    def _reset(self, key, df):
+        self.data[key] = df
+        self._buffers[key] = AppendBuffer(df.columns)
+        self._tombstones[key] = []
+        col_type = config.TABLE_MAPPING[key]
+        if col_type == 'Grades':
+            self._indexes[key] = TableIndex()
+        if config.SEARCH_COLS.get(col_type):
+            self._search_indexes[key] = SearchIndex(config.SEARCH_COLS[col_type], config.SEARCH['ngram'])
+
+    @profiling.timed('core.load_table')
+    def _load_table(self, key, conflicts=None):
+        with self._lock:
+            if key not in self.data:
+                self._install(key, *self._read_table(key), conflicts)
+            return self._materialize(key)
+
+    @profiling.timed('core.load_tables')
+    def load_tables(self, keys=None, workers=None):
+        """Load the tables in ``keys`` (default: all) that are not in memory yet.
+
+        The files are read and parsed on up to ``workers`` threads (``config.LOAD_WORKERS``);
+        journals are replayed afterwards, one table at a time, in ``keys`` order.
+        """
+        keys = [k for k in (self._journals if keys is None else keys) if k in self._journals and k not in self.data]
+        workers = min(workers or config.LOAD_WORKERS, len(keys))
+        if workers <= 1:
+            for key in keys: self._load_table(key)
+            return
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sams-load') as pool:
+            reads = {key: pool.submit(self._read_table, key) for key in keys}
+            for key, read in reads.items():
+                stamp, df = read.result()
+                with self._lock:
+                    if key not in self.data: self._install(key, stamp, df)
+
+    def _merged(self, key):
+        # Buffered appends merged in, deleted rows still in place: positions here are physical.
+        with self._lock:
+            buffer = self._buffers[key]
+            if len(buffer):
+                pending = schema.apply(buffer.to_frame(), config.TABLE_MAPPING[key])
+                self.data[key] = schema.concat(self.data[key], pending)
+                buffer.clear()
+            return self.data[key]
+
+    def _materialize(self, key):
+        # All under the lock: a background compaction may drop the tombstoned rows in between.
+        with self._lock:
+            df = self._merged(key)
+            tombstones = self._tombstones[key]
+            if tombstones:
+                keep = np.ones(len(df), dtype=bool)
+                keep[tombstones] = False
+                df = self.data[key] = df[keep].reset_index(drop=True)
+                tombstones.clear()
+                profiling.count('tombstones.compactions')
+            return df
+
+    def _table(self, key):
+        if key in self.data: return self._materialize(key)
+        if key not in self._journals: return None
+        return self._load_table(key)
+
+    def _loaded(self, key):
+        if key not in self._journals: return False
+        if key not in self.data: self._load_table(key)
+        return True
+
+    def row_count(self, key):
+        """Live rows of ``key`` without merging pending appends or deletes into the frame."""
+        if not self._loaded(key): return 0
+        with self._lock:
+            return len(self.data[key]) + len(self._buffers[key]) - len(self._tombstones[key])
+
+    def _physical(self, key, row):
+        """Position in the stored frame of the ``row``-th live row, skipping tombstoned rows."""
+        tombstones = self._tombstones[key]
+        # tombstones[i] - i live rows precede the i-th tombstone; that count never decreases.
+        return row + bisect.bisect_right(range(len(tombstones)), row, key=lambda i: tombstones[i] - i)
 
     def _load_all_data(self):
-        for table_name, filename in config.FILES.items():
-            col_type = config.TABLE_MAPPING.get(table_name)
-            if col_type:
-                self.data[table_name] = self._safe_load(filename, col_type)
-            else:
-                print(f"[System Warning] No mapping found for table '{table_name}' in config.")
+        self.load_tables()
+
+    def _replay_journal(self, key, conflicts=None):
+        entries = self._journals[key].recover()
+        for entry in entries:
+            self._replay(key, entry, conflicts)
+        if entries:
+            self._dirty.add(key)
+
+    def _replay(self, key, entry, conflicts):
+        if conflicts is None:
+            self._apply(key, entry)
+        elif entry['op'] == 'batch':
+            for sub in entry['entries']:
+                self._replay(key, sub, conflicts)
+        else:
+            problem = self._stale(key, entry)
+            if problem: conflicts.append(problem)
+            else: self._apply(key, entry)
+
+    def _stale(self, key, entry):
+        """Why ``entry`` no longer fits the reloaded table: its row does not hold what it held when
+        the edit was made. None if it still applies."""
+        if entry['op'] == 'add': return None
+        row = entry['row']
+        if entry['op'] == 'insert':
+            return None if row <= self.row_count(key) else f"row {row + 1}: removed on disk"
+        if row >= self.row_count(key): return f"row {row + 1}: removed on disk"
+        df = self._merged(key)
+        pos = self._physical(key, row)
+        if entry['op'] == 'update':
+            if 'old' not in entry or entry['col'] not in df.columns: return None
+            current = df.iat[pos, df.columns.get_loc(entry['col'])]
+            if schema.same_value(current, entry['old']) or schema.same_value(current, entry['value']): return None
+            return f"row {row + 1} {entry['col']}: {current} on disk, {entry['value']} here"
+        if 'old' not in entry: return None
+        on_disk = df.iloc[pos]
+        if all(schema.same_value(on_disk.get(col), value) for col, value in entry['old'].items()): return None
+        return f"row {row + 1}: changed on disk, deleted here"
+
+    def _stamp(self, key, previous=None):
+        return self.storage.stamp(self.storage.path(self.files[key]), previous)
+
+    @profiling.timed('core.refresh')
+    def refresh(self):
+        """Pick up loaded tables that another program changed on disk since they were read.
+
+        Only changed tables are touched. One without local edits is simply dropped and re-read
+        on next use; one with edits is re-read and its journal replayed on top. An edit whose
+        row no longer holds what it held when the edit was made is a conflict: the table keeps
+        its in-memory state and is not written until ``resolve`` picks a side.
+        Returns ``(reloaded, conflicts)``: table names, and ``{table: [reason, ...]}`` for
+        conflicts found by this call.
+        """
+        reloaded, conflicts = [], {}
+        with self._lock:
+            for key in list(self.data):
+                # A table being compacted is checked by the compaction itself before it writes.
+                worker = self._compactions.get(key)
+                if key in self._pending or (worker is not None and worker.is_alive()): continue
+                status = self._sync(key)
+                if status == 'reloaded': reloaded.append(key)
+                elif status == 'conflict': conflicts[key] = self._conflicts[key][1]
+        return reloaded, conflicts
+
+    def _sync(self, key):
+        old = self._stamps.get(key)
+        new = self._stamp(key, old)
+        if new is old: return None
+        if (new and new[2]) == (old and old[2]):
+            self._stamps[key] = new  # Touched, same bytes
+            return None
+        flagged = self._conflicts.get(key)
+        if flagged and flagged[0] == new: return None
+        profiling.count('refresh.changed')
+        if key not in self._dirty and not self._journals[key].pending():
+            self._drop(key)
+            return 'reloaded'
+        stores = (self.data, self._buffers, self._tombstones, self._indexes, self._search_indexes)
+        saved = [(store, store.pop(key, None)) for store in stores]
+        self._stamps[key] = new
+        conflicts = []
+
+        def restore():
+            for store, value in saved:
+                store.pop(key, None)
+                if value is not None: store[key] = value
+            self._stamps[key] = old
+        try:
+            self._load_table(key, conflicts)
+        except Exception:
+            restore()  # e.g. a file caught half-written: keep our copy and look again next time
+            raise
+        if conflicts:
+            restore()
+            self._conflicts[key] = (new, conflicts)
+            return 'conflict'
+        self._conflicts.pop(key, None)
+        self._versions[key] = self.version(key) + 1
+        return 'reloaded'
+
+    @property
+    def conflicts(self):
+        """``{table: [reason, ...]}`` for tables flagged by ``refresh`` and not yet resolved."""
+        return {key: reasons for key, (_, reasons) in self._conflicts.items()}
+
+    def resolve(self, key, keep='mine'):
+        """Settle a conflict: 'mine' writes the in-memory table over the file on disk, 'theirs'
+        throws away the local edits and re-reads the file."""
+        if keep not in ('mine', 'theirs'): raise ValueError(f"keep must be 'mine' or 'theirs', not {keep!r}")
+        worker = self._compactions.get(key)
+        if worker is not None: worker.join()
+        with self._lock:
+            stamp, _ = self._conflicts.pop(key)
+            if keep == 'theirs':
+                self._journals[key].discard()
+                self._drop(key)
+                return
+            self._stamps[key] = stamp
+        self._compact(key)
+
+    def _apply(self, key, entry):
+        op = entry['op']
+        if op == 'add':
+            self._buffers[key].extend(entry['rows'])
+        elif op == 'update':
+            schema.set_cell(self._merged(key), self._physical(key, entry['row']), entry['col'], entry['value'])
+        elif op == 'delete':
+            # Tombstone only; the rows are dropped in one pass on the next full read or save.
+            bisect.insort(self._tombstones[key], self._physical(key, entry['row']))
+        elif op == 'insert':
+            # Undo of a delete: the rows go back to their old position, which rebuilds the frame.
+            df = self._materialize(key)
+            buffer = AppendBuffer(df.columns)
+            buffer.extend(entry['rows'])
+            rows = schema.apply(buffer.to_frame(), config.TABLE_MAPPING[key])
+            self.data[key] = schema.concat(schema.concat(df.iloc[:entry['row']], rows), df.iloc[entry['row']:])
+        elif op == 'batch':
+            for sub in entry['entries']:
+                self._apply(key, sub)
 
+    def version(self, key):
+        return self._versions.get(key, 0)
+
+    def _record(self, key, entry):
+        bulk = self.history is not None and not self._replaying and self._bulk_save and (self._bulk_rows or not self._step)
+        if bulk and not self._bulk_rows and self.history.checkpoint_at(self.history.position) is None:
+            # A bulk run (an import) is kept as one step between two checkpoints, not row by row:
+            # copy the tables as they are before its first change.
+            self._checkpoint()
+        start = len(self.data[key]) + len(self._buffers[key])
+        self._apply(key, entry)
+        self._dirty.add(key)
+        old_version = self.version(key)
+        self._versions[key] = old_version + 1
+        if entry['op'] == 'update':
+            self._combined_view.patch(key, entry['row'], entry['col'], old_version)
+        self._update_index(key, entry, start)
+        if bulk:
+            self._bulk_rows[key] = self._bulk_rows.get(key, 0) + len(entry.get('rows', [None]))
+        elif self.history is not None and not self._replaying:
+            # Adds also note the row they started at, so undo knows which rows to delete.
+            self._step.append((key, {**entry, 'row': start - len(self._tombstones[key])} if entry['op'] == 'add' else entry))
+        if self._bulk_depth:
+            pending = self._pending.setdefault(key, [])
+            if not self._bulk_save: pending.append(entry)
+            return
+        self._journal(key, entry)
+        if self._step: self._end_step()
+
+    def _journal(self, key, entry, count=1):
+        journal = self._journals[key]
+        journal.append(entry, count)
+        profiling.count('journal.appends')
+        if journal.durable:
+            # The engine applied the change to its own store: nothing left to save.
+            self._dirty.discard(key)
+            return
+        if len(journal) >= config.JOURNAL_COMPACT_THRESHOLD:
+            self._compact_in_background(key)
+
+    def _update_index(self, key, entry, start):
+        search = self._search_indexes.get(key)
+        if search is not None:
+            if entry['op'] in ('add', 'insert'): search.add(entry['rows'])
+            elif entry['op'] == 'update': search.update(entry['col'], entry['old'], entry['value'])
+            else: search.remove(entry['old'])
+        index = self._indexes.get(key)
+        if index is None: return
+        if entry['op'] == 'add':
+            index.add(start, entry['rows'])
+        elif entry['op'] == 'update':
+            index.update(entry['row'], entry['col'], entry['old'], entry['value'])
+        else:
+            index.invalidate()
+
+    def _end_step(self):
+        step, self._step = self._step, []
+        bulk, self._bulk_rows = self._bulk_rows, {}
+        if bulk: step = [(key, {'op': 'bulk', 'count': n}) for key, n in bulk.items()]
+        if not step: return
+        self.history.record(step)
+        # The checkpoint after a bulk step is the state its redo loads.
+        if bulk or self.history.checkpoint_due(): self._checkpoint()
+        base = self.history.trim_point()
+        if base is not None: self._trim_history(base)
+
+    @profiling.timed('core.checkpoint')
+    def _checkpoint(self):
+        name, tables = self.history.new_checkpoint(list(self.files))
+        self.load_tables(tables)
+        folder = self.history.folder / name
+        digests = {}
+        for key in tables:
+            df = self._materialize(key)
+            self._checkpoints.write(df, self._checkpoints.path(folder / self.files[key].name))
+            digests[key] = _digest(df)
+        self.history.add_checkpoint(name, tables, digests)
+
+    @profiling.timed('core.history_trim')
+    def _trim_history(self, base):
+        # The new first checkpoint must hold every table: copy in those it took from earlier ones.
+        history = self.history
+        folder = history.folder / base['dir']
+        for key in self.files:
+            if key in base['tables']: continue
+            name = self._checkpoints.path(folder / self.files[key].name).name
+            shutil.copyfile(history.checkpoint_folder(base, key) / name, folder / name)
+        history.trim(base)
+
+    @profiling.timed('core.compact')
+    def _compact(self, key, snapshot=False):
+        journal = self._journals[key]
+        with self._lock:
+            if self._bulk_depth:
+                # Uncommitted changes are in memory and must not reach the base file: run again
+                # once the transaction commits or rolls back.
+                self._deferred.add(key)
+                if self._compactions.get(key) is threading.current_thread(): del self._compactions[key]
+                return
+            # Never write over a change made on disk since the table was read.
+            self._sync(key)
+            if key in self._conflicts or key not in self.data: return
+            df = self._materialize(key)
+            if snapshot: df = df.copy()
+            journal.rotate()
+            self._dirty.discard(key)
+        try:
+            journal.commit(lambda path: self.storage.write(df, path))
+        except Exception:
+            self._dirty.add(key)
+            raise
+        self._stamps[key] = self._stamp(key)
+
+    def _compact_in_background(self, key):
+        running = self._compactions.get(key)
+        if running is not None and running.is_alive():
+            return
+        worker = threading.Thread(target=self._compact, args=(key, True), daemon=True)
+        self._compactions[key] = worker
+        worker.start()
+
+    def _compact_deferred(self):
+        deferred, self._deferred = self._deferred, set()
+        for key in deferred:
+            if key in self._dirty: self._compact_in_background(key)
+
+    @profiling.timed('core.save_all')
     def save_all(self):
         try:
-            for key, filename in config.FILES.items():
-                if key in self.data:
-                    self.data[key].to_csv(filename, index=False)
-            return True, "All changes saved successfully."
+            for worker in list(self._compactions.values()):
+                worker.join()
+            for key, journal in self._journals.items():
+                if key not in self.data and journal.pending():
+                    self._load_table(key)
+            changed = [key for key in self.files if key in self._dirty]
+            for key in changed:
+                self._compact(key)
+            saved = [key for key in changed if key not in self._dirty]
+            message = f"Saved {len(saved)} changed table(s): {', '.join(saved)}." if saved else ""
+            if self._conflicts:
+                return False, (f"{message} Not saved, changed on disk: {', '.join(self._conflicts)} "
+                               "(resolve the conflicts first).").lstrip()
+            return True, message or "No changes to save."
         except Exception as e:
             return False, str(e)
 
+    @contextmanager
+    def transaction(self, save=False):
+        """Group adds, edits and deletes into one unit that is committed once on exit.
+
+        Each changed table gets a single journal record (one fsync), so a crash keeps either
+        all of its changes or none. With ``save=True`` the changed tables are rewritten
+        instead, which suits large imports. If the block raises, every table it touched is
+        rolled back to its state before the block and the error is re-raised. Nested blocks
+        join the outermost one, which is the only one that commits or rolls back.
+        """
+        with self._lock:
+            self._bulk_depth += 1
+            outermost = self._bulk_depth == 1
+            self._bulk_save = self._bulk_save or save
+        try:
+            yield self
+        except BaseException:
+            if outermost:
+                # Still inside the transaction, so a compaction either finishes writing the
+                # committed state it took before the block or defers; never under the lock.
+                for key in list(self._pending):
+                    worker = self._compactions.get(key)
+                    if worker is not None: worker.join()
+            with self._lock:
+                self._bulk_depth -= 1
+                if outermost: self._rollback()
+            raise
+        with self._lock:
+            self._bulk_depth -= 1
+            if not outermost: return
+            pending, self._pending = self._pending, {}
+            save, self._bulk_save = self._bulk_save, False
+            if not save:
+                try:
+                    for key, entries in pending.items():
+                        if entries:
+                            entry = entries[0] if len(entries) == 1 else {'op': 'batch', 'entries': entries}
+                            self._journal(key, entry, len(entries))
+                except OSError as e:
+                    self._step, self._bulk_rows = [], {}
+                    raise IOError(f"Commit failed: {e}") from e
+                finally:
+                    self._compact_deferred()
+                self._end_step()
+                return
+        ok, msg = self.save_all()
+        with self._lock:
+            self._compact_deferred()
+        if not ok:
+            self._step, self._bulk_rows = [], {}
+            raise IOError(msg)
+        self._end_step()
+
+    def bulk(self):
+        """A ``transaction(save=True)``: no journaling, changed tables are rewritten once on exit."""
+        return self.transaction(save=True)
+
+    def _rollback(self):
+        # Nothing in the transaction reached the journal, so base file + journal still hold
+        # the state from before it: drop the touched tables and let them reload on next use.
+        for key in self._pending:
+            self._drop(key)
+        self._pending = {}
+        self._bulk_save = False
+        self._step, self._bulk_rows = [], {}
+        self._compact_deferred()
+
+    def _drop(self, key):
+        # Forget the in-memory copy of ``key``; the next use reloads it from base file + journal.
+        for store in (self.data, self._buffers, self._tombstones, self._indexes, self._search_indexes, self._stamps):
+            store.pop(key, None)
+        self._dirty.discard(key)
+        self._versions[key] = self.version(key) + 1
+
+    def undo(self):
+        """Take back the last change (a transaction counts as one). Returns its description, or
+        None if there is nothing to undo. Works across saves and restarts."""
+        if self.history is None or self.history.position == 0: return None
+        label = self.history.steps[self.history.position - 1]['label']
+        self._goto(self.history.position - 1)
+        return label
+
+    def redo(self):
+        """Apply the last undone change again. Returns its description, or None."""
+        if self.history is None or self.history.position == len(self.history.steps): return None
+        label = self.history.steps[self.history.position]['label']
+        self._goto(self.history.position + 1)
+        return label
+
+    def snapshot(self, name):
+        """Name the current state so ``restore(name)`` can return to it later."""
+        if self.history is None: raise RuntimeError("History is turned off (config.HISTORY['enabled'])")
+        self.history.snapshot(name)
+
+    def restore(self, name):
+        """Bring every table back to snapshot ``name``. The steps in between stay in the history,
+        so ``redo`` (or restoring a later snapshot) goes forward again."""
+        if self.history is None or name not in self.history.snapshots: raise KeyError(name)
+        self._goto(self.history.snapshots[name]['position'])
+
+    def drop_snapshot(self, name):
+        if self.history is None: raise KeyError(name)
+        self.history.drop(name)
+
+    @profiling.timed('core.history_goto')
+    def _goto(self, target):
+        # Walk the deltas from wherever is closer: the current state, or the nearest checkpoint
+        # once the walk would be longer than the checkpoint interval.
+        history = self.history
+        checkpoint = history.nearest_checkpoint(target)
+        distance = abs(target - history.position)
+        if checkpoint is not None and distance > history.checkpoint_every and abs(target - checkpoint['position']) < distance:
+            # A jump can only be checked against tables a checkpoint saw as they are now;
+            # otherwise the walk checks every step on the way.
+            tables = history.tables_between(checkpoint['position'], history.position)
+            if all(history.digest(history.position, key) is not None for key in tables):
+                self._load_checkpoint(checkpoint)
+        self._walk(target)
+
+    def _walk(self, target):
+        # Runs of delta steps are replayed, one transaction per run; a bulk step loads the
+        # checkpoint on its far side instead.
+        history = self.history
+        while history.position != target:
+            forward = target > history.position
+            step = history.position if forward else history.position - 1
+            if not history.steps[step]['bulk']:
+                self._replay_steps(target)
+                continue
+            checkpoint = history.checkpoint_at(step + 1 if forward else step)
+            if checkpoint is None:
+                raise ValueError(f"The checkpoint of step {step + 1} ({history.steps[step]['label']}) is missing")
+            self._load_checkpoint(checkpoint)
+
+    def _replay_steps(self, target):
+        history = self.history
+        position = history.position
+        self._replaying = True
+        try:
+            with self.transaction():
+                while position != target:
+                    step = position if target > position else position - 1
+                    if history.steps[step]['bulk']: break
+                    changes = history.changes(step)
+                    if target < position: changes = invert(changes)
+                    position += 1 if target > position else -1
+                    for key, entry in changes:
+                        problem = self._mismatch(key, entry)
+                        if problem: raise ValueError(f"{key} no longer matches its history ({problem})")
+                        self._record(key, entry)
+        finally:
+            self._replaying = False
+        history.goto(position)
+
+    def _mismatch(self, key, entry):
+        if entry['op'] == 'add':
+            count = self.row_count(key)
+            return None if entry.get('row', count) == count else f"expected {entry['row']} rows, found {count}"
+        return self._stale(key, entry)
+
+    def _load_checkpoint(self, checkpoint):
+        # Only the tables that differ between the checkpoint and now are replaced, and only if
+        # they still are what the history says they are now: a table that refresh() merged
+        # outside changes into, say, would lose them. Checked before anything is replaced.
+        history = self.history
+        tables = [key for key in self.files if key in history.tables_between(checkpoint['position'], history.position)]
+        self.load_tables(tables)
+        for key in tables:
+            expected = history.digest(history.position, key)
+            if expected is not None and _digest(self._materialize(key)) != expected:
+                raise ValueError(f"{key} no longer matches its history (changed outside it since step {history.position})")
+        for key in tables:
+            path = self._checkpoints.path(history.checkpoint_folder(checkpoint, key) / self.files[key].name)
+            self._replace_table(key, schema.apply(self._checkpoints.read(path), config.TABLE_MAPPING[key]))
+        history.goto(checkpoint['position'])
+
+    def _replace_table(self, key, df):
+        worker = self._compactions.get(key)
+        if worker is not None: worker.join()
+        self._load_table(key)  # Stamped and with its journal read, so the rewrite folds the journal away
+        with self._lock:
+            self._reset(key, df)
+            self._dirty.add(key)
+            self._versions[key] = self.version(key) + 1
+        self._compact(key)
+
     def get_data(self, key):
-        return self.data.get(key)
+        return self._table(key)
 
+    @profiling.timed('core.add_row')
     def add_row(self, key, row_data):
-        if key not in self.data: return False
-        new_df = pd.DataFrame([row_data])
-        self.data[key] = pd.concat([self.data[key], new_df], ignore_index=True)
-        return True
+        return self.add_rows(key, [row_data]) == 1
+
+    @profiling.timed('core.add_rows')
+    def add_rows(self, key, rows):
+        if key not in self._journals: return 0
+        if key not in self.data: self._load_table(key)
+        rows = [dict(row) for row in rows]
+        if not rows: return 0
+        with self._lock:
+            self._record(key, {'op': 'add', 'rows': rows})
+        return len(rows)
 
     def update_cell(self, key, row_idx, col_name, new_value):
-        df = self.data.get(key)
-        if df is None or row_idx >= len(df) or col_name not in df.columns: return False
-        col_idx = df.columns.get_loc(col_name)
-        df.iat[row_idx, col_idx] = new_value
+        with self._lock:
+            if not 0 <= row_idx < self.row_count(key): return False
+            df = self._merged(key)
+            if col_name not in df.columns: return False
+            old_value = df.iat[self._physical(key, row_idx), df.columns.get_loc(col_name)]
+            self._record(key, {'op': 'update', 'row': int(row_idx), 'col': col_name, 'value': new_value, 'old': old_value})
         return True
 
     def delete_row(self, key, row_idx):
-        df = self.data.get(key)
-        if df is None or row_idx < 0 or row_idx >= len(df): return False
-        self.data[key] = df.drop(row_idx).reset_index(drop=True)
+        with self._lock:
+            if not 0 <= row_idx < self.row_count(key): return False
+            # The deleted row goes into the journal too, so a reload can tell if it changed on disk.
+            df = self._merged(key)
+            old = df.iloc[self._physical(key, row_idx)].to_dict()
+            self._record(key, {'op': 'delete', 'row': int(row_idx), 'old': old})
         return True
     
+    def find_by(self, tables=None, **criteria):
+        """Return ``(table, row_idx)`` hits whose columns equal the given values.
+
+        Values may be a scalar or a list of accepted values, e.g.
+        ``find_by(Code='MA101', Sem=['S1', 'S2'])``. Code/Course/Sem/Level lookups use the
+        hash indexes of G9-G12; other columns are checked against the candidate rows only.
+        """
+        hits = []
+        for key in tables or GRADE_LEVELS:
+            df = self._table(key)
+            if df is None or df.empty: continue
+            hits.extend((key, row) for row in self._match(key, df, criteria))
+        return hits
+
+    def _match(self, key, df, criteria):
+        index = self._indexes.get(key)
+        indexed = {c: v for c, v in criteria.items() if index is not None and c in index.columns}
+        if indexed:
+            if index.stale: index.build(df)
+            sets = sorted((index.lookup(c, v) for c, v in indexed.items()), key=len)
+            rows = set(sets[0]).intersection(*sets[1:])
+        else:
+            rows = range(len(df))
+        for col, value in criteria.items():
+            if col in indexed: continue
+            if col not in df.columns: return []
+            accepted = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+            rows = [r for r in rows if df.iat[r, df.columns.get_loc(col)] in accepted]
+        return sorted(rows)
+
+    @profiling.timed('core.search')
+    def search(self, text, tables=None, limit=None):
+        """``(table, row_idx)`` hits whose ``config.SEARCH_COLS`` text resembles ``text``, best first.
+
+        Matching is on character n-grams, so typos and partial words still hit ('calclus'
+        finds 'AP Calculus BC'). Values scoring below ``SEARCH['min_score']`` are left out, and
+        at most ``limit`` (default ``SEARCH['limit']``) hits are returned.
+        """
+        limit = config.SEARCH['limit'] if limit is None else limit
+        ranked = []
+        for order, key in enumerate(tables or self.files):
+            if key not in self._journals or not config.SEARCH_COLS.get(config.TABLE_MAPPING[key]): continue
+            df = self._table(key)
+            if df is None or df.empty: continue
+            index = self._search_indexes[key]
+            if index.stale: index.build(df)
+            scores = index.match(text, config.SEARCH['min_score'])
+            if not scores: continue
+            best = index.row_scores(df, scores)
+            # Scores come from a handful of matched values: take rows level by level, in table order.
+            for level in sorted(set(scores.values()), reverse=True):
+                rows = np.flatnonzero(best == level)[:limit]
+                ranked.extend((-level, order, int(row), key) for row in rows)
+        ranked.sort()
+        return [(key, row) for _, _, row, key in ranked[:limit]]
+
+    def query(self, tables=None, **criteria):
+        parts = []
+        for key in tables or GRADE_LEVELS:
+            df = self._table(key)
+            if df is None or df.empty: continue
+            rows = self._match(key, df, criteria)
+            if rows:
+                part = df.iloc[rows].copy()
+                part['Grade_Level'] = key
+                parts.append(part)
+        if not parts: return pd.DataFrame()
+        return pd.concat(parts, ignore_index=True)
+
+    @profiling.timed('core.get_all_grades_combined')
     def get_all_grades_combined(self):
-        combined_data = []
-        grade_levels = ['G9', 'G10', 'G11', 'G12']
-        for grade in grade_levels:
-            df = self.data.get(grade)
+        return self._combined_view.frame()
+
+    def _pushdown(self, keys):
+        """Storage locators of ``keys`` if the engine can query them itself and is up to date."""
+        if not hasattr(self.storage, 'grade_summary'): return None
+        if any(key in self._dirty or key in self._pending or key not in self._journals for key in keys): return None
+        return [self.storage.path(self.files[key]) for key in keys]
+
+    def subject_codes(self):
+        """Sorted distinct course codes across G9-G12."""
+        paths = self._pushdown(GRADE_LEVELS)
+        if paths: return self.storage.subject_codes(paths)
+        combined = self.get_all_grades_combined()
+        return [] if combined.empty else sorted(combined['Code'].dropna().astype(str).unique())
+
+    def grade_summary(self):
+        """Aggregates of the combined grades: ``levels`` holds Total/Courses per Grade_Level and
+        ``subjects`` holds Score_Sum/Rows/Min/Max of Total_Score per Code. Cached per table version."""
+        versions = tuple(self.version(grade) for grade in GRADE_LEVELS)
+        if self._summary_cache is None or self._summary_cache[0] != versions:
+            self._summary_cache = (versions, self._grade_summary())
+        return self._summary_cache[1]
+
+    def _grade_summary(self):
+        paths = self._pushdown(GRADE_LEVELS)
+        if paths: return self.storage.grade_summary(paths)
+        combined = self.get_all_grades_combined()
+        if combined.empty:
+            return {'levels': pd.DataFrame(columns=['Grade_Level', 'Total', 'Courses']),
+                    'subjects': pd.DataFrame(columns=['Code', 'Score_Sum', 'Rows', 'Min', 'Max'])}
+        scores = pd.to_numeric(combined['Total_Score'], errors='coerce').astype('float64')
+        levels = scores.groupby(combined['Grade_Level'].to_numpy(), sort=False).agg(Total='sum', Courses='count')
+        codes = combined['Code'].astype(object).to_numpy()
+        subjects = scores.groupby(codes, sort=False).agg(Score_Sum='sum', Rows='count', Min='min', Max='max')
+        return {'levels': levels.rename_axis('Grade_Level').reset_index(),
+                'subjects': subjects.rename_axis('Code').reset_index()}
+
+    def trend_points(self, codes):
+        """Per-code ``(grade_int, total)`` points for the GPA Trend chart."""
+        paths = self._pushdown(GRADE_LEVELS)
+        if paths: return self.storage.trend_points(paths, codes)
+        from .viz import trend_points
+        return trend_points(self.get_all_grades_combined(), codes)
+
+    def get_grades(self):
+        """All G9-G12 rows in one frame with a ``Grade_Level`` column."""
+        parts = []
+        self.load_tables(GRADE_LEVELS)
+        for grade in GRADE_LEVELS:
+            df = self.get_data(grade)
             if df is not None and not df.empty:
-                cols = ['Q1_Points', 'Q2_Points', 'Q3_Points', 'Q4_Points']
-                valid_cols = [c for c in cols if c in df.columns]
-                if valid_cols:
-                    temp_df = df.copy()
-                    temp_df['Total_Score'] = temp_df[valid_cols].sum(axis=1)
-                    temp_df['Grade_Level'] = grade
-                    combined_data.append(temp_df[['Code', 'Course', 'Total_Score', 'Grade_Level']])
-        if not combined_data: return pd.DataFrame()
-        return pd.concat(combined_data, ignore_index=True)
-
-    def ask_ai(self, user_query, custom_system_prompt=None):
-        return self.ai_agent.get_response(user_query, custom_system_prompt)
\ No newline at end of file
+                parts.append(df.assign(Grade_Level=grade))
+        if not parts: return pd.DataFrame()
+        return pd.concat(parts, ignore_index=True)
+
+    def gpa_report(self):
+        versions = tuple(self.version(grade) for grade in GRADE_LEVELS)
+        if self._gpa_cache is None or self._gpa_cache[0] != versions:
+            self._gpa_cache = (versions, compute_gpa(self.get_grades()))
+        return self._gpa_cache[1]
+
+    def ai_context(self, max_tokens=None):
+        """Compact digest of all tables for the AI, rebuilt only when a table version changes."""
+        key = (tuple(self.version(t) for t in self.files), max_tokens)
+        if self._context_cache is None or self._context_cache[0] != key:
+            self.load_tables()
+            self._context_cache = (key, build_context(self, max_tokens))
+        return self._context_cache[1]
+
+    def ask_ai(self, user_query, custom_system_prompt=None, context=None):
+        context = self.ai_context() if context is None else context
+        return self.ai_agent.get_response(user_query, custom_system_prompt, context)
+
+    def stream_ai(self, user_query, custom_system_prompt=None, context=None):
+        context = self.ai_context() if context is None else context
+        return self.ai_agent.stream_response(user_query, custom_system_prompt, context)
@@ -0,0 +1,259 @@
+import bisect
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+from .journal import _fsync_dir, _to_builtin
+
+
+def invert(changes):
+    """The changes that take the tables from after ``changes`` back to before them."""
+    undo = []
+    for key, entry in reversed(changes):
+        op = entry['op']
+        if op == 'update':
+            undo.append((key, {**entry, 'value': entry['old'], 'old': entry['value']}))
+        elif op == 'delete':
+            undo.append((key, {'op': 'insert', 'row': entry['row'], 'rows': [entry['old']]}))
+        else:
+            # add / insert: delete the rows again, last one first.
+            undo.extend((key, {'op': 'delete', 'row': entry['row'] + i, 'old': row})
+                        for i, row in reversed(list(enumerate(entry['rows']))))
+    return undo
+
+
+def _short(value, width=24):
+    text = '(empty)' if value is None or value != value else str(value)
+    return text if len(text) <= width else text[:width - 1] + '…'
+
+
+def describe(changes):
+    """One line for the history page: 'Edit G11 row 5 Q1_Points: 80.0 → 95.0', 'Delete 3 row(s) from G9'."""
+    if changes[0][1]['op'] == 'bulk':
+        return 'Bulk change: ' + ', '.join(f"{entry['count']} row(s) in {key}" for key, entry in changes)
+    if len(changes) == 1 and changes[0][1]['op'] == 'update':
+        key, entry = changes[0]
+        return f"Edit {key} row {entry['row'] + 1} {entry['col']}: {_short(entry['old'])} → {_short(entry['value'])}"
+    counts = {}
+    for key, entry in changes:
+        verb = {'add': 'Add', 'insert': 'Add', 'update': 'Edit', 'delete': 'Delete'}[entry['op']]
+        counts[verb, key] = counts.get((verb, key), 0) + len(entry.get('rows', [None]))
+    parts = [f"{verb} {n} {'cell(s) in' if verb == 'Edit' else 'row(s) to' if verb == 'Add' else 'row(s) from'} {key}"
+             for (verb, key), n in counts.items()]
+    return ', '.join(parts[:1] + [p[0].lower() + p[1:] for p in parts[1:]])
+
+
+class History:
+    """Linear undo history of one data directory: ``steps[:position]`` are applied, the rest can be redone.
+
+    Every step is one mutation, or one transaction, stored as the journal entries it made:
+      deltas.jsonl      one line per step, ``[[table, entry], ...]``; update and delete entries
+                        carry the old values and adds the row they started at, so each step
+                        can be applied or inverted (``invert``). A bulk step (``bulk()``, an
+                        import) only holds ``{'op': 'bulk', 'count': rows}`` per table: it sits
+                        between two checkpoints, and undo/redo load the one on the far side.
+      events.jsonl      step / goto / snapshot / drop / checkpoint records, replayed on open
+      checkpoints/<id>/ copies of the tables changed since the previous checkpoint (the first
+                        one holds every table), written every ``checkpoint_every`` steps; the
+                        checkpoint event keeps a digest of each copy, so a table changed outside
+                        the history (``refresh()``) is not overwritten by loading one
+    Named snapshots are positions. A new step after an undo drops the steps that could have
+    been redone, and the snapshots and checkpoints taken after that point. Past ``max_steps``
+    steps, ``trim`` drops the oldest ones and makes a checkpoint the new position 0.
+    """
+
+    def __init__(self, folder, checkpoint_every, max_steps=0):
+        self.folder = Path(folder)
+        self.checkpoint_every = checkpoint_every
+        self.max_steps = max_steps
+        self._events = None
+        self._deltas = None
+        self._finish_trim()
+        self._load()
+
+    def _load(self):
+        self.steps = []        # {'offset', 'label', 'tables', 'at'}
+        self.position = 0
+        self.snapshots = {}    # name -> {'position', 'at'}
+        self.checkpoints = []  # {'position', 'dir', 'tables', 'digests'}, sorted by position
+        for event in self._read(self.folder / 'events.jsonl'):
+            self._replay(event)
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        return  # Torn tail from an interrupted append
+        except FileNotFoundError:
+            return
+
+    def _replay(self, event):
+        op = event['op']
+        if op == 'step':
+            del self.steps[self.position:]
+            self.snapshots = {name: s for name, s in self.snapshots.items() if s['position'] <= self.position}
+            self.checkpoints = [cp for cp in self.checkpoints if cp['position'] <= self.position]
+            self.steps.append({**{k: event[k] for k in ('offset', 'label', 'tables', 'at')}, 'bulk': event.get('bulk', False)})
+            self.position += 1
+        elif op == 'goto':
+            self.position = event['position']
+        elif op == 'snapshot':
+            self.snapshots[event['name']] = {'position': event['position'], 'at': event['at']}
+        elif op == 'drop':
+            self.snapshots.pop(event['name'], None)
+        elif op == 'checkpoint':
+            checkpoint = {**{k: event[k] for k in ('position', 'dir', 'tables')}, 'digests': event.get('digests', {})}
+            bisect.insort(self.checkpoints, checkpoint, key=lambda cp: cp['position'])
+
+    def _log(self, event):
+        if self._events is None:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            self._events = open(self.folder / 'events.jsonl', 'a', encoding='utf-8')
+        self._events.write(json.dumps(event) + '\n')
+        self._events.flush()
+        os.fsync(self._events.fileno())
+        self._replay(event)
+
+    def close(self):
+        for fh in (self._events, self._deltas):
+            if fh is not None: fh.close()
+        self._events = self._deltas = None
+
+    def record(self, changes):
+        """Append a step made at the current position, dropping whatever could have been redone."""
+        if self._deltas is None:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            self._deltas = open(self.folder / 'deltas.jsonl', 'ab')
+        offset = self._deltas.tell()
+        self._deltas.write(json.dumps(changes, default=_to_builtin).encode('utf-8') + b'\n')
+        self._deltas.flush()
+        os.fsync(self._deltas.fileno())
+        dropped = [cp for cp in self.checkpoints if cp['position'] > self.position]
+        self._log({'op': 'step', 'offset': offset, 'label': describe(changes), 'tables': sorted({key for key, _ in changes}),
+                   'at': time.time(), 'bulk': changes[0][1]['op'] == 'bulk'})
+        for cp in dropped:
+            shutil.rmtree(self.folder / cp['dir'], ignore_errors=True)
+
+    def changes(self, index):
+        """``[(table, entry), ...]`` of ``steps[index]``."""
+        with open(self.folder / 'deltas.jsonl', 'rb') as f:
+            f.seek(self.steps[index]['offset'])
+            return [tuple(change) for change in json.loads(f.readline())]
+
+    def goto(self, position):
+        self._log({'op': 'goto', 'position': position})
+
+    def snapshot(self, name):
+        self._log({'op': 'snapshot', 'name': name, 'position': self.position, 'at': time.time()})
+
+    def drop(self, name):
+        if name not in self.snapshots: raise KeyError(name)
+        self._log({'op': 'drop', 'name': name})
+
+    def tables_between(self, a, b):
+        """Tables touched by the steps between positions ``a`` and ``b`` (either order)."""
+        lo, hi = sorted((a, b))
+        return set().union(*(step['tables'] for step in self.steps[lo:hi]))
+
+    def _last_checkpoint(self, position):
+        # Checkpoints after ``position`` belong to steps that can still be redone, not to its past.
+        return next((cp for cp in reversed(self.checkpoints) if cp['position'] <= position), None)
+
+    def checkpoint_at(self, position):
+        last = self._last_checkpoint(position)
+        return last if last is not None and last['position'] == position else None
+
+    def checkpoint_due(self):
+        last = self._last_checkpoint(self.position)
+        return self.position - (last['position'] if last else 0) >= self.checkpoint_every
+
+    def new_checkpoint(self, tables):
+        """``(folder, tables to write)`` for a checkpoint at the current position: all of ``tables``
+        for the first one, later only those changed since the previous checkpoint."""
+        last = self._last_checkpoint(self.position)
+        if last is not None:
+            tables = [t for t in tables if t in self.tables_between(last['position'], self.position)]
+        name = f"checkpoints/{self.position:06d}-{os.urandom(3).hex()}"
+        (self.folder / name).mkdir(parents=True)
+        return name, tables
+
+    def add_checkpoint(self, name, tables, digests):
+        self._log({'op': 'checkpoint', 'position': self.position, 'dir': name, 'tables': sorted(tables), 'digests': digests})
+
+    def digest(self, position, table):
+        """Content digest of ``table`` at ``position``, from the last checkpoint that wrote it;
+        None when a step has changed the table since."""
+        for cp in reversed(self.checkpoints):
+            if cp['position'] <= position and table in cp['tables']:
+                if table in self.tables_between(cp['position'], position): return None
+                return cp['digests'].get(table)
+        return None
+
+    def trim_point(self):
+        """The checkpoint to make the new start of the history once it holds more than ``max_steps``
+        steps, or None. Only a checkpoint at or before the current position can be cut at."""
+        if not self.max_steps: return None
+        limit = min(self.position, len(self.steps) - self.max_steps)
+        return next((cp for cp in reversed(self.checkpoints) if 0 < cp['position'] <= limit), None)
+
+    def trim(self, checkpoint):
+        """Forget everything before ``checkpoint`` and number positions from it. The caller has
+        already copied every table into its folder, as of its position.
+
+        The new events.jsonl and deltas.jsonl are written next to the old ones; replacing
+        events.jsonl is the commit point, and ``_finish_trim`` completes or discards a trim
+        that was interrupted around it."""
+        cut = checkpoint['position']
+        tables = sorted({t for cp in self.checkpoints if cp['position'] <= cut for t in cp['tables']})
+        digests = {t: next(cp['digests'].get(t) for cp in reversed(self.checkpoints)
+                           if cp['position'] <= cut and t in cp['tables']) for t in tables}
+        events = [{'op': 'checkpoint', 'position': 0, 'dir': checkpoint['dir'], 'tables': tables, 'digests': digests}]
+        lines, offset = [], 0
+        with open(self.folder / 'deltas.jsonl', 'rb') as f:
+            for step in self.steps[cut:]:
+                f.seek(step['offset'])
+                lines.append(f.readline())
+                events.append({'op': 'step', **step, 'offset': offset})
+                offset += len(lines[-1])
+        events += [{'op': 'checkpoint', **cp, 'position': cp['position'] - cut}
+                   for cp in self.checkpoints if cp['position'] > cut]
+        events += [{'op': 'snapshot', 'name': name, 'position': snap['position'] - cut, 'at': snap['at']}
+                   for name, snap in self.snapshots.items() if snap['position'] >= cut]
+        events.append({'op': 'goto', 'position': self.position - cut})
+        for name, content in (('events.new', b''.join(json.dumps(e).encode('utf-8') + b'\n' for e in events)),
+                              ('deltas.new', b''.join(lines))):
+            with open(self.folder / name, 'wb') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+        dropped = [cp['dir'] for cp in self.checkpoints if cp['position'] < cut]
+        self.close()
+        os.replace(self.folder / 'events.new', self.folder / 'events.jsonl')
+        _fsync_dir(self.folder)
+        self._finish_trim()
+        for name in dropped:
+            shutil.rmtree(self.folder / name, ignore_errors=True)
+        self._load()
+
+    def _finish_trim(self):
+        # events.new is written first and renamed last: while it exists the trim never happened.
+        if (self.folder / 'events.new').exists():
+            (self.folder / 'events.new').unlink()
+            (self.folder / 'deltas.new').unlink(missing_ok=True)
+        elif (self.folder / 'deltas.new').exists():
+            os.replace(self.folder / 'deltas.new', self.folder / 'deltas.jsonl')  # events.jsonl already points into it
+            _fsync_dir(self.folder)
+
+    def nearest_checkpoint(self, position):
+        return min(self.checkpoints, key=lambda cp: abs(cp['position'] - position), default=None)
+
+    def checkpoint_folder(self, checkpoint, table):
+        """Folder holding ``table`` as of ``checkpoint``: the latest checkpoint up to it that wrote the table."""
+        return next(self.folder / cp['dir'] for cp in reversed(self.checkpoints)
+                    if cp['position'] <= checkpoint['position'] and table in cp['tables'])
@@ -0,0 +1,74 @@
+import math
+
+INDEXED_COLS = ['Code', 'Course', 'Sem', 'Level']
+
+
+def index_key(value):
+    """Normalize a cell value so 101, 101.0 and '101' hit the same bucket and NaN maps to None."""
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if value.is_integer():
+            return str(int(value))
+    return str(value).strip()
+
+
+class TableIndex:
+    """Hash indexes (value -> set of row positions) over the ``INDEXED_COLS`` of one table.
+
+    Adds and edits are applied incrementally. A delete shifts every later position, so it
+    only marks the index stale and the next lookup rebuilds it, after the pending deletes
+    have been compacted out of the table anyway.
+    """
+
+    def __init__(self, columns=INDEXED_COLS):
+        self.columns = list(columns)
+        self._maps = None
+
+    @property
+    def stale(self):
+        return self._maps is None
+
+    def invalidate(self):
+        self._maps = None
+
+    def build(self, df):
+        # Published only when complete: concurrent readers (the API server) may find it stale at once.
+        maps = {}
+        for col in self.columns:
+            buckets = {}
+            if col in df.columns:
+                for value, positions in df.groupby(col, dropna=False, sort=False).indices.items():
+                    buckets.setdefault(index_key(value), set()).update(positions.tolist())
+            maps[col] = buckets
+        self._maps = maps
+
+    def add(self, start, rows):
+        if self._maps is None:
+            return
+        for offset, row in enumerate(rows):
+            for col, buckets in self._maps.items():
+                buckets.setdefault(index_key(row.get(col)), set()).add(start + offset)
+
+    def update(self, row_idx, col, old, new):
+        if self._maps is None or col not in self._maps:
+            return
+        buckets = self._maps[col]
+        old_key = index_key(old)
+        bucket = buckets.get(old_key)
+        if bucket is not None:
+            bucket.discard(row_idx)
+            if not bucket:
+                del buckets[old_key]
+        buckets.setdefault(index_key(new), set()).add(row_idx)
+
+    def lookup(self, col, values):
+        buckets = self._maps[col]
+        if isinstance(values, (list, tuple, set, frozenset)):
+            hits = set()
+            for value in values:
+                hits |= buckets.get(index_key(value), set())
+            return hits
+        return buckets.get(index_key(values), set())
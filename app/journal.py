@@ -0,0 +1,129 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def _to_builtin(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is pd.NA:
+        return None
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _fsync_dir(path):
+    # Makes a rename or unlink in ``path`` durable (no-op where directories cannot be opened).
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class TableJournal:
+    """Append-only log of the mutations applied to one table since it was last compacted.
+
+    Compaction protocol (crash-safe at every step):
+      1. ``rotate``: create ``<base>.tmp`` as a marker, move the live journal to ``<base>.journal.old``.
+      2. ``commit``: write and fsync the snapshot into ``<base>.tmp``, atomically replace the base
+         file and fsync the directory.
+      3. Drop ``<base>.journal.old``.
+    On startup ``recover`` uses the marker to tell whether the old journal is already in the base file.
+    """
+
+    durable = False
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self.path = base_path.with_name(base_path.name + '.journal')
+        self.rotated_path = base_path.with_name(base_path.name + '.journal.old')
+        self.tmp_path = base_path.with_name(base_path.name + '.tmp')
+        self.entries = 0
+        self._fh = None
+
+    def __len__(self):
+        return self.entries
+
+    def pending(self):
+        return self.path.exists() or self.rotated_path.exists()
+
+    def append(self, entry, count=1):
+        # ``count`` is how many mutations the record carries (a transaction's batch is one line).
+        if self._fh is None:
+            self._fh = open(self.path, 'a', encoding='utf-8')
+        self._fh.write(json.dumps(entry, default=_to_builtin) + '\n')
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self.entries += count
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    @staticmethod
+    def _read(path):
+        entries = []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break  # Torn tail from an interrupted append
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def recover(self):
+        entries = self._read(self.path)
+        if self.rotated_path.exists():
+            if self.tmp_path.exists():
+                # Compaction died before the base file was replaced: the old journal still counts.
+                entries = self._read(self.rotated_path) + entries
+                self._rewrite(entries)
+            self.rotated_path.unlink()
+        self.tmp_path.unlink(missing_ok=True)
+        self.entries = sum(len(e['entries']) if e.get('op') == 'batch' else 1 for e in entries)
+        return entries
+
+    def _rewrite(self, entries):
+        self.close()
+        staging = self.path.with_name(self.path.name + '.new')
+        with open(staging, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, default=_to_builtin) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(staging, self.path)
+
+    def rotate(self):
+        self.close()
+        self.tmp_path.touch()
+        if self.rotated_path.exists():
+            # A previous compaction failed before commit; keep its entries in front of ours.
+            pending = self._read(self.rotated_path) + self._read(self.path)
+            self._rewrite(pending)
+        if self.path.exists():
+            os.replace(self.path, self.rotated_path)
+        self.entries = 0
+
+    def discard(self):
+        """Drop every entry not yet in the base file."""
+        self.close()
+        for path in (self.path, self.rotated_path, self.tmp_path):
+            path.unlink(missing_ok=True)
+        self.entries = 0
+
+    def commit(self, write_base):
+        # ``write_base`` fsyncs the new file; the rename is made durable before the old journal,
+        # which is all that still holds its entries, goes away.
+        write_base(self.tmp_path)
+        os.replace(self.tmp_path, self.base_path)
+        _fsync_dir(self.base_path.parent)
+        self.rotated_path.unlink(missing_ok=True)
@@ -0,0 +1,99 @@
+import functools
+import json
+import time
+from collections import defaultdict
+
+# Flipped on by `python main.py --profile`. While off, a timed call costs one flag check.
+ENABLED = False
+
+_timings = defaultdict(list)
+_counters = defaultdict(int)
+
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = on
+
+
+def reset():
+    _timings.clear()
+    _counters.clear()
+
+
+def count(name, n=1):
+    if ENABLED:
+        _counters[name] += n
+
+
+def timed(name):
+    """Decorator recording the wall time of every call under ``name`` while profiling is on."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _timings[name].append(time.perf_counter() - start)
+        return inner
+    return wrap
+
+
+class timer:
+    """``with profiling.timer('name'):`` for timing a block instead of a whole function."""
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if ENABLED:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            _timings[self.name].append(time.perf_counter() - self.start)
+        return False
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+def summary():
+    """Per-operation ``count/total_ms/p50_ms/p95_ms/max_ms`` plus the raw counters."""
+    operations = {}
+    for name, samples in sorted(_timings.items()):
+        ordered = sorted(samples)
+        operations[name] = {
+            'count': len(ordered),
+            'total_ms': round(sum(ordered) * 1000, 3),
+            'p50_ms': round(_percentile(ordered, 0.50) * 1000, 3),
+            'p95_ms': round(_percentile(ordered, 0.95) * 1000, 3),
+            'max_ms': round(ordered[-1] * 1000, 3),
+        }
+    return {'operations': operations, 'counters': dict(sorted(_counters.items()))}
+
+
+def report():
+    from tabulate import tabulate
+
+    data = summary()
+    if not data['operations'] and not data['counters']:
+        return "⏱️  Profile: nothing recorded."
+    lines = ["\n⏱️  --- Profile ---"]
+    if data['operations']:
+        rows = [[name] + list(stats.values()) for name, stats in data['operations'].items()]
+        lines.append(tabulate(rows, headers=['operation', 'count', 'total ms', 'p50 ms', 'p95 ms', 'max ms'],
+                              tablefmt='rounded_outline', floatfmt='.3f'))
+    if data['counters']:
+        lines.append(tabulate(list(data['counters'].items()), headers=['counter', 'value'], tablefmt='rounded_outline'))
+    return "\n".join(lines)
+
+
+def dump(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary(), f, indent=2)
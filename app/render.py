@@ -0,0 +1,124 @@
+import glob
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from . import config
+from .views import GRADE_LEVELS
+
+CHARTS = {
+    'breakdown': 'draw_subject_breakdown',
+    'trend': 'draw_gpa_trend',
+    'radar': 'draw_radar_distribution',
+    'gpa': 'draw_gpa_by_year',
+}
+FORMATS = ('png', 'svg')
+# Bump when the chart styling in viz.py changes so cached files are re-rendered.
+RENDER_VERSION = 1
+
+ChartJob = namedtuple('ChartJob', ['kind', 'data', 'args', 'name'])
+
+
+def use_headless_backend():
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+def chart_digest(job, fmt):
+    h = hashlib.sha256()
+    h.update(json.dumps([RENDER_VERSION, job.kind, fmt, list(job.args)], default=str).encode('utf-8'))
+    data = job.data
+    layout = [list(map(str, data.columns)), list(map(str, data.dtypes)), list(map(str, data.index.names))]
+    h.update(json.dumps(layout).encode('utf-8'))
+    if len(data):
+        h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _render_one(job, path, fmt):
+    use_headless_backend()
+    import matplotlib.pyplot as plt
+    from . import viz
+
+    fig = getattr(viz, CHARTS[job.kind])(job.data, *job.args)
+    if fig is None:
+        return None
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        fig.savefig(tmp_path, format=fmt, facecolor=fig.get_facecolor())
+    finally:
+        plt.close(fig)
+    os.replace(tmp_path, path)
+    return path
+
+
+def render_charts(jobs, out_dir=None, fmt='png', workers=None):
+    """Render ``jobs`` to ``out_dir`` without a display, skipping charts already on disk.
+
+    Files are named ``<name>-<digest>.<fmt>`` where the digest covers the chart kind, its
+    arguments and the input data, so an existing file is a valid cache hit. Misses are
+    drawn in parallel worker processes, and the files left by earlier versions of the same
+    chart are deleted, so ``out_dir`` keeps one file per chart and format. Returns one ``(name, path, status)`` per job with
+    status 'cached', 'rendered' or 'empty' (nothing to plot).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Choose from: {', '.join(FORMATS)}")
+    out_dir = Path(out_dir or config.RENDER_DIR)
+
+    results, pending = [], []
+    for job in jobs:
+        path = out_dir / f"{job.name}-{chart_digest(job, fmt)[:16]}.{fmt}"
+        if path.exists():
+            results.append((job.name, path, 'cached'))
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        results.append(None)
+        pending.append((len(results) - 1, job, path))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pending) <= 1:
+        rendered = [_render_one(job, path, fmt) for _, job, path in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=use_headless_backend) as pool:
+            rendered = list(pool.map(_render_one, [j for _, j, _ in pending], [p for _, _, p in pending],
+                                     [fmt] * len(pending)))
+
+    for (slot, job, path), done in zip(pending, rendered):
+        results[slot] = (job.name, path, 'rendered' if done is not None else 'empty')
+        _remove_stale(path, job.name, fmt)
+    return results
+
+
+def _remove_stale(path, name, fmt):
+    name = Path(name).name  # Names may carry a per-student folder prefix
+    stale = re.compile(rf"{re.escape(name)}-[0-9a-f]{{16}}\.{fmt}")
+    for old in path.parent.glob(f"{glob.escape(name)}-*.{fmt}"):
+        if old != path and stale.fullmatch(old.name):
+            old.unlink(missing_ok=True)
+
+
+def jobs_for(system, charts=None, grades=None, subjects=None, prefix=''):
+    """Build the chart jobs for one GradeSystem (one student)."""
+    charts = charts or list(CHARTS)
+    grades = grades or GRADE_LEVELS
+    jobs = []
+    for grade in grades:
+        df = system.get_data(grade)
+        if df is None:
+            continue
+        if 'breakdown' in charts:
+            jobs.append(ChartJob('breakdown', df, (grade,), f"{prefix}{grade}-breakdown"))
+        if 'radar' in charts:
+            jobs.append(ChartJob('radar', df, (grade,), f"{prefix}{grade}-radar"))
+    if 'trend' in charts:
+        combined = system.get_all_grades_combined()
+        codes = subjects or (sorted(combined['Code'].dropna().astype(str).unique()) if not combined.empty else [])
+        jobs.append(ChartJob('trend', combined, (list(codes),), f"{prefix}trend"))
+    if 'gpa' in charts:
+        jobs.append(ChartJob('gpa', system.gpa_report()['years'], (), f"{prefix}gpa"))
+    return jobs
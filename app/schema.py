@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from . import config
+from .index import index_key
+
+
+def dtypes(col_type):
+    return dict(config.COLUMNS.get(col_type, {}))
+
+
+def read_dtypes(col_type):
+    """Dtypes to parse a stored table with, so the reader skips type inference. Free text is read
+    as pandas' default ``str``, the same as an untyped read gives."""
+    return {col: 'str' if dtype == 'string' else dtype for col, dtype in dtypes(col_type).items()}
+
+
+def empty_frame(col_type):
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in dtypes(col_type).items()})
+
+
+def _is_category(dtype):
+    return isinstance(dtype, pd.CategoricalDtype) or dtype == 'category'
+
+
+def _as_text(series):
+    # A text column read back as numbers (e.g. Code 101) keeps its written form: '101', not 101.0.
+    if series.dtype.kind in 'biuf':
+        return series.map(index_key, na_action='ignore').astype(object)
+    return series.astype(object).where(series.notna(), None)
+
+
+def _object_categories(series):
+    # pandas may infer 'str' categories; keep them object so categoricals always union cleanly.
+    categories = series.cat.categories
+    if categories.dtype == object:
+        return series
+    return series.cat.set_categories(categories.astype(object))
+
+
+def _cast(series, dtype):
+    if _is_category(dtype):
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            series = _as_text(series).astype('category')
+        return _object_categories(series)
+    if dtype == 'string':
+        return series if series.dtype == dtype else _as_text(series).astype(dtype)
+    if series.dtype == dtype:
+        return series
+    return pd.to_numeric(series, errors='coerce').astype(dtype)
+
+
+def apply(df, col_type):
+    """Cast the schema columns of ``df`` to their ``config.COLUMNS`` dtypes; other columns are left alone."""
+    schema = dtypes(col_type)
+    if not schema:
+        return df
+    casts = {col: _cast(df[col], dtype) for col, dtype in schema.items() if col in df.columns}
+    changed = {col: s for col, s in casts.items() if s is not df[col]}
+    if not changed:
+        return df
+    out = df.copy(deep=False)
+    for col, series in changed.items():
+        out[col] = series
+    return out
+
+
+def concat(df, pending):
+    """Append ``pending`` to ``df`` without losing dtypes.
+
+    ``pd.concat`` turns categoricals with different categories into object columns, so
+    categorical columns are merged with ``union_categoricals`` instead.
+    """
+    if df.empty:
+        return pending.reset_index(drop=True)
+    merged = {}
+    for col in dict.fromkeys(list(df.columns) + list(pending.columns)):
+        if col not in pending.columns:
+            merged[col] = pd.concat([df[col], pd.Series(np.nan, index=pending.index, dtype=df[col].dtype)], ignore_index=True)
+        elif col not in df.columns:
+            filler = pd.Series(np.nan, index=df.index, dtype=pending[col].dtype)
+            merged[col] = pd.concat([filler, pending[col]], ignore_index=True)
+        elif isinstance(df[col].dtype, pd.CategoricalDtype) and isinstance(pending[col].dtype, pd.CategoricalDtype):
+            parts = [_object_categories(df[col]), _object_categories(pending[col])]
+            merged[col] = pd.Series(union_categoricals(parts, ignore_order=True), name=col)
+        else:
+            merged[col] = pd.concat([df[col], pending[col]], ignore_index=True)
+    return pd.DataFrame(merged)
+
+
+def set_cell(df, row_idx, col_name, value):
+    """``df.iat[row, col] = value`` that first registers new categories on categorical columns."""
+    pos = df.columns.get_loc(col_name)
+    try:
+        df.iat[row_idx, pos] = value
+    except TypeError:
+        # Raised by Categorical for a value outside its categories; anything else is a real error.
+        column = df[col_name]
+        if not isinstance(column.dtype, pd.CategoricalDtype) or value in column.cat.categories:
+            raise
+        df[col_name] = column.cat.add_categories([value])
+        df.iat[row_idx, pos] = value
+
+
+def same_value(a, b):
+    """Cell equality across storage round trips: NaN/None/NA match, 92.1 matches float32(92.1), 101 matches '101'."""
+    if pd.isna(a) or pd.isna(b):
+        return bool(pd.isna(a) and pd.isna(b))
+    if isinstance(a, (int, float, np.number)) and isinstance(b, (int, float, np.number)):
+        return a == b or np.float32(a) == np.float32(b)
+    return index_key(a) == index_key(b)
+
+
+def memory_mib(df):
+    return df.memory_usage(deep=True).sum() / 2**20
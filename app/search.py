@@ -0,0 +1,113 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from .index import index_key
+
+
+def grams(text, n=3):
+    """Character ``n``-grams of each word of ``text``, lowercased, each word padded with one space
+    on both sides so that word starts and ends count: 'Calc' -> {' ca', 'cal', 'alc', 'lc '}."""
+    out = set()
+    for word in str(text).casefold().split():
+        padded = f" {word} "
+        out.update(padded[i:i + n] for i in range(max(len(padded) - n + 1, 1)))
+    return out
+
+
+class SearchIndex:
+    """Inverted index from character n-grams to the distinct values of ``columns`` in one table.
+
+    Each value keeps a count of the rows holding it, so adds, edits and deletes adjust the
+    index in place: a value enters the gram lists with its first row and leaves them with its
+    last. Course names and codes repeat a lot, so the index stays small however many rows
+    there are; ``row_scores`` maps the matched values back to rows in one vectorized pass.
+    """
+
+    def __init__(self, columns, n=3):
+        self.columns = list(columns)
+        self.n = n
+        self._terms = None  # (col, value) -> [rows holding it, number of grams]
+        self._grams = {}    # gram -> {(col, value), ...}
+
+    @property
+    def stale(self):
+        return self._terms is None
+
+    def build(self, df):
+        # Published only when complete, like TableIndex.build.
+        terms, gram_map = {}, {}
+        for col in self.columns:
+            if col not in df.columns: continue
+            for value, count in df[col].value_counts(sort=False).items():
+                if count: self._count(terms, gram_map, col, value, int(count))
+        self._terms, self._grams = terms, gram_map
+
+    def _count(self, terms, gram_map, col, value, delta):
+        value = index_key(value)
+        if not value: return
+        term = (col, value)
+        entry = terms.get(term)
+        if entry is None:
+            if delta <= 0: return
+            value_grams = grams(value, self.n)
+            entry = terms[term] = [0, len(value_grams)]
+            for gram in value_grams:
+                gram_map.setdefault(gram, set()).add(term)
+        entry[0] += delta
+        if entry[0] <= 0:
+            del terms[term]
+            for gram in grams(value, self.n):
+                postings = gram_map.get(gram)
+                if postings is None: continue
+                postings.discard(term)
+                if not postings: del gram_map[gram]
+
+    def add(self, rows):
+        if self._terms is None: return
+        for row in rows:
+            for col in self.columns:
+                self._count(self._terms, self._grams, col, row.get(col), 1)
+
+    def update(self, col, old, new):
+        if self._terms is None or col not in self.columns: return
+        self._count(self._terms, self._grams, col, old, -1)
+        self._count(self._terms, self._grams, col, new, 1)
+
+    def remove(self, row):
+        if self._terms is None: return
+        for col in self.columns:
+            self._count(self._terms, self._grams, col, row.get(col), -1)
+
+    def match(self, text, min_score=0.0):
+        """``{(col, value): score}`` for indexed values sharing grams with ``text``.
+
+        The score averages how much of the query the value covers with the Dice coefficient of
+        the two gram sets: 1.0 for an exact match, high for a typo or a word of a longer name.
+        """
+        query = grams(text, self.n)
+        if not query or self._terms is None: return {}
+        shared = Counter()
+        for gram in query:
+            shared.update(self._grams.get(gram, ()))
+        scores = {}
+        for term, hits in shared.items():
+            score = (hits / len(query) + 2 * hits / (len(query) + self._terms[term][1])) / 2
+            if score >= min_score: scores[term] = score
+        return scores
+
+    def row_scores(self, df, scores):
+        """Best score of each row of ``df`` over the matched values in ``scores`` (0 for no match)."""
+        best = np.zeros(len(df))
+        for col in self.columns:
+            wanted = {value: score for (c, value), score in scores.items() if c == col}
+            if not wanted or col not in df.columns: continue
+            series = df[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+            else:
+                codes, uniques = pd.factorize(series)
+            # One lookup per distinct value; missing cells (code -1) take the trailing 0.
+            per_value = np.array([wanted.get(index_key(v), 0.0) for v in uniques] + [0.0])
+            np.maximum(best, per_value[codes], out=best)
+        return best
@@ -0,0 +1,455 @@
+"""Local HTTP/JSON API over one GradeSystem (``python main.py serve``).
+
+Routes (row numbers are 0-based positions, as in ``GradeSystem``)::
+
+    GET    /tables                        row count per table
+    GET    /tables/<table>/rows           ?offset=&limit=, or column filters: ?Code=MA101&Sem=S1
+    POST   /tables/<table>/rows           {"rows": [{...}, ...]}
+    PATCH  /tables/<table>/rows/<row>     {"col": "Q1_Points", "value": 95}
+    DELETE /tables/<table>/rows/<row>
+    GET    /grades                        combined G9-G12 Code/Course/Total_Score/Grade_Level, paged
+    GET    /grades/summary                totals per year and per course code
+    GET    /gpa                           GPA per year and cumulative
+    GET    /search                        ?q=calclus, optional &tables=G9,G10&limit=20: fuzzy search, best first
+    GET    /charts/<kind>                 ?grade=G9 (breakdown, radar), ?codes=A,B (trend), ?format=svg
+    GET    /stats                         write batching counters
+    POST   /save | /refresh               save_all() / refresh()
+
+Reads share a reader-writer lock; every mutation is queued to one writer thread that
+applies whatever has queued up in a single transaction under the write lock, so a burst
+of concurrent writes costs one journal fsync per table.
+"""
+import json
+import queue
+import re
+import socket
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+from . import batch, config, profiling, render
+from .views import GRADE_LEVELS
+
+
+class APIError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class RWLock:
+    """Any number of readers or one writer. A waiting writer holds back new readers, so a
+    steady stream of reads cannot starve writes. Not reentrant."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writing or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class WriteBatcher:
+    """Single writer thread. Each round takes every queued mutation (up to ``max_ops``) and
+    applies them in one ``transaction()``: one journal record and fsync per changed table."""
+
+    def __init__(self, system, lock, max_ops):
+        self.system = system
+        self.lock = lock
+        self.max_ops = max_ops
+        self.batches = 0
+        self.writes = 0
+        self._closed = False
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='sams-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn):
+        """Run ``fn(system)`` in the next batch and return its result once that batch is committed."""
+        if self._closed:
+            raise APIError(503, "The server is shutting down")
+        done = Future()
+        self._queue.put((fn, done))
+        return done.result()
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        # Anything that slipped in behind the sentinel is refused rather than left waiting.
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                item[1].set_exception(APIError(503, "The server is shutting down"))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            ops = [item]
+            while len(ops) < self.max_ops:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._commit(ops)
+                    return
+                ops.append(item)
+            self._commit(ops)
+
+    @profiling.timed('server.write_batch')
+    def _commit(self, ops):
+        results = []
+        try:
+            with self.lock.write(), self.system.transaction():
+                for fn, _ in ops:
+                    try:
+                        results.append((True, fn(self.system)))
+                    except (ValueError, KeyError, TypeError) as e:
+                        results.append((False, e))  # A bad request fails alone; the rest still commit
+        except Exception as e:
+            for _, done in ops:
+                done.set_exception(e)
+            return
+        self.batches += 1
+        self.writes += len(ops)
+        for (_, done), (ok, value) in zip(ops, results):
+            if ok:
+                done.set_result(value)
+            else:
+                done.set_exception(value)
+
+
+def _records(df, offset=None):
+    """Rows as JSON-ready dicts (NaN -> null), tagged with their row number ``_row`` when ``offset`` is given."""
+    # float32 goes out by its shortest repr (92.1, not 92.09999847).
+    narrow = {col: pd.to_numeric(df[col].astype(str)) for col in df.columns if df[col].dtype == 'float32'}
+    rows = json.loads(df.assign(**narrow).to_json(orient='records', force_ascii=False, double_precision=15))
+    if offset is not None:
+        for i, row in enumerate(rows, offset):
+            row['_row'] = i
+    return rows
+
+
+def _number(value):
+    return None if pd.isna(value) else float(value)
+
+
+class API:
+    def __init__(self, system, max_ops=None):
+        self.system = system
+        self.lock = RWLock()
+        self.writer = WriteBatcher(system, self.lock, max_ops or config.SERVER['batch_max_ops'])
+        self._chart_lock = threading.Lock()  # pyplot keeps global state
+
+    def close(self):
+        self.writer.close()
+        with self.lock.write():
+            return self.system.save_all()
+
+    def _table(self, table):
+        if table not in self.system.files:
+            raise APIError(404, f"Unknown table '{table}'. Choose from: {', '.join(self.system.files)}")
+        return table
+
+    @staticmethod
+    def _window(query, total):
+        try:
+            offset = int(query.get('offset', 0))
+            limit = min(int(query.get('limit', config.PAGE_SIZE)), config.SERVER['max_rows'])
+        except ValueError:
+            raise APIError(400, "offset and limit must be integers") from None
+        if offset < 0 or limit < 0:
+            raise APIError(400, "offset and limit must not be negative")
+        return offset, min(offset + limit, total)
+
+    def tables(self, query):
+        with self.lock.read():
+            return {table: self.system.row_count(table) for table in self.system.files}
+
+    def rows(self, query, table):
+        table = self._table(table)
+        criteria = {k: v for k, v in query.items() if k not in ('offset', 'limit')}
+        with self.lock.read():
+            df = self.system.get_data(table)
+            unknown = [c for c in criteria if c not in df.columns]
+            if unknown:
+                raise APIError(400, f"Unknown column(s) {unknown} in '{table}'")
+            if criteria:
+                # Comma-separated values match any of them; numeric columns compare as numbers.
+                try:
+                    criteria = {c: [batch.cell_value(c, v) for v in values.split(',')] for c, values in criteria.items()}
+                except ValueError as e:
+                    raise APIError(400, str(e)) from None
+                hits = [row for _, row in self.system.find_by([table], **criteria)]
+                start, end = self._window(query, len(hits))
+                page = hits[start:end]
+                rows = _records(df.iloc[page], 0)
+                for row, pos in zip(rows, page):
+                    row['_row'] = pos
+                return {'table': table, 'total': len(hits), 'offset': start, 'rows': rows}
+            start, end = self._window(query, len(df))
+            return {'table': table, 'total': len(df), 'offset': start, 'rows': _records(df.iloc[start:end], start)}
+
+    def grades(self, query):
+        with self.lock.read():
+            combined = self.system.get_all_grades_combined()
+            start, end = self._window(query, len(combined))
+            return {'total': len(combined), 'offset': start, 'rows': _records(combined.iloc[start:end], start)}
+
+    def summary(self, query):
+        with self.lock.read():
+            summary = self.system.grade_summary()
+        return {name: _records(frame) for name, frame in summary.items()}
+
+    def gpa(self, query):
+        with self.lock.read():
+            report = self.system.gpa_report()
+        return {'years': _records(report['years'].reset_index()),
+                'cumulative': {k: _number(v) for k, v in report['cumulative'].items()}}
+
+    def search(self, query):
+        text = query.get('q', '').strip()
+        if not text:
+            raise APIError(400, "Expected ?q=<text>")
+        tables = [self._table(t) for t in query['tables'].split(',')] if query.get('tables') else None
+        try:
+            limit = min(int(query.get('limit', config.SEARCH['limit'])), config.SERVER['max_rows'])
+        except ValueError:
+            raise APIError(400, "limit must be an integer") from None
+        with self.lock.read():
+            hits = self.system.search(text, tables, limit)
+            results = []
+            for table, row in hits:
+                record, = _records(self.system.get_data(table).iloc[[row]], row)
+                results.append({'table': table, **record})
+        return {'query': text, 'hits': results}
+
+    def chart(self, query, kind):
+        if kind not in render.CHARTS:
+            raise APIError(404, f"Unknown chart '{kind}'. Choose from: {', '.join(render.CHARTS)}")
+        fmt = query.get('format', 'png')
+        if fmt not in render.FORMATS:
+            raise APIError(400, f"Unsupported format '{fmt}'. Choose from: {', '.join(render.FORMATS)}")
+        grade = query.get('grade')
+        if kind in ('breakdown', 'radar') and grade not in GRADE_LEVELS:
+            raise APIError(400, f"The {kind} chart needs ?grade= one of {', '.join(GRADE_LEVELS)}")
+        codes = query['codes'].split(',') if query.get('codes') else None
+        # Held while drawing: the frames handed to viz are the live tables, which writers edit in place.
+        with self.lock.read(), self._chart_lock:
+            jobs = render.jobs_for(self.system, [kind], [grade] if grade else None, codes)
+            (_, path, status), = render.render_charts(jobs, config.RENDER_DIR / 'server', fmt, workers=1)
+            # Read before releasing: the next render of this chart deletes this version's file.
+            image = path.read_bytes() if status != 'empty' else None
+        if image is None:
+            raise APIError(404, "Nothing to plot")
+        return image, 'image/svg+xml' if fmt == 'svg' else 'image/png'
+
+    def stats(self, query):
+        return {'batches': self.writer.batches, 'writes': self.writer.writes}
+
+    def add_rows(self, query, body, table):
+        table = self._table(table)
+        rows = body.get('rows') if isinstance(body, dict) else None
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise APIError(400, 'Expected {"rows": [{...}, ...]}')
+        report = batch.BatchReport()
+        try:
+            valid = batch.validate_chunk(pd.DataFrame(rows), batch.table_columns(table), 1, report) if rows else []
+        except ValueError as e:
+            raise APIError(400, str(e)) from None
+        if report.rejected:
+            raise APIError(400, report.summary())
+        return {'added': self.writer.submit(lambda system: system.add_rows(table, valid))}
+
+    def update_cell(self, query, body, table, row):
+        table, row = self._table(table), int(row)
+        if not isinstance(body, dict) or 'col' not in body:
+            raise APIError(400, 'Expected {"col": ..., "value": ...}')
+        col = body['col']
+        try:
+            value = batch.cell_value(col, body.get('value'))
+        except ValueError as e:
+            raise APIError(400, str(e)) from None
+        if not self.writer.submit(lambda system: system.update_cell(table, row, col, value)):
+            raise APIError(404, f"No row {row} or column '{col}' in '{table}'")
+        return {'updated': 1}
+
+    def delete_row(self, query, body, table, row):
+        table, row = self._table(table), int(row)
+        if not self.writer.submit(lambda system: system.delete_row(table, row)):
+            raise APIError(404, f"No row {row} in '{table}'")
+        return {'deleted': 1}
+
+    def save(self, query, body):
+        with self.lock.write():
+            ok, message = self.system.save_all()
+        return {'ok': ok, 'message': message}
+
+    def refresh(self, query, body):
+        with self.lock.write():
+            reloaded, conflicts = self.system.refresh()
+        return {'reloaded': reloaded, 'conflicts': conflicts}
+
+
+ROUTES = [(method, re.compile(pattern + r'/?$'), name) for method, pattern, name in [
+    ('GET', r'/tables', 'tables'),
+    ('GET', r'/tables/(?P<table>\w+)/rows', 'rows'),
+    ('POST', r'/tables/(?P<table>\w+)/rows', 'add_rows'),
+    ('PATCH', r'/tables/(?P<table>\w+)/rows/(?P<row>\d+)', 'update_cell'),
+    ('DELETE', r'/tables/(?P<table>\w+)/rows/(?P<row>\d+)', 'delete_row'),
+    ('GET', r'/grades', 'grades'),
+    ('GET', r'/grades/summary', 'summary'),
+    ('GET', r'/gpa', 'gpa'),
+    ('GET', r'/search', 'search'),
+    ('GET', r'/charts/(?P<kind>\w+)', 'chart'),
+    ('GET', r'/stats', 'stats'),
+    ('POST', r'/save', 'save'),
+    ('POST', r'/refresh', 'refresh'),
+]]
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = 'SAMS'
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; with Nagle on, each response waits out the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def do_GET(self): self._dispatch('GET')
+    def do_POST(self): self._dispatch('POST')
+    def do_PATCH(self): self._dispatch('PATCH')
+    def do_DELETE(self): self._dispatch('DELETE')
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        query = dict(parse_qsl(url.query))
+        try:
+            body = self._body()
+            for route_method, pattern, name in ROUTES:
+                match = pattern.match(url.path)
+                if match and route_method == method:
+                    with profiling.timer(f'server.{name}'):
+                        args = (query,) if method == 'GET' else (query, body)
+                        result = getattr(self.server.api, name)(*args, **match.groupdict())
+                    break
+            else:
+                raise APIError(404, f"No route for {method} {url.path}")
+        except APIError as e:
+            return self._send(e.status, {'error': str(e)})
+        except Exception as e:
+            return self._send(500, {'error': f"{type(e).__name__}: {e}"})
+        if isinstance(result, tuple):
+            return self._send(200, *result)
+        self._send(200, result)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except json.JSONDecodeError as e:
+            raise APIError(400, f"Invalid JSON body: {e.msg}") from None
+
+    def _send(self, status, payload, content_type='application/json'):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        if self.server.backlogged():
+            # A keep-alive connection holds its worker thread; hand it to a connection that is waiting.
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # One line per request on stderr would cost more than serving most reads
+
+
+class PooledHTTPServer(HTTPServer):
+    """``HTTPServer`` that hands each connection to a fixed pool of threads."""
+
+    request_queue_size = 128
+
+    def __init__(self, address, api, workers=None):
+        super().__init__(address, Handler)
+        self.api = api
+        self._pool = ThreadPoolExecutor(max_workers=workers or config.SERVER['workers'], thread_name_prefix='sams-http')
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+        self._queued = 0
+
+    def backlogged(self):
+        return self._queued > 0
+
+    def process_request(self, request, client_address):
+        request.settimeout(config.SERVER['idle_timeout'])
+        with self._connections_lock:
+            self._connections.add(request)
+            self._queued += 1
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        with self._connections_lock:
+            self._queued -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._connections_lock:
+                self._connections.discard(request)
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        with self._connections_lock:
+            for request in self._connections:
+                try:
+                    # Idle keep-alive connections see EOF and close; a response being written still goes out.
+                    request.shutdown(socket.SHUT_RD)
+                except OSError:
+                    pass
+        self._pool.shutdown(wait=True)
+
+
+def make_server(system, host=None, port=None, workers=None):
+    """Bind the API for ``system``; port 0 picks a free port (see ``server.server_address``)."""
+    settings = config.SERVER
+    address = (host or settings['host'], settings['port'] if port is None else port)
+    system.load_tables()  # Parsed up front, in parallel, rather than by the first requests to need them
+    return PooledHTTPServer(address, API(system), workers)
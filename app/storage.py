@@ -0,0 +1,466 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from array import array
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from . import config
+from .journal import TableJournal
+from .views import SCORE_COLS
+
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+class CSVEngine:
+    name = 'csv'
+    suffix = '.csv'
+
+    def path(self, filename):
+        return filename.with_suffix(self.suffix)
+
+    def journal(self, path):
+        return TableJournal(path)
+
+    def exists(self, path):
+        return path.exists()
+
+    def remove(self, path):
+        path.unlink()
+
+    def stamp(self, path, previous=None):
+        """``(mtime_ns, size, sha1)`` of a stored table, or None if it does not exist.
+
+        The digest of ``previous`` is reused while mtime and size are unchanged, so polling an
+        untouched file costs one ``stat``; a file rewritten with the same bytes keeps its digest.
+        """
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        if previous is not None and previous[:2] == (st.st_mtime_ns, st.st_size):
+            return previous
+        with open(path, 'rb') as f:
+            return st.st_mtime_ns, st.st_size, hashlib.file_digest(f, 'sha1').hexdigest()
+
+    def read(self, path, dtypes=None):
+        """``dtypes`` (column -> dtype, see ``schema.read_dtypes``) skips type inference for those
+        columns; a file holding a value that does not parse as declared is read untyped instead."""
+        if dtypes:
+            try:
+                return pd.read_csv(path, dtype=dtypes)
+            except ValueError:
+                pass
+        return pd.read_csv(path)
+
+    def write(self, df, path):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ParquetEngine(CSVEngine):
+    name = 'parquet'
+    suffix = '.parquet'
+
+    def read(self, path, dtypes=None):
+        # Memory-mapped Arrow buffers; numeric columns without nulls convert without a copy.
+        return pq.read_table(path, memory_map=True).to_pandas()
+
+    def write(self, df, path):
+        with open(path, 'wb') as f:
+            df.to_parquet(f, index=False, engine='pyarrow')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class NpyEngine(CSVEngine):
+    """Single-file columnar format that is memory-mapped on load.
+
+    Layout: ``MAGIC``, an 8-byte header length, a JSON header, then one raw buffer per
+    column aligned to ``ALIGN`` bytes (header offsets are relative to the first buffer).
+    Numeric columns are stored as-is and come back as zero-copy views of the mapping;
+    text columns are stored as int32 category codes and load as Categoricals.
+    """
+
+    name = 'npy'
+    suffix = '.npcol'
+    MAGIC = b'SAMSCOL1'
+    ALIGN = 64
+
+    def read(self, path, dtypes=None):
+        raw = np.memmap(path, dtype=np.uint8, mode='c')
+        if bytes(raw[:8]) != self.MAGIC:
+            raise ValueError(f"{path} is not a SAMS columnar file")
+        header_len = int(raw[8:16].view('<u8')[0])
+        header = json.loads(bytes(raw[16:16 + header_len]))
+        rows = header['rows']
+        data_start = self._align(16 + header_len)
+        columns = {}
+        for col in header['columns']:
+            dtype = np.dtype(col['dtype'])
+            start = data_start + col['offset']
+            values = raw[start:start + rows * dtype.itemsize].view(dtype)
+            if 'categories' in col:
+                # Text comes back as a Categorical over the stored codes; no per-row decoding.
+                values = pd.Categorical.from_codes(values, categories=pd.Index(col['categories'], dtype=object))
+            columns[col['name']] = values
+        return pd.DataFrame(columns, columns=[c['name'] for c in header['columns']], copy=False)
+
+    def write(self, df, path):
+        buffers, meta = [], []
+        for name in df.columns:
+            series = df[name]
+            if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biuf':
+                values = series.to_numpy()
+                entry = {'name': name, 'dtype': values.dtype.str}
+            elif isinstance(series.dtype, pd.CategoricalDtype):
+                values = series.cat.codes.to_numpy().astype('<i4')
+                entry = {'name': name, 'dtype': '<i4', 'categories': [_to_json(v) for v in series.cat.categories]}
+            else:
+                codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=True)
+                values = codes.astype('<i4')
+                entry = {'name': name, 'dtype': '<i4', 'categories': [_to_json(v) for v in uniques]}
+            buffers.append(np.ascontiguousarray(values))
+            meta.append(entry)
+
+        offset = 0
+        for entry, buf in zip(meta, buffers):
+            entry['offset'] = offset
+            offset = self._align(offset + buf.nbytes)
+        header = json.dumps({'rows': len(df), 'columns': meta}).encode('utf-8')
+        data_start = self._align(16 + len(header))
+
+        with open(path, 'wb') as f:
+            f.write(self.MAGIC)
+            f.write(np.array([len(header)], dtype='<u8').tobytes())
+            f.write(header)
+            for entry, buf in zip(meta, buffers):
+                f.write(b'\0' * (data_start + entry['offset'] - f.tell()))
+                f.write(buf.data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _align(self, n):
+        return (n + self.ALIGN - 1) // self.ALIGN * self.ALIGN
+
+
+def _to_json(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _quoted(columns):
+    return ', '.join(f'"{c}"' for c in columns)
+
+
+# Same as summing the score columns in pandas: missing quarters count as 0.
+_TOTAL_SQL = ' + '.join(f'COALESCE("{c}", 0)' for c in SCORE_COLS)
+
+
+def _to_sql(value):
+    value = _to_json(value)
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value
+
+
+class SQLiteEngine(CSVEngine):
+    """All tables in one SQLite database (``config.SQLITE['file']`` next to the CSV files).
+
+    There is one SQL table per ``config.COLUMNS`` entry; the grade years share ``grades``
+    and are told apart by a ``tbl`` column. A table is addressed by a locator path,
+    ``<data dir>/<db file>/<table>``, so the engine fits the same ``read``/``write``
+    interface as the file engines. Row order is rowid order: rows are only ever appended
+    or deleted, so the n-th row by rowid is row n of the DataFrame.
+    """
+
+    name = 'sqlite'
+    suffix = ''
+
+    def __init__(self):
+        self._conns = {}
+        self._ids = {}
+        self._lock = threading.RLock()
+
+    def path(self, filename):
+        return filename.with_name(config.SQLITE['file']) / filename.stem
+
+    def journal(self, path):
+        return SQLiteJournal(self, path)
+
+    def stamp(self, path, previous=None):
+        # Not tracked: other writers go through SQLite's own locking, not by replacing files.
+        return None
+
+    @staticmethod
+    def _sql_table(path):
+        col_type = config.TABLE_MAPPING[path.name]
+        return col_type.lower(), list(config.COLUMNS[col_type])
+
+    def _connect(self, db_path, create=True):
+        conn = self._conns.get(db_path)
+        if conn is not None:
+            return conn
+        if not create and not db_path.exists():
+            raise FileNotFoundError(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={config.SQLITE['synchronous']}")
+        conn.execute("CREATE TABLE IF NOT EXISTS sams_tables (tbl TEXT PRIMARY KEY)")
+        for col_type, columns in config.COLUMNS.items():
+            table = col_type.lower()
+            defs = ', '.join(f'"{col}" {"REAL" if dtype.startswith("float") else "TEXT"}'
+                             for col, dtype in columns.items())
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (tbl TEXT NOT NULL, {defs})")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_tbl ON {table} (tbl)")
+        # The Code index also carries the row total, so per-subject aggregates never touch the table.
+        conn.execute(f'CREATE INDEX IF NOT EXISTS grades_code ON grades ("Code", tbl, ({_TOTAL_SQL}))')
+        for col in ('Sem', 'Level'):
+            conn.execute(f'CREATE INDEX IF NOT EXISTS grades_{col.lower()} ON grades ("{col}", tbl)')
+        self._conns[db_path] = conn
+        return conn
+
+    def close(self):
+        with self._lock:
+            for conn in self._conns.values():
+                conn.close()
+            self._conns.clear()
+            self._ids.clear()
+
+    def exists(self, path):
+        try:
+            conn = self._connect(path.parent, create=False)
+        except FileNotFoundError:
+            return False
+        return conn.execute("SELECT 1 FROM sams_tables WHERE tbl = ?", (path.name,)).fetchone() is not None
+
+    def remove(self, path):
+        table, _ = self._sql_table(path)
+        with self._lock, self._transaction(path) as conn:
+            conn.execute(f"DELETE FROM {table} WHERE tbl = ?", (path.name,))
+            conn.execute("DELETE FROM sams_tables WHERE tbl = ?", (path.name,))
+            self._ids.pop(path, None)
+
+    def read(self, path, dtypes=None):
+        if not self.exists(path):
+            raise FileNotFoundError(path)
+        table, columns = self._sql_table(path)
+        with self._lock:
+            rows = self._connect(path.parent).execute(
+                f"SELECT {_quoted(columns)} FROM {table} WHERE tbl = ? ORDER BY rowid", (path.name,)).fetchall()
+        return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+
+    def write(self, df, path):
+        """Replace the rows of one table in a single transaction, inserted in batches."""
+        table, columns = self._sql_table(path)
+        frame = df.reindex(columns=columns).astype(object)
+        records = frame.where(frame.notna(), None).itertuples(index=False, name=None)
+        batch = config.SQLITE['batch_rows']
+        with self._lock, self._transaction(path) as conn:
+            conn.execute(f"DELETE FROM {table} WHERE tbl = ?", (path.name,))
+            conn.execute("INSERT OR IGNORE INTO sams_tables (tbl) VALUES (?)", (path.name,))
+            while True:
+                chunk = [(path.name,) + row for row in islice(records, batch)]
+                if not chunk:
+                    break
+                conn.executemany(self._insert_sql(table, columns), chunk)
+            self._ids.pop(path, None)
+        with self._lock:
+            # A full rewrite leaves a WAL as large as the table; fold it back in right away.
+            self._connect(path.parent).execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    @staticmethod
+    def _insert_sql(table, columns):
+        return f"INSERT INTO {table} (tbl, {_quoted(columns)}) VALUES (?, {', '.join('?' * len(columns))})"
+
+    def _transaction(self, path):
+        return _Transaction(self._connect(path.parent))
+
+    def _rowids(self, conn, path, table):
+        # Row position -> rowid, loaded once per table and kept in step with every mutation.
+        ids = self._ids.get(path)
+        if ids is None:
+            ids = array('q', (r for (r,) in conn.execute(
+                f"SELECT rowid FROM {table} WHERE tbl = ? ORDER BY rowid", (path.name,))))
+            self._ids[path] = ids
+        return ids
+
+    def apply(self, path, entries):
+        """Apply journal entries (see ``TableJournal``) to one table in a single transaction."""
+        table, columns = self._sql_table(path)
+        with self._lock:
+            try:
+                with self._transaction(path) as conn:
+                    conn.execute("INSERT OR IGNORE INTO sams_tables (tbl) VALUES (?)", (path.name,))
+                    ids = self._rowids(conn, path, table)
+                    for entry in entries:
+                        self._apply(conn, path, table, columns, ids, entry)
+            except Exception:
+                self._ids.pop(path, None)  # Rolled back: the cached positions may be ahead of the table
+                raise
+
+    def _apply(self, conn, path, table, columns, ids, entry):
+        op = entry['op']
+        if op == 'batch':
+            for sub in entry['entries']:
+                self._apply(conn, path, table, columns, ids, sub)
+        elif op == 'add':
+            sql = self._insert_sql(table, columns)
+            for row in entry['rows']:
+                cursor = conn.execute(sql, (path.name,) + tuple(_to_sql(row.get(c)) for c in columns))
+                ids.append(cursor.lastrowid)
+        elif op == 'update':
+            if entry['col'] in columns:
+                conn.execute(f'UPDATE {table} SET "{entry["col"]}" = ? WHERE rowid = ?',
+                             (_to_sql(entry['value']), ids[entry['row']]))
+        elif op == 'delete':
+            conn.execute(f"DELETE FROM {table} WHERE rowid = ?", (ids[entry['row']],))
+            del ids[entry['row']]
+        elif op == 'insert':
+            # Rows are kept in rowid order: the tail from the insert point is re-added behind the new rows.
+            pos, tail = entry['row'], []
+            if pos < len(ids):
+                tail = conn.execute(f"SELECT {_quoted(columns)} FROM {table} WHERE tbl = ? AND rowid >= ? ORDER BY rowid",
+                                    (path.name, ids[pos])).fetchall()
+                conn.execute(f"DELETE FROM {table} WHERE tbl = ? AND rowid >= ?", (path.name, ids[pos]))
+                del ids[pos:]
+            sql = self._insert_sql(table, columns)
+            for values in [tuple(_to_sql(row.get(c)) for c in columns) for row in entry['rows']] + tail:
+                ids.append(conn.execute(sql, (path.name,) + tuple(values)).lastrowid)
+
+    def _query(self, paths, sql, params=()):
+        with self._lock:
+            return self._connect(paths[0].parent).execute(sql, list(params)).fetchall()
+
+    def grade_summary(self, paths):
+        """``levels`` (Total/Courses per table) and ``subjects`` (Score_Sum/Rows/Min/Max per Code) via GROUP BY."""
+        names = [p.name for p in paths]
+        marks = ', '.join('?' * len(names))
+        levels = dict((tbl, (total, n)) for tbl, total, n in self._query(
+            paths, f"SELECT tbl, SUM({_TOTAL_SQL}), COUNT(*) FROM grades WHERE tbl IN ({marks}) GROUP BY tbl", names))
+        subjects = self._query(
+            paths, f'SELECT "Code", SUM({_TOTAL_SQL}), COUNT(*), MIN({_TOTAL_SQL}), MAX({_TOTAL_SQL}) '
+                   f'FROM grades INDEXED BY grades_code WHERE "Code" IS NOT NULL AND tbl IN ({marks}) GROUP BY "Code"', names)
+        return {
+            'levels': pd.DataFrame([(tbl,) + levels[tbl] for tbl in names if tbl in levels],
+                                   columns=['Grade_Level', 'Total', 'Courses']),
+            'subjects': pd.DataFrame(subjects, columns=['Code', 'Score_Sum', 'Rows', 'Min', 'Max']),
+        }
+
+    def subject_codes(self, paths):
+        # Loose index scan: one seek on the (Code, tbl) index per distinct code instead of a full scan.
+        names = [p.name for p in paths]
+        marks = ', '.join('?' * len(names))
+        # (The CTE column must not be called "code": SQLite names are case-insensitive.)
+        step = ('SELECT "Code" FROM grades INDEXED BY grades_code '
+                'WHERE "Code" {} AND tbl IN (%s) ORDER BY "Code" LIMIT 1' % marks)
+        sql = (f"WITH RECURSIVE codes(prev) AS (SELECT ({step.format('IS NOT NULL')}) UNION ALL "
+               f"SELECT ({step.format('> prev')}) FROM codes WHERE prev IS NOT NULL) "
+               f"SELECT prev FROM codes WHERE prev IS NOT NULL")
+        return [code for (code,) in self._query(paths, sql, names + names)]
+
+    def trend_points(self, paths, codes):
+        """Per-code ``(grade_int, total)`` arrays, as ``viz.trend_points``, filtered through the Code index."""
+        codes = [str(c) for c in codes]
+        if not paths or not codes:
+            return {}
+        order = {p.name: i + 1 for i, p in enumerate(paths)}
+        level = ' '.join(f"WHEN ? THEN {i}" for i in order.values())
+        sql = (f'SELECT "Code", CASE tbl {level} END AS grade, {_TOTAL_SQL} FROM grades '
+               f'WHERE "Code" IN ({", ".join("?" * len(codes))}) AND tbl IN ({", ".join("?" * len(order))}) '
+               f'ORDER BY grade, rowid')
+        rows = self._query(paths, sql, list(order) + codes + list(order))
+        points = {}
+        for code, grade, total in rows:
+            points.setdefault(code, ([], []))
+            points[code][0].append(grade)
+            points[code][1].append(total)
+        return {code: (np.asarray(x), np.asarray(y, dtype='float32')) for code, (x, y) in points.items()}
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, *exc):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class SQLiteJournal:
+    """Journal stand-in for the SQLite engine: every entry is applied to the database at once.
+
+    The database is its own durable log, so there is never anything to replay or compact;
+    ``commit`` is only reached for tables changed outside the journal (``bulk()``).
+    """
+
+    durable = True
+
+    def __init__(self, engine, path):
+        self.engine = engine
+        self.base_path = path
+
+    def __len__(self):
+        return 0
+
+    def pending(self):
+        return False
+
+    def append(self, entry, count=1):
+        self.engine.apply(self.base_path, [entry])
+
+    def recover(self):
+        return []
+
+    def rotate(self):
+        pass
+
+    def discard(self):
+        pass
+
+    def commit(self, write_base):
+        write_base(self.base_path)
+
+    def close(self):
+        pass
+
+
+ENGINES = {'csv': CSVEngine, 'parquet': ParquetEngine, 'npy': NpyEngine, 'sqlite': SQLiteEngine}
+
+
+def get_engine(name=None):
+    name = name or config.STORAGE_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Unknown storage engine '{name}'. Choose from: {', '.join(ENGINES)}")
+    if name == 'parquet' and not PARQUET_AVAILABLE:
+        raise RuntimeError("Parquet storage needs pyarrow. Please run: pip install pyarrow")
+    return ENGINES[name]()
+
+
+def migrate(src_name, dst_name, remove_source=False, files=None):
+    src, dst = get_engine(src_name), get_engine(dst_name)
+    converted = []
+    for table_name, filename in (files or config.FILES).items():
+        src_path, dst_path = src.path(filename), dst.path(filename)
+        if not src.exists(src_path):
+            continue
+        if src.journal(src_path).pending():
+            raise RuntimeError(f"'{table_name}' has uncompacted changes. Run save_all() before migrating.")
+        dst.write(src.read(src_path), dst_path)
+        if remove_source:
+            src.remove(src_path)
+        converted.append(table_name)
+    return converted
@@ -1,8 +1,9 @@
+import time
+
 import numpy as np
 import pandas as pd
 from tabulate import tabulate
 from . import config
-from . import viz
 
 class ConsoleUI:
     def __init__(self, manager):
@@ -35,15 +36,54 @@ class ConsoleUI:
                 print("❌ Please enter a number.")
 
     def _display_df(self, df):
+        """Print ``df``, one page at a time if it is longer than ``PAGE_SIZE``. Returns True if the
+        pager waited for the user to leave it."""
         if df.empty:
             print("\n📭 [Table is Empty]")
-            return
-        
-        display_df = df.copy()
-        display_df.index = np.arange(1, len(df) + 1)
-        
-        print("\n" + tabulate(display_df, headers='keys', tablefmt='rounded_outline', showindex=True))
-        print(f"  (Total Rows: {len(df)})\n")
+            return False
+
+        # Only the visible window is sliced and formatted, so huge tables page instantly.
+        size = config.PAGE_SIZE
+        pages = -(-len(df) // size)
+        page, columns = 0, None
+        while True:
+            start = page * size
+            end = min(start + size, len(df))
+            window = df.iloc[start:end] if columns is None else df.iloc[start:end][columns]
+            print("\n" + tabulate(window, headers='keys', tablefmt='rounded_outline', showindex=range(start + 1, end + 1)))
+            if pages == 1:
+                print(f"  (Total Rows: {len(df)})\n")
+                return False
+            print(f"  (Rows {start + 1}-{end} of {len(df)} | Page {page + 1}/{pages})")
+
+            prompt = "👉 [n]ext, [p]rev, [g] <page>, [r] <row>, [c] <col,...>, ENTER to continue: "
+            cmd, _, arg = input(prompt).strip().partition(' ')
+            cmd, arg = cmd.lower(), arg.strip()
+            if cmd in ('', 'q'):
+                print()
+                return True
+            if cmd == 'n':
+                page = min(page + 1, pages - 1)
+            elif cmd == 'p':
+                page = max(page - 1, 0)
+            elif cmd in ('g', 'r') and arg.isdigit() and int(arg) >= 1:
+                target = int(arg) - 1 if cmd == 'g' else (int(arg) - 1) // size
+                page = min(target, pages - 1)
+            elif cmd == 'c':
+                columns = self._pick_columns(df, arg, columns)
+            else:
+                print("❌ Unknown command.")
+
+    def _pick_columns(self, df, arg, current):
+        if not arg:
+            return None
+        lookup = {str(c).lower(): c for c in df.columns}
+        wanted = [name.strip() for name in arg.split(',') if name.strip()]
+        missing = [name for name in wanted if name.lower() not in lookup]
+        if missing:
+            print(f"❌ Unknown column(s): {', '.join(missing)}. Available: {', '.join(map(str, df.columns))}")
+            return current
+        return [lookup[name.lower()] for name in wanted]
 
     def _get_input(self, col_name):
         is_numeric = col_name in config.NUMERIC_COLS
@@ -67,7 +107,7 @@ class ConsoleUI:
         if not table_name: return
 
         col_key = config.TABLE_MAPPING.get(table_name)
-        columns = config.COLUMNS.get(col_key)
+        columns = list(config.COLUMNS.get(col_key))
 
         print(f"\n📝 Adding new row to [{table_name}]...")
         row_data = {}
@@ -80,7 +120,6 @@ class ConsoleUI:
 
         if input('\n💾 Save this row? (y/n): ').lower() == 'y':
             self.manager.add_row(table_name, row_data)
-            self.manager.save_all()
             print(f"✅ Saved to {table_name}.")
         else:
             print("🚫 Cancelled.")
@@ -98,9 +137,10 @@ class ConsoleUI:
 
         while True:
             try:
-                row_input = input(f"👉 Select Row Number to Edit (1-{len(df)}) or 'q': ").strip()
+                row_input = input(f"👉 Select Row Number to Edit (1-{len(df)}), 's <text>' to search, or 'q': ").strip()
                 if row_input.lower() == 'q': return
-                
+                if self._search_command(table_name, df, row_input): continue
+
                 row_idx = int(row_input) - 1
                 if 0 <= row_idx < len(df):
                     break
@@ -115,7 +155,6 @@ class ConsoleUI:
         new_val = self._get_input(col_name)
         
         if self.manager.update_cell(table_name, row_idx, col_name, new_val):
-            self.manager.save_all()
             print("✅ Edit saved.")
         else:
             print("❌ System Error.")
@@ -132,28 +171,63 @@ class ConsoleUI:
         self._display_df(df)
         
         try:
-            row_input = input(f"🗑️  Enter ROW Number to DELETE (1-{len(df)}): ").strip()
+            while True:
+                row_input = input(f"🗑️  Enter ROW Number(s) to DELETE (1-{len(df)}, e.g. 3 or 2,5-8), "
+                                  "'s <text>' to search: ").strip()
+                if not self._search_command(table_name, df, row_input): break
             if row_input.lower() == 'q': return
 
-            r_idx = int(row_input) - 1
+            rows = self._parse_rows(row_input)
             
-            if 0 <= r_idx < len(df):
-                if input(f"⚠️ Delete Row {row_input}? (y/n): ").lower() == 'y':
-                    if self.manager.delete_row(table_name, r_idx):
-                        self.manager.save_all()
-                        print("🗑️  Row deleted.")
+            if rows and all(0 <= r < len(df) for r in rows):
+                label = f"Row {row_input}" if len(rows) == 1 else f"{len(rows)} rows"
+                if input(f"⚠️ Delete {label}? (y/n): ").lower() == 'y':
+                    # Highest first so the remaining numbers still point at the rows shown.
+                    with self.manager.transaction():
+                        for r_idx in sorted(rows, reverse=True):
+                            self.manager.delete_row(table_name, r_idx)
+                    print(f"🗑️  {len(rows)} row(s) deleted.")
             else:
                 print("❌ Invalid row number.")
         except ValueError:
             print("❌ Invalid input.")
+        except IOError as e:
+            print(f"❌ Delete failed: {e}")
+
+    def _search_command(self, table_name, df, text):
+        """Handle 's <text>': print the best matching rows of ``table_name`` with their row numbers."""
+        cmd, _, query = text.partition(' ')
+        if cmd.lower() != 's' or not query.strip(): return False
+        rows = [row for _, row in self.manager.search(query, [table_name])]
+        if not rows:
+            print(f"🔍 No matches for '{query.strip()}'.")
+        else:
+            print("\n" + tabulate(df.iloc[rows], headers='keys', tablefmt='rounded_outline', showindex=[r + 1 for r in rows]))
+            print(f"  (Best {len(rows)} match(es), best first)\n")
+        return True
+
+    @staticmethod
+    def _parse_rows(text):
+        """'2,5-8' -> {1, 4, 5, 6, 7} (0-based); raises ValueError on anything else."""
+        rows = set()
+        for part in text.split(','):
+            start, _, end = part.strip().partition('-')
+            first, last = int(start), int(end or start)
+            if first > last: raise ValueError(part)
+            rows.update(range(first - 1, last))
+        return rows
 
     def page_viz(self):
+        # matplotlib/scipy are only needed here; importing them up front slows startup.
+        from . import viz
+
         print("\n📊 --- Visualization Hub ---")
         print("1. Subject Breakdown (Thin Bar Chart) - View specific grade performance")
         print("2. GPA Trend (Smooth Line) - View progress from G9 to G12")
         print("3. Grade Distribution (Radar Chart) - View subject balance")
+        print("4. GPA Report (Weighted vs Unweighted) - View GPA per year and cumulative")
         
-        choice = input("\n👉 Select Chart Type (1-3): ").strip()
+        choice = input("\n👉 Select Chart Type (1-4): ").strip()
         
         grade_tables = [k for k in config.FILES.keys() if k.startswith('G')]
 
@@ -165,34 +239,46 @@ class ConsoleUI:
 
         elif choice == '2':
             print("\n🔄 Loading history data...")
-            full_df = self.manager.get_all_grades_combined()
+            unique_codes = self.manager.subject_codes()
             
-            if full_df.empty:
+            if not unique_codes:
                 print("⚠️ No data found across G9-G12.")
                 return
 
             print("\nExisting Subjects across years:")
-            unique_codes = sorted(full_df['Code'].unique().tolist())
             print(f"[{', '.join(unique_codes)}]")
             
             user_input = input("\n✍️  Enter Subject Codes to track (comma separated, e.g., 'MA101, ENG09'): ").strip()
             if not user_input: return
             
             selected_codes = [s.strip() for s in user_input.split(',')]
-            viz.plot_gpa_trend(full_df, selected_codes)
+            viz.plot_gpa_trend(self.manager.trend_points(selected_codes), selected_codes)
 
         elif choice == '3':
             grade_name = self._print_menu(grade_tables, "Select Grade for Radar Analysis")
             if grade_name:
                 df = self.manager.get_data(grade_name)
                 viz.plot_radar_distribution(df, grade_name)
+
+        elif choice == '4':
+            report = self.manager.gpa_report()
+            if report['years'].empty:
+                print("⚠️ No graded courses found across G9-G12.")
+                return
+
+            print("\n" + tabulate(report['years'].round(2), headers='keys', tablefmt='rounded_outline'))
+            total = report['cumulative']
+            print(f"  🎯 Cumulative GPA: {total['Weighted_GPA']:.2f} weighted / "
+                  f"{total['Unweighted_GPA']:.2f} unweighted ({total['Credits']:g} credits)\n")
+            viz.plot_gpa_by_year(report['years'])
                 
         else:
             print("❌ Invalid selection.")
 
     def page_ai_chat(self):
         print("\n🤖 --- AI Academic Advisor ---")
-        print("⚠️  Privacy Notice: Your query will be sent to OpenAI servers.")
+        print("⚠️  Privacy Notice: Your query and a short summary of your grades, skills and goals "
+              "will be sent to OpenAI servers.")
         
         confirm = input("👉 Proceed to chat? (y/n): ").strip().lower()
         if confirm != 'y':
@@ -213,13 +299,12 @@ class ConsoleUI:
 
         print("\n🔄 Connecting to Neural Network...")
         
-        response = self.manager.ask_ai(user_query, custom_sys)
-        
         print("\n" + "="*40)
         print("💡 INSIGHT:")
         print("-" * 40)
-        print(response)
-        print("="*40 + "\n")
+        for piece in self.manager.stream_ai(user_query, custom_sys):
+            print(piece, end="", flush=True)
+        print("\n" + "="*40 + "\n")
         
         input("Press Enter to continue...")
 
@@ -227,11 +312,85 @@ class ConsoleUI:
         table_name = self._print_menu(config.FILES.keys(), "Select Table to View")
         if table_name:
             df = self.manager.get_data(table_name)
-            self._display_df(df)
-            input("Press Enter to continue...")
+            if not self._display_df(df):
+                input("Press Enter to continue...")
+
+    def page_history(self):
+        history = self.manager.history
+        if history is None:
+            print("⚠️ History is turned off (config.HISTORY['enabled']).")
+            return
+        while True:
+            print("\n🔹 --- History ---")
+            if not history.steps:
+                print("  (No changes yet)")
+            first = max(history.position - 10, 0)
+            for i, step in enumerate(history.steps[first:history.position + 5], first + 1):
+                marker = "👉" if i == history.position else "  "
+                faded = "  (undone)" if i > history.position else ""
+                print(f"{marker} {i:>4}. {time.strftime('%m-%d %H:%M', time.localtime(step['at']))}  {step['label']}{faded}")
+            redo = len(history.steps) - history.position
+            print(f"\n  {history.position} change(s) to undo, {redo} to redo.")
+            if history.snapshots:
+                print("  📸 Snapshots: " + ", ".join(f"{name} (@{s['position']})" for name, s in history.snapshots.items()))
+
+            cmd = input("\n👉 [u]ndo, [r]edo, 's <name>' snapshot, 'g <name>' restore, 'd <name>' delete snapshot, "
+                        "ENTER to go back: ").strip()
+            if not cmd: return
+            action, _, name = cmd.partition(' ')
+            action, name = action.lower(), name.strip()
+            try:
+                if action == 'u':
+                    label = self.manager.undo()
+                    print(f"↩️  Undid: {label}" if label else "⚠️ Nothing to undo.")
+                elif action == 'r':
+                    label = self.manager.redo()
+                    print(f"↪️  Redid: {label}" if label else "⚠️ Nothing to redo.")
+                elif action == 's' and name:
+                    self.manager.snapshot(name)
+                    print(f"📸 Snapshot '{name}' saved.")
+                elif action == 'g' and name:
+                    if name not in history.snapshots: raise KeyError(name)
+                    question = f"⚠️ Restore '{name}'? Later changes stay in the redo list until you make a new one. (y/n): "
+                    if input(question).lower() == 'y':
+                        self.manager.restore(name)
+                        print(f"✅ Restored '{name}'.")
+                elif action == 'd' and name:
+                    self.manager.drop_snapshot(name)
+                    print(f"🗑️  Snapshot '{name}' deleted.")
+                else:
+                    print("❌ Invalid command.")
+            except KeyError:
+                print(f"❌ No snapshot named '{name}'.")
+            except (ValueError, OSError) as e:
+                print(f"❌ {e}")
+
+    def _check_disk(self, ask_all=False):
+        # Sync jobs may rewrite mydata/ while the menu is open; pick that up before the next action.
+        try:
+            reloaded, conflicts = self.manager.refresh()
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not reload a changed data file, will retry: {e}")
+            reloaded, conflicts = [], {}
+        for table in reloaded:
+            print(f"🔄 {table} was changed on disk and has been reloaded.")
+        for table, reasons in (self.manager.conflicts if ask_all else conflicts).items():
+            print(f"\n⚠️ {table} was changed on disk and clashes with your unsaved edits:")
+            for reason in reasons[:5]:
+                print(f"   - {reason}")
+            if len(reasons) > 5:
+                print(f"   ... and {len(reasons) - 5} more")
+            choice = input("👉 Keep [m]ine, take [t]heirs, or ENTER to decide later: ").strip().lower()
+            if choice not in ('m', 't'): continue
+            try:
+                self.manager.resolve(table, 'mine' if choice == 'm' else 'theirs')
+                print("✅ Kept your version." if choice == 'm' else f"✅ Reloaded {table} from disk.")
+            except OSError as e:
+                print(f"❌ Could not resolve {table}: {e}")
 
     def start_loop(self):
         while True:
+            self._check_disk()
             print("\n" + "="*40)
             print(" 🎓 Student Academic Manager (SAMS)")
             print("="*40)
@@ -241,9 +400,10 @@ class ConsoleUI:
             print("4. 🗑️  Delete Info")
             print("5. 📊 Visualize Data (Charts)")
             print("6. 🤖 Chat with AI") 
-            print("7. 🚪 Exit")
+            print("7. 🕘 History (Undo / Redo / Snapshots)")
+            print("8. 🚪 Exit")
             
-            choice = input("\n👉 Select operation (1-7): ").strip()
+            choice = input("\n👉 Select operation (1-8): ").strip()
             
             if choice == '1': self.page_show()
             elif choice == '2': self.page_add()
@@ -251,9 +411,11 @@ class ConsoleUI:
             elif choice == '4': self.page_delete()
             elif choice == '5': self.page_viz()
             elif choice == '6': self.page_ai_chat()
-            elif choice == '7':
-                self.manager.save_all()
-                print("👋 Bye! All data saved.")
+            elif choice == '7': self.page_history()
+            elif choice == '8':
+                self._check_disk(ask_all=True)
+                ok, msg = self.manager.save_all()
+                print(f"👋 Bye! {msg}" if ok else f"❌ Save failed: {msg}")
                 break
             else:
                 print("❌ Invalid choice.")
\ No newline at end of file
@@ -0,0 +1,101 @@
+import pandas as pd
+from . import profiling
+from . import schema
+
+GRADE_LEVELS = ['G9', 'G10', 'G11', 'G12']
+SCORE_COLS = ['Q1_Points', 'Q2_Points', 'Q3_Points', 'Q4_Points']
+COMBINED_COLS = ['Code', 'Course', 'Total_Score', 'Grade_Level']
+
+
+class CombinedGradesView:
+    """Materialized G9-G12 ``Code/Course/Total_Score/Grade_Level`` frame.
+
+    Each grade level is cached as a segment tagged with the table version it was built
+    from, so only segments whose table changed are rebuilt. A single ``update_cell`` is
+    patched into the cached segment (and the combined frame) in place.
+    """
+
+    def __init__(self, system):
+        self._system = system
+        self._segments = {}
+        self._combined = None
+        self._combined_versions = None
+        self._offsets = {}
+
+    def _versions(self):
+        return tuple(self._system.version(grade) for grade in GRADE_LEVELS)
+
+    def _build_segment(self, grade):
+        df = self._system.get_data(grade)
+        if df is None or df.empty:
+            return None
+        valid_cols = [c for c in SCORE_COLS if c in df.columns]
+        if not valid_cols:
+            return None
+        segment = df[['Code', 'Course']].copy()
+        segment['Total_Score'] = df[valid_cols].sum(axis=1)
+        segment['Grade_Level'] = grade
+        return segment.reset_index(drop=True)
+
+    def _segment(self, grade):
+        version = self._system.version(grade)
+        cached = self._segments.get(grade)
+        if cached is None or cached[0] != version:
+            cached = (version, self._build_segment(grade))
+            self._segments[grade] = cached
+        return cached[1]
+
+    def frame(self):
+        versions = self._versions()
+        if self._combined is None or versions != self._combined_versions:
+            self._system.load_tables(GRADE_LEVELS)
+            parts, offsets, pos = [], {}, 0
+            for grade in GRADE_LEVELS:
+                segment = self._segment(grade)
+                if segment is None:
+                    continue
+                offsets[grade] = pos
+                pos += len(segment)
+                parts.append(segment)
+            self._combined = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+            self._combined_versions = versions
+            profiling.count('view.rebuilds')
+            self._offsets = offsets
+        return self._combined.copy(deep=False)
+
+    def patch(self, key, row_idx, col_name, old_version):
+        """Apply one cell update of ``key`` without rebuilding; called after the version bump."""
+        cached = self._segments.get(key)
+        if cached is None or cached[0] != old_version or cached[1] is None:
+            return
+        if col_name not in SCORE_COLS and col_name not in ('Code', 'Course'):
+            self._segments[key] = (self._system.version(key), cached[1])
+            self._patch_combined_version(key, old_version)
+            return
+
+        df = self._system.get_data(key)
+        segment = cached[1]
+        if col_name in SCORE_COLS:
+            column = 'Total_Score'
+            valid_cols = [df.columns.get_loc(c) for c in SCORE_COLS if c in df.columns]
+            value = df.iloc[row_idx, valid_cols].sum()
+        else:
+            column = col_name
+            value = df.iat[row_idx, df.columns.get_loc(col_name)]
+        schema.set_cell(segment, row_idx, column, value)
+        self._segments[key] = (self._system.version(key), segment)
+
+        if self._patch_combined_version(key, old_version):
+            pos = self._offsets[key] + row_idx
+            schema.set_cell(self._combined, pos, column, value)
+
+    def _patch_combined_version(self, key, old_version):
+        if self._combined_versions is None or key not in self._offsets:
+            return False
+        idx = GRADE_LEVELS.index(key)
+        if self._combined_versions[idx] != old_version:
+            return False
+        versions = list(self._combined_versions)
+        versions[idx] = self._system.version(key)
+        self._combined_versions = tuple(versions)
+        return True
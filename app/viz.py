@@ -2,7 +2,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patheffects as pe
 import pandas as pd
+from collections import OrderedDict
 from math import pi
+from . import profiling
 
 try:
     from scipy.interpolate import make_interp_spline
@@ -48,14 +50,16 @@ def _calculate_total(df):
         return pd.Series([0]*len(df))
     return df[valid_cols].sum(axis=1)
 
-def plot_subject_breakdown(df, grade_name):
+@profiling.timed('viz.draw_subject_breakdown')
+def draw_subject_breakdown(df, grade_name):
     _setup_style()
     
-    if df.empty: return
+    if df.empty: return None
 
     df = df.copy()
     df['Total_Score'] = _calculate_total(df)
     df = df[df['Total_Score'] > 0].sort_values('Total_Score', ascending=True)
+    if df.empty: return None
 
     fig, ax = plt.subplots(figsize=(10, 6))
 
@@ -77,7 +81,7 @@ def plot_subject_breakdown(df, grade_name):
 
     ax.set_yticks(y_pos)
     ax.set_yticklabels(courses, fontsize=11, fontweight='bold')
-    ax.set_xlabel('TOTAL POINTS', fontsize=9, letterspacing=2, fontweight='bold')
+    ax.set_xlabel('TOTAL POINTS', fontsize=9, fontweight='bold')
     ax.set_xlim(0, max_score)
     
     for spine in ax.spines.values():
@@ -92,45 +96,77 @@ def plot_subject_breakdown(df, grade_name):
 
     plt.title(f"{grade_name} // PERFORMANCE", fontsize=16, fontweight='bold', color=THEME['text_white'], loc='left', pad=25)
     plt.tight_layout()
-    plt.show()
+    return fig
 
-def plot_gpa_trend(full_df, selected_subjects):
+def plot_subject_breakdown(df, grade_name):
+    fig = draw_subject_breakdown(df, grade_name)
+    if fig is not None:
+        plt.show()
+
+GRADE_MAP = {'G9': 1, 'G10': 2, 'G11': 3, 'G12': 4}
+SPLINE_CACHE_SIZE = 1024
+_spline_cache = OrderedDict()
+
+def trend_points(full_df, codes):
+    """Per-code (grade_int, total) arrays for ``codes`` from one filter, one sort and one groupby."""
+    if full_df.empty: return {}
+    sub_df = full_df.loc[full_df['Code'].isin(list(codes)), ['Code', 'Grade_Level', 'Total_Score']]
+    if sub_df.empty: return {}
+    grade_int = sub_df['Grade_Level'].map(GRADE_MAP).to_numpy()
+    order = np.argsort(grade_int, kind='stable')
+    x_all = grade_int[order]
+    y_all = sub_df['Total_Score'].to_numpy()[order]
+    code_all = sub_df['Code'].to_numpy()[order]
+    groups = pd.Series(code_all).groupby(code_all, sort=False).indices
+    return {code: (x_all[pos], y_all[pos]) for code, pos in groups.items()}
+
+def _smooth_curve(code, x, y):
+    """Spline through one subject's points, memoized on the subject and its exact data."""
+    if not (SCIPY_AVAILABLE and len(x) > 2):
+        return x, y
+    key = (code, x.tobytes(), np.asarray(y, dtype=float).tobytes())
+    if key in _spline_cache:
+        _spline_cache.move_to_end(key)
+        return _spline_cache[key]
+
+    x_new = np.linspace(1, 4, 300)
+    try:
+        spl = make_interp_spline(x, y, k=2)
+        curve = (x_new, np.clip(spl(x_new), 0, None))
+    except Exception:
+        curve = (x, y)
+
+    _spline_cache[key] = curve
+    if len(_spline_cache) > SPLINE_CACHE_SIZE:
+        _spline_cache.popitem(last=False)
+    return curve
+
+@profiling.timed('viz.draw_gpa_trend')
+def draw_gpa_trend(full_df, selected_subjects):
+    """``full_df`` is the combined grades frame, or the points already extracted from it (``trend_points``)."""
     _setup_style()
     
-    if full_df.empty: return
+    if isinstance(full_df, dict):
+        points = full_df
+    elif full_df.empty:
+        return None
+    else:
+        points = trend_points(full_df, selected_subjects)
+    if not points: return None
 
     fig, ax = plt.subplots(figsize=(10, 6))
     
-    grade_map = {'G9': 1, 'G10': 2, 'G11': 3, 'G12': 4}
     colors = [THEME['cyan'], THEME['green'], THEME['orange'], THEME['purple']]
     
     plotted_any = False
 
     for idx, code in enumerate(selected_subjects):
-        sub_df = full_df[full_df['Code'] == code].copy()
-        if sub_df.empty: continue
-            
-        sub_df['Grade_Int'] = sub_df['Grade_Level'].map(grade_map)
-        sub_df = sub_df.sort_values('Grade_Int')
-        
-        x = sub_df['Grade_Int'].values
-        y = sub_df['Total_Score'].values
-        
-        if len(x) < 1: continue
+        if code not in points: continue
+        x, y = points[code]
         plotted_any = True
         
         line_color = colors[idx % len(colors)]
-
-        if SCIPY_AVAILABLE and len(x) > 2:
-            x_new = np.linspace(1, 4, 300)
-            try:
-                spl = make_interp_spline(x, y, k=2)
-                y_smooth = spl(x_new)
-                y_smooth = np.clip(y_smooth, 0, None)
-            except:
-                x_new, y_smooth = x, y
-        else:
-            x_new, y_smooth = x, y
+        x_new, y_smooth = _smooth_curve(code, x, y)
 
         line, = ax.plot(x_new, y_smooth, color=line_color, linewidth=2.5, label=code)
         
@@ -143,7 +179,9 @@ def plot_gpa_trend(full_df, selected_subjects):
         scatter = ax.scatter(x, y, color=THEME['bg_main'], edgecolor=line_color, s=60, linewidth=2, zorder=10)
         scatter.set_path_effects([pe.Stroke(linewidth=5, foreground=line_color, alpha=0.3), pe.Normal()])
 
-    if not plotted_any: return
+    if not plotted_any:
+        plt.close(fig)
+        return None
 
     ax.set_xticks([1, 2, 3, 4])
     ax.set_xticklabels(['G9', 'G10', 'G11', 'G12'], fontweight='bold', fontsize=11)
@@ -160,11 +198,53 @@ def plot_gpa_trend(full_df, selected_subjects):
     legend = plt.legend(frameon=False, labelcolor=THEME['text_gray'], loc='upper left')
     
     plt.tight_layout()
-    plt.show()
+    return fig
 
-def plot_radar_distribution(df, grade_name):
+def plot_gpa_trend(full_df, selected_subjects):
+    fig = draw_gpa_trend(full_df, selected_subjects)
+    if fig is not None:
+        plt.show()
+
+@profiling.timed('viz.draw_gpa_by_year')
+def draw_gpa_by_year(years_df):
+    _setup_style()
+    if years_df.empty: return None
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    x = np.arange(len(years_df))
+
+    for column, color in (('Weighted_GPA', THEME['purple']), ('Unweighted_GPA', THEME['cyan'])):
+        y = years_df[column].values
+        line, = ax.plot(x, y, color=color, linewidth=2.5, marker='o', label=column.replace('_', ' ').upper())
+        line.set_path_effects([pe.Stroke(linewidth=8, foreground=color, alpha=0.15), pe.Normal()])
+        for xi, yi in zip(x, y):
+            if not np.isnan(yi):
+                ax.text(xi, yi + 0.08, f"{yi:.2f}", color=THEME['text_white'], ha='center', fontsize=10, fontweight='bold')
+
+    ax.set_xticks(x)
+    ax.set_xticklabels(years_df.index, fontweight='bold', fontsize=11)
+    ax.set_ylim(0, max(4.0, np.nanmax(years_df[['Weighted_GPA', 'Unweighted_GPA']].values) + 0.5))
+
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+
+    ax.grid(axis='y', linestyle='--', alpha=0.15, color=THEME['grid'])
+    ax.grid(axis='x', visible=False)
+
+    plt.title("GPA // BY YEAR", fontsize=16, fontweight='bold', color=THEME['text_white'], loc='left', pad=25)
+    plt.legend(frameon=False, labelcolor=THEME['text_gray'], loc='lower right')
+    plt.tight_layout()
+    return fig
+
+def plot_gpa_by_year(years_df):
+    fig = draw_gpa_by_year(years_df)
+    if fig is not None:
+        plt.show()
+
+@profiling.timed('viz.draw_radar_distribution')
+def draw_radar_distribution(df, grade_name):
     _setup_style()
-    if df.empty: return
+    if df.empty: return None
     df = df.copy()
     df['Total_Score'] = _calculate_total(df)
     df = df[df['Total_Score'] > 0]
@@ -172,7 +252,7 @@ def plot_radar_distribution(df, grade_name):
         
     categories = df['Code'].tolist()
     values = df['Total_Score'].tolist()
-    if not categories: return
+    if not categories: return None
 
     N = len(categories)
     angles = [n / float(N) * 2 * pi for n in range(N)]
@@ -201,4 +281,9 @@ def plot_radar_distribution(df, grade_name):
     
     plt.title(f"SKILL RADAR // {grade_name}", fontsize=16, fontweight='bold', color=THEME['text_gray'], pad=40)
     plt.tight_layout()
-    plt.show()
+    return fig
+
+def plot_radar_distribution(df, grade_name):
+    fig = draw_radar_distribution(df, grade_name)
+    if fig is not None:
+        plt.show()
@@ -0,0 +1,125 @@
+"""Concurrent and streaming AI requests against a local mock of the OpenAI chat API.
+
+Starts an OpenAI-compatible server on 127.0.0.1 that answers every completion after
+--latency seconds (streamed word by word when asked), failing every --fail-every-th
+non-streamed request with a 503 to exercise retries. Then compares sequential get_response calls
+with AIAssistant.ask_many and checks that stream_response yields several pieces.
+Nothing leaves the machine; the response cache is kept in a temporary directory.
+
+Usage: python benchmarks/bench_ai.py [--prompts 32] [--latency 0.2] [--concurrency 8]
+"""
+import argparse
+import itertools
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import ai  # noqa: E402
+from app.cache import ResponseCache  # noqa: E402
+
+
+def make_handler(latency, fail_every):
+    counter = itertools.count(1)
+
+    class MockOpenAI(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            time.sleep(latency)
+            if fail_every and not request.get('stream') and next(counter) % fail_every == 0:
+                return self._send_json(503, {'error': {'message': 'mock overload', 'type': 'server_error'}})
+
+            question = request['messages'][-1]['content']
+            answer = f"Mock advice for: {question}"
+            base = {'id': 'mock', 'created': int(time.time()), 'model': request.get('model', 'mock')}
+            if not request.get('stream'):
+                return self._send_json(200, dict(base, object='chat.completion', choices=[{
+                    'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': answer}}]))
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            for word in answer.split(' '):
+                chunk = dict(base, object='chat.completion.chunk', choices=[{
+                    'index': 0, 'finish_reason': None, 'delta': {'content': word + ' '}}])
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+    return MockOpenAI
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--prompts', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.2, help="Seconds the mock waits per request")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--fail-every', type=int, default=5, help="Answer every Nth request with 503 (0 = never)")
+    args = parser.parse_args()
+
+    if not ai.AI_AVAILABLE:
+        print("❌ openai and python-dotenv are required: pip install openai python-dotenv")
+        return 1
+    from openai import AsyncOpenAI, OpenAI
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.latency, args.fail_every))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    prompts = [f"How can I improve in subject {i}?" for i in range(args.prompts)]
+
+    def assistant(cache_dir):
+        return ai.AIAssistant(
+            client=OpenAI(api_key='mock', base_url=base_url, max_retries=0),
+            async_client=AsyncOpenAI(api_key='mock', base_url=base_url, max_retries=0),
+            cache=ResponseCache(cache_dir))
+
+    try:
+        with tempfile.TemporaryDirectory() as seq_dir, tempfile.TemporaryDirectory() as batch_dir:
+            start = time.perf_counter()
+            serial = assistant(seq_dir)
+            sequential = [serial.get_response(p) for p in prompts]
+            seq_time = time.perf_counter() - start
+
+            agent = assistant(batch_dir)
+            start = time.perf_counter()
+            answers = agent.get_responses(prompts, concurrency=args.concurrency)
+            batch_time = time.perf_counter() - start
+            failed = sum(a.startswith('❌') for a in answers)
+
+            start = time.perf_counter()
+            agent.get_responses(prompts, concurrency=args.concurrency)
+            cached_time = time.perf_counter() - start
+
+            pieces = list(agent.stream_response("Stream this answer please"))
+    finally:
+        server.shutdown()
+
+    print(f"sequential: {seq_time:.2f}s ({sum(a.startswith('❌') for a in sequential)} errors, no retries)")
+    print(f"ask_many:   {batch_time:.2f}s  concurrency={args.concurrency}  {failed} failed after retries")
+    print(f"cached:     {cached_time * 1000:.1f}ms  {agent.cache.stats}")
+    print(f"stream:     {len(pieces)} pieces -> {''.join(pieces).strip()!r}")
+    return 1 if failed or len(pieces) < 2 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
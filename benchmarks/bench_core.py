@@ -0,0 +1,199 @@
+"""Throughput and memory of the core hot paths on synthetic data, compared to a baseline.
+
+For each --rows size a synthetic dataset (benchmarks/synth.py) is written to a temp
+directory, then these are measured on a fresh GradeSystem:
+
+  load_all        _load_all_data() over all seven tables
+  add_row         --inserts single-row add_row calls (journaled, as in the UI)
+  update_cell     --updates random cell edits
+  delete_row      --deletes deletes from the middle of G9
+  combined        get_all_grades_combined(): first build, then a cached read
+  search          fuzzy search() over all tables: the first query (which builds the gram
+                  indexes), then SEARCH_QUERIES with typos and partial words
+  display_df      one page of ConsoleUI._display_df on G9
+  viz             headless render of each chart kind (no file cache); breakdown and
+                  radar use the first --viz-rows rows of G9
+  refresh_idle    refresh() with no file changed on disk (one stat per loaded table)
+  refresh_changed refresh() plus re-read after G12 is rewritten behind the system's back
+  save_all        compaction of every changed table
+
+Peak traced memory (tracemalloc) is reported per operation along with the in-memory
+size of the loaded tables. --save-baseline stores the results; later runs print the
+time ratio against it and exit non-zero if any operation is slower than --tolerance.
+
+Usage: python benchmarks/bench_core.py [--rows 1000 100000] [--save-baseline]
+"""
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+from tabulate import tabulate
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app import config, render  # noqa: E402
+from app.core import GradeSystem  # noqa: E402
+from app.ui import ConsoleUI  # noqa: E402
+from synth import generate, make_grades  # noqa: E402
+
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+SEARCH_QUERIES = ['Bioogy 11', 'calclus', 'Stanfrd', 'comp sci', 'C12', 'Robotcs']
+
+
+def _measure(fn, trace):
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        fn()
+        return time.perf_counter() - start, (tracemalloc.get_traced_memory()[1] if trace else None)
+    finally:
+        if trace:
+            tracemalloc.stop()
+
+
+def _table_bytes(system):
+    return sum(int(df.memory_usage(deep=True).sum()) for df in system.data.values())
+
+
+def run_size(rows, args):
+    rng = np.random.default_rng(args.seed)
+    results = []
+
+    def record(op, units, fn, unit='rows'):
+        seconds, peak = _measure(fn, args.memory)
+        results.append({'rows': rows, 'op': op, 'seconds': seconds, 'throughput': units / seconds if seconds else float('inf'),
+                        'unit': unit, 'peak_mib': None if peak is None else peak / 2**20})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sizes = generate(tmp, rows, args.seed)
+        system = GradeSystem(data_dir=tmp)
+        record('load_all', sum(sizes.values()), system._load_all_data)
+        table_mib = _table_bytes(system) / 2**20
+
+        new_rows = make_grades(args.inserts, args.seed + 1).to_dict('records')
+        record('add_row', len(new_rows), lambda: [system.add_row('G10', row) for row in new_rows], 'ops')
+
+        columns = config.COLUMNS['Grades']
+        targets = rng.integers(0, rows, args.updates)
+        cols = rng.choice([c for c in columns if c in config.NUMERIC_COLS], args.updates)
+        values = rng.uniform(60, 100, args.updates).round(1)
+        record('update_cell', args.updates,
+               lambda: [system.update_cell('G11', int(r), c, float(v)) for r, c, v in zip(targets, cols, values)], 'ops')
+
+        deletes = min(args.deletes, rows)
+        record('delete_row', deletes, lambda: [system.delete_row('G9', system.row_count('G9') // 2)
+                                               for _ in range(deletes)], 'ops')
+
+        total = sum(sizes[g] for g in ('G9', 'G10', 'G11', 'G12'))
+        record('combined_build', total, system.get_all_grades_combined)
+        record('combined_cached', total, system.get_all_grades_combined)
+
+        record('search_build', 1, lambda: system.search(SEARCH_QUERIES[0]), 'queries')
+        record('search', len(SEARCH_QUERIES), lambda: [system.search(q) for q in SEARCH_QUERIES], 'queries')
+
+        ui = ConsoleUI(system)
+        g9 = system.get_data('G9')
+
+        def show_page():
+            real_input = builtins.input
+            builtins.input = lambda prompt='': ''
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    ui._display_df(g9)
+            finally:
+                builtins.input = real_input
+        record('display_df', 1, show_page, 'pages')
+
+        if not args.skip_viz:
+            # Breakdown/radar draw one bar per course, so they get a realistic year's worth of rows.
+            sample = g9.head(args.viz_rows)
+            jobs = [render.ChartJob('breakdown', sample, ('G9',), 'breakdown'),
+                    render.ChartJob('radar', sample, ('G9',), 'radar'),
+                    render.ChartJob('trend', system.get_all_grades_combined(), (['C000', 'C001', 'C002'],), 'trend'),
+                    render.ChartJob('gpa', system.gpa_report()['years'], (), 'gpa')]
+            with tempfile.TemporaryDirectory() as out:
+                record('viz', len(jobs), lambda: render.render_charts(jobs, out, workers=1), 'charts')
+
+        record('refresh_idle', len(system.data), system.refresh, 'tables')
+        changed = system.get_data('G12').copy()
+        changed.iloc[0, changed.columns.get_loc('Q1_Points')] = 0.0
+        system.storage.write(changed, system.storage.path(system.files['G12']))
+        record('refresh_changed', sizes['G12'], lambda: (system.refresh(), system.get_data('G12')))
+
+        record('save_all', total + sizes['Self_Dev'], system.save_all)
+
+    return results, table_mib
+
+
+def compare(results, baseline, tolerance):
+    """Attach the time ratio vs. the baseline (current / baseline) to each result."""
+    previous = {(r['rows'], r['op']): r for r in baseline.get('results', [])}
+    regressions = []
+    for r in results:
+        old = previous.get((r['rows'], r['op']))
+        r['ratio'] = r['seconds'] / old['seconds'] if old and old['seconds'] else None
+        if r['ratio'] is not None and r['ratio'] > tolerance:
+            regressions.append(r)
+    return regressions
+
+
+def main():
+    logging.getLogger('matplotlib.font_manager').setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 100_000], help="Rows per grade table")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--inserts', type=int, default=2_000)
+    parser.add_argument('--updates', type=int, default=2_000)
+    parser.add_argument('--deletes', type=int, default=20)
+    parser.add_argument('--memory', action='store_true', help="Trace peak allocations per operation (slower)")
+    parser.add_argument('--viz-rows', type=int, default=50, help="G9 rows drawn by the breakdown/radar charts")
+    parser.add_argument('--skip-viz', action='store_true')
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=1.25, help="Fail if any op is this many times slower")
+    args = parser.parse_args()
+
+    results, footprint = [], {}
+    for rows in args.rows:
+        size_results, table_mib = run_size(rows, args)
+        results += size_results
+        footprint[rows] = table_mib
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() and not args.save_baseline else {}
+    if baseline and baseline.get('traced_memory') != args.memory:
+        print("⚠️  The baseline was recorded with a different --memory setting; tracing slows every operation.")
+    regressions = compare(results, baseline, args.tolerance)
+
+    table = [[f"{r['rows']:,}", r['op'], f"{r['seconds']:.4f}",
+              f"{r['throughput']:,.{0 if r['throughput'] >= 100 else 2}f} {r['unit']}/s",
+              '-' if r['peak_mib'] is None else f"{r['peak_mib']:.1f}",
+              '-' if r.get('ratio') is None else f"{r['ratio']:.2f}x"] for r in results]
+    print(tabulate(table, headers=['Rows', 'Operation', 'Time (s)', 'Throughput', 'Peak (MiB)', 'vs baseline'],
+                   tablefmt='rounded_outline'))
+    for rows, mib in footprint.items():
+        print(f"  Loaded tables at {rows:,} rows/grade: {mib:.1f} MiB")
+
+    if args.save_baseline:
+        baseline = {'results': results, 'footprint_mib': footprint, 'traced_memory': args.memory}
+        args.baseline.write_text(json.dumps(baseline, indent=2))
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"❌ {len(regressions)} operation(s) slower than {args.tolerance}x the baseline: "
+              + ", ".join(f"{r['op']}@{r['rows']:,}" for r in regressions))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
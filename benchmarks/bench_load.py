@@ -0,0 +1,85 @@
+"""Wall-clock time to load all seven tables: serial vs. parallel, typed vs. inferred reads.
+
+  inferred        the loader before typed reads: one table after another, pandas infers
+                  every column, then the schema cast runs
+  serial          load_tables(workers=1): dtypes from config.COLUMNS, one table at a time
+  parallel:<n>    load_tables(workers=n) for each --workers value
+
+Every run opens a fresh GradeSystem on the same synthetic dataset; the median of --runs is
+reported. The files stay in the OS page cache between runs, so this measures parsing, not
+the disk; --read-delay adds a fixed wait before each file is read to stand in for a slow or
+network disk (threads overlap the waits even on one core).
+
+Usage: python benchmarks/bench_load.py [--rows 10000 100000 1000000] [--workers 2 4 8] [--read-delay 50]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from tabulate import tabulate
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app import config, schema  # noqa: E402
+from app.core import GradeSystem  # noqa: E402
+from synth import generate  # noqa: E402
+
+
+def _inferred(system):
+    for key, filename in system.files.items():
+        schema.apply(system.storage.read(system.storage.path(filename)), config.TABLE_MAPPING[key])
+
+
+def _slow_reads(system, delay):
+    read = system.storage.read
+
+    def slow_read(path, dtypes=None):
+        time.sleep(delay)
+        return read(path, dtypes)
+    system.storage.read = slow_read
+
+
+def _median_seconds(data_dir, args, load):
+    samples = []
+    for _ in range(args.runs):
+        system = GradeSystem(engine=args.engine, data_dir=data_dir)
+        if args.read_delay:
+            _slow_reads(system, args.read_delay / 1000)
+        start = time.perf_counter()
+        load(system)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def run(rows, args):
+    modes = {'inferred': _inferred, 'serial': lambda system: system.load_tables(workers=1)}
+    for n in args.workers:
+        modes[f'parallel:{n}'] = lambda system, n=n: system.load_tables(workers=n)
+    with tempfile.TemporaryDirectory() as tmp:
+        generate(tmp, rows, args.seed, args.engine)
+        timings = {mode: _median_seconds(tmp, args, load) for mode, load in modes.items()}
+    return [[f"{rows:,}", mode, f"{seconds:.3f}", f"{timings['inferred'] / seconds:.2f}x"]
+            for mode, seconds in timings.items()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000], help="Rows per grade table")
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--engine', default='csv')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--read-delay', type=float, default=0, help="Milliseconds to wait before each file read")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    table = []
+    for rows in args.rows:
+        table += run(rows, args)
+    print(tabulate(table, headers=['Rows', 'Mode', 'Time (s)', 'Speedup'], tablefmt='rounded_outline'))
+
+
+if __name__ == '__main__':
+    main()
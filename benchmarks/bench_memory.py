@@ -0,0 +1,43 @@
+"""In-memory size of every table with inferred dtypes vs. the typed config.COLUMNS schema.
+
+Usage: python benchmarks/bench_memory.py [--rows 1000000]
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from tabulate import tabulate
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app import config, schema, storage  # noqa: E402
+from synth import generate  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Rows per grade table (side tables scale down)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    engine = storage.get_engine('csv')
+    rows, before_total, after_total = [], 0.0, 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        sizes = generate(tmp, args.rows, args.seed, 'csv')
+        for table, path in config.table_files(tmp).items():
+            inferred = engine.read(path)
+            typed = schema.apply(inferred, config.TABLE_MAPPING[table])
+            before, after = schema.memory_mib(inferred), schema.memory_mib(typed)
+            before_total += before
+            after_total += after
+            rows.append([table, f"{sizes[table]:,}", f"{before:.1f}", f"{after:.1f}", f"{before / after:.1f}x"])
+            del inferred, typed
+
+    rows.append(['Total', f"{sum(sizes.values()):,}", f"{before_total:.1f}", f"{after_total:.1f}",
+                 f"{before_total / after_total:.1f}x"])
+    print(tabulate(rows, headers=['Table', 'Rows', 'Inferred (MiB)', 'Typed (MiB)', 'Reduction'], tablefmt='rounded_outline'))
+
+
+if __name__ == '__main__':
+    main()
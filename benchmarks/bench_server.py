@@ -0,0 +1,174 @@
+"""Load test for the HTTP API (python main.py serve): requests/sec and latency percentiles.
+
+Starts a server on a synthetic dataset in a child process (or targets a running one with
+--url) and runs --clients threads, each on its own keep-alive connection, for --duration
+seconds. Every request is drawn from this mix:
+
+  page      GET /tables/G9/rows at a random offset (--page-size rows)
+  find      GET /tables/G9/rows?Code=<random code> (hash index lookup)
+  summary   GET /grades/summary
+  gpa       GET /gpa
+  update    PATCH one random G11 cell        } --write-ratio of all requests,
+  add       POST one row to G10              } split evenly
+
+Writes are group-committed by the server; the last line shows how many landed per batch.
+Against --url the writes go to whatever data that server holds.
+
+Usage: python benchmarks/bench_server.py [--rows 10000] [--clients 8] [--duration 10] [--write-ratio 0.2]
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+from tabulate import tabulate
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app import server  # noqa: E402
+from app.core import GradeSystem  # noqa: E402
+from synth import generate, make_grades  # noqa: E402
+
+
+def _serve(data_dir, workers, conn):
+    httpd = server.make_server(GradeSystem(data_dir=data_dir), port=0, workers=workers)
+    conn.send(httpd.server_address[1])
+    httpd.serve_forever()
+
+
+def _request(conn, method, path, body=None):
+    payload = None if body is None else json.dumps(body)
+    conn.request(method, path, body=payload, headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    data = response.read()
+    return response.status, data
+
+
+def _operations(conn, args):
+    _, data = _request(conn, 'GET', '/tables')
+    sizes = json.loads(data)
+    _, data = _request(conn, 'GET', '/grades/summary')
+    codes = [s['Code'] for s in json.loads(data)['subjects']] or ['C000']
+    new_rows = make_grades(256, args.seed + 1).to_dict('records')
+    for row in new_rows:
+        row.update({k: None for k, v in row.items() if v != v})  # NaN is not JSON
+
+    reads = {
+        'page': lambda rng: ('GET', f"/tables/G9/rows?offset={rng.randrange(max(sizes['G9'] - args.page_size, 1))}"
+                                    f"&limit={args.page_size}", None),
+        'find': lambda rng: ('GET', f"/tables/G9/rows?Code={rng.choice(codes)}&limit={args.page_size}", None),
+        'summary': lambda rng: ('GET', '/grades/summary', None),
+        'gpa': lambda rng: ('GET', '/gpa', None),
+    }
+    writes = {
+        'update': lambda rng: ('PATCH', f"/tables/G11/rows/{rng.randrange(max(sizes['G11'], 1))}",
+                               {'col': rng.choice(['Q1_Points', 'Q2_Points', 'Q3_Points', 'Q4_Points']),
+                                'value': round(rng.uniform(60, 100), 1)}),
+        'add': lambda rng: ('POST', '/tables/G10/rows', {'rows': [rng.choice(new_rows)]}),
+    }
+    ops = {**reads, **writes}
+    weights = [(1 - args.write_ratio) / len(reads)] * len(reads) + [args.write_ratio / len(writes)] * len(writes)
+    return ops, weights
+
+
+def _client(host, port, ops, weights, deadline, seed, latencies, errors):
+    rng = random.Random(seed)
+    names = list(ops)
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        method, path, body = ops[name](rng)
+        start = time.perf_counter()
+        status, _ = _request(conn, method, path, body)
+        latencies[name].append(time.perf_counter() - start)
+        if status >= 400:
+            errors[name] += 1
+    conn.close()
+
+
+def run(host, port, args):
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    ops, weights = _operations(conn, args)
+    before = json.loads(_request(conn, 'GET', '/stats')[1])
+    conn.close()  # An idle keep-alive connection would hold one of the server's worker threads
+
+    per_client = [(defaultdict(list), defaultdict(int)) for _ in range(args.clients)]
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=_client, args=(host, port, ops, weights, deadline, args.seed + i, *per_client[i]))
+               for i in range(args.clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    after = json.loads(_request(conn, 'GET', '/stats')[1])
+    conn.close()
+
+    latencies, errors = defaultdict(list), defaultdict(int)
+    for lat, err in per_client:
+        for name, values in lat.items():
+            latencies[name] += values
+        for name, n in err.items():
+            errors[name] += n
+    latencies['all'] = [v for name in ops for v in latencies[name]]
+    errors['all'] = sum(errors.values())
+
+    table = []
+    for name in list(ops) + ['all']:
+        ms = np.asarray(latencies[name]) * 1000
+        if not len(ms):
+            continue
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        table.append([name, len(ms), errors[name], f"{len(ms) / elapsed:,.1f}",
+                      f"{p50:.2f}", f"{p95:.2f}", f"{p99:.2f}", f"{ms.max():.2f}"])
+    print(tabulate(table, headers=['Operation', 'Requests', 'Errors', 'Req/s', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)', 'Max (ms)'],
+                   tablefmt='rounded_outline'))
+    batches, writes = after['batches'] - before['batches'], after['writes'] - before['writes']
+    if batches:
+        print(f"  {writes:,} write(s) committed in {batches:,} batch(es): {writes / batches:.1f} per batch")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="Load-test a running server instead, e.g. http://127.0.0.1:8765")
+    parser.add_argument('--rows', type=int, default=10_000, help="Rows per grade table of the synthetic dataset")
+    parser.add_argument('--workers', type=int, default=8, help="Server request threads")
+    parser.add_argument('--clients', type=int, default=8, help="Concurrent client connections")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run")
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        return run(url.hostname, url.port or 80, args)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generate(tmp, args.rows, args.seed)
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_serve, args=(tmp, args.workers, child), daemon=True)
+        process.start()
+        try:
+            port = parent.recv()
+            print(f"Server on 127.0.0.1:{port}: {args.rows:,} rows/grade, {args.workers} worker(s), "
+                  f"{args.clients} client(s), {args.write_ratio:.0%} writes")
+            run('127.0.0.1', port, args)
+        finally:
+            process.terminate()
+            process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Queries pushed down to the sqlite engine vs. the same calls on CSV tables loaded into pandas.
+
+Each operation runs on a freshly opened GradeSystem, so the CSV side pays for loading the
+grade tables and the sqlite side only for its query:
+
+  summary         grade_summary(): totals per year and per course code (cohort report)
+  subject_codes   distinct course codes across G9-G12 (GPA Trend menu)
+  trend           trend_points() for --codes
+  edit            --edits single-cell edits (journal append vs. one SQLite commit each);
+                  both engines load G11 into memory first
+
+--memory adds the peak traced allocation of each call; tracing slows sqlite3 fetches a
+lot more than pandas, so times from such a run are not comparable.
+
+Usage: python benchmarks/bench_sqlite.py [--rows 100000 1000000] [--memory]
+"""
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from tabulate import tabulate
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.core import GradeSystem  # noqa: E402
+from synth import generate  # noqa: E402
+
+OPERATIONS = {
+    'summary': lambda system, args: system.grade_summary(),
+    'subject_codes': lambda system, args: system.subject_codes(),
+    'trend': lambda system, args: system.trend_points(args.codes),
+    'edit': lambda system, args: [system.update_cell('G11', i, 'Q1_Points', 90.0) for i in range(args.edits)],
+}
+
+
+def _measure(fn, trace):
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        fn()
+        return time.perf_counter() - start, (tracemalloc.get_traced_memory()[1] / 2**20 if trace else None)
+    finally:
+        if trace:
+            tracemalloc.stop()
+
+
+def run(rows, engines, args):
+    results = []
+    for engine in engines:
+        with tempfile.TemporaryDirectory() as tmp:
+            generate(tmp, rows, args.seed, engine)
+            for op, call in OPERATIONS.items():
+                system = GradeSystem(engine=engine, data_dir=tmp)
+                seconds, peak = _measure(lambda: call(system, args), args.memory)
+                results.append({'rows': rows, 'engine': engine, 'op': op, 'seconds': seconds, 'peak_mib': peak})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000], help="Rows per grade table")
+    parser.add_argument('--engines', nargs='+', default=['csv', 'sqlite'])
+    parser.add_argument('--codes', nargs='+', default=['C000', 'C001', 'C002'])
+    parser.add_argument('--edits', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--memory', action='store_true', help="Trace peak allocations per call (slower)")
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        results += run(rows, args.engines, args)
+    table = [[f"{r['rows']:,}", r['op'], r['engine'], f"{r['seconds']:.4f}",
+              '-' if r['peak_mib'] is None else f"{r['peak_mib']:.1f}"] for r in results]
+    print(tabulate(sorted(table, key=lambda row: (int(row[0].replace(',', '')), row[1])),
+                   headers=['Rows', 'Operation', 'Engine', 'Time (s)', 'Peak (MiB)'], tablefmt='rounded_outline'))
+
+
+if __name__ == '__main__':
+    main()
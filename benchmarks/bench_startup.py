@@ -0,0 +1,71 @@
+"""Startup time from interpreter launch to the main menu being ready.
+
+cold: fresh interpreter with an empty bytecode cache.
+warm: fresh interpreter reusing the bytecode cache written by the previous run.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--max-warm 1.0]
+Exits non-zero if the warm median exceeds --max-warm seconds or a heavy
+module (matplotlib, scipy, openai) is imported before the menu shows.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ['matplotlib', 'scipy', 'openai', 'dotenv']
+
+PROBE = f"""
+import json, sys
+sys.path.insert(0, {str(ROOT)!r})
+from app.core import GradeSystem
+from app.ui import ConsoleUI
+ConsoleUI(GradeSystem())
+print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))
+"""
+
+
+def _launch(pycache_dir):
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache_dir)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', PROBE], env=env, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-warm', type=float, default=1.0, help="Fail if the warm median is slower (seconds)")
+    args = parser.parse_args()
+
+    cold, warm, heavy = [], [], set()
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as pycache:
+            elapsed, loaded = _launch(pycache)
+            cold.append(elapsed)
+            heavy.update(loaded)
+            elapsed, loaded = _launch(pycache)
+            warm.append(elapsed)
+            heavy.update(loaded)
+
+    for label, samples in (('cold', cold), ('warm', warm)):
+        print(f"{label}: median {statistics.median(samples):.3f}s  min {min(samples):.3f}s  max {max(samples):.3f}s")
+
+    failed = False
+    if heavy:
+        print(f"❌ Heavy modules imported at startup: {', '.join(sorted(heavy))}")
+        failed = True
+    if statistics.median(warm) > args.max_warm:
+        print(f"❌ Warm startup exceeds {args.max_warm:.2f}s budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
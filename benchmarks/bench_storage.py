@@ -0,0 +1,61 @@
+"""Load/save timings of every storage engine against the CSV path.
+
+Usage: python benchmarks/bench_storage.py [--rows 100000 1000000 10000000]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from tabulate import tabulate
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app import config, storage
+from synth import make_grades
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def _folder_mib(folder):
+    # Engines differ in file layout (one file per table, or one database for all of them).
+    return sum(f.stat().st_size for f in folder.iterdir() if f.is_file()) / 2**20
+
+
+def run(rows_list, engines):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in rows_list:
+            df = make_grades(rows)
+            for name in engines:
+                engine = storage.get_engine(name)
+                folder = Path(tmp) / f"{name}-{rows}"
+                folder.mkdir()
+                path = engine.path(folder / 'G9.csv')
+                save_s, _ = _timed(lambda: engine.write(df, path))
+                load_s, loaded = _timed(lambda: engine.read(path))
+                # Touch every numeric value so lazily mapped pages are counted too.
+                scan_s, _ = _timed(lambda: loaded[config.NUMERIC_COLS[:5]].sum())
+                results.append([f"{rows:,}", name, f"{save_s:.3f}", f"{load_s:.3f}",
+                                f"{load_s + scan_s:.3f}", f"{_folder_mib(folder):.1f}"])
+                engine.remove(path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10**5, 10**6, 10**7])
+    parser.add_argument('--engines', nargs='+', default=[n for n in storage.ENGINES
+                                                         if n != 'parquet' or storage.PARQUET_AVAILABLE])
+    args = parser.parse_args()
+    headers = ['Rows', 'Engine', 'Save (s)', 'Load (s)', 'Load+Scan (s)', 'Size (MiB)']
+    print(tabulate(run(args.rows, args.engines), headers=headers, tablefmt='rounded_outline'))
+
+
+if __name__ == '__main__':
+    main()
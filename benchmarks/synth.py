@@ -0,0 +1,118 @@
+"""Deterministic synthetic data for every table in config.FILES.
+
+The same (table, rows, seed) always yields the same frame, so benchmark runs are
+comparable. Grade tables share one course catalogue, so Code and Course stay
+consistent across G9-G12 and the trend charts have something to follow.
+
+Usage: python benchmarks/synth.py OUT_DIR [--rows 100000] [--seed 0] [--engine csv]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app import config, storage  # noqa: E402
+
+CATALOGUE = 200
+SUBJECTS = ['Math', 'English', 'Physics', 'Chemistry', 'Biology', 'History', 'Art', 'Music', 'CS', 'Economics']
+SKILLS = ['Python', 'Public Speaking', 'Piano', 'Data Analysis', 'Robotics', 'Writing', 'Spanish', 'Design', 'Debate', 'Chess']
+PROVIDERS = ['Coursera', 'edX', 'School Club', 'Summer Camp', 'Self-taught']
+UNIVERSITIES = ['MIT', 'Stanford', 'Harvard', 'Caltech', 'Princeton', 'Yale', 'Columbia', 'UC Berkeley', 'CMU', 'UCLA']
+SCHOOLS = ['Engineering', 'Arts & Sciences', 'Business', 'Computer Science', 'Medicine']
+MAJORS = ['Computer Science', 'Mathematics', 'Physics', 'Economics', 'Biology', 'Mechanical Engineering', 'Philosophy']
+
+
+def _rng(table, seed):
+    # Fixed per-table offsets (not hash()) keep the output identical across interpreter runs.
+    return np.random.default_rng([seed, list(config.TABLE_FILES).index(table) if table in config.TABLE_FILES else 99])
+
+
+def _pick(rng, values, rows):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), rows)]
+
+
+def make_grades(rows, seed=0, table='G9'):
+    rng = _rng(table, seed)
+    codes = np.array([f"C{i:03d}" for i in range(CATALOGUE)], dtype=object)
+    names = np.array([f"{SUBJECTS[i % len(SUBJECTS)]} {i // len(SUBJECTS) + 1}" for i in range(CATALOGUE)], dtype=object)
+    course = rng.integers(0, CATALOGUE, rows)
+    df = pd.DataFrame({
+        'Sem': _pick(rng, ['S1', 'S2'], rows),
+        'Level': _pick(rng, ['Regular', 'Honors', 'AP'], rows),
+        'Code': codes[course],
+        'Course': names[course],
+        'Weight': rng.choice([0.5, 1.0], rows),
+    })
+    for q in ['Q1_Points', 'Q2_Points', 'Q3_Points', 'Q4_Points']:
+        df[q] = rng.uniform(60, 100, rows).round(1)
+    # Some courses are still in progress: their later quarters are empty.
+    unfinished = rng.random(rows) < 0.05
+    df.loc[unfinished, ['Q3_Points', 'Q4_Points']] = np.nan
+    return df[list(config.COLUMNS['Grades'])]
+
+
+def make_self_dev(rows, seed=0):
+    rng = _rng('Self_Dev', seed)
+    skill = _pick(rng, SKILLS, rows)
+    return pd.DataFrame({
+        'Course': [f"{s} Track" for s in skill],
+        'From': _pick(rng, PROVIDERS, rows),
+        'Skill': skill,
+        'Status': _pick(rng, ['Done', 'Ongoing', 'Planned'], rows),
+        'Proficiency': rng.integers(1, 11, rows).astype(float),
+    })[list(config.COLUMNS['Self_Dev'])]
+
+
+def make_dream_schools(rows, seed=0):
+    rng = _rng('Dream_Schools', seed)
+    return pd.DataFrame({'University': _pick(rng, UNIVERSITIES, rows), 'School': _pick(rng, SCHOOLS, rows)})
+
+
+def make_dream_majors(rows, seed=0):
+    rng = _rng('Dream_Majors', seed)
+    return pd.DataFrame({'Major': _pick(rng, MAJORS, rows)})
+
+
+def table_sizes(rows):
+    """Rows per table for a dataset of ``rows`` grade rows per year; side tables scale down."""
+    sizes = {grade: rows for grade in ('G9', 'G10', 'G11', 'G12')}
+    sizes.update({'Self_Dev': max(rows // 10, 1), 'Dream_Schools': max(rows // 100, 1), 'Dream_Majors': max(rows // 100, 1)})
+    return sizes
+
+
+def make_table(table, rows, seed=0):
+    col_type = config.TABLE_MAPPING[table]
+    if col_type == 'Grades':
+        return make_grades(rows, seed, table)
+    return {'Self_Dev': make_self_dev, 'Dream_Schools': make_dream_schools,
+            'Dream_Majors': make_dream_majors}[col_type](rows, seed)
+
+
+def generate(data_dir, rows, seed=0, engine=None):
+    """Write every table of ``config.TABLE_FILES`` into ``data_dir``; returns {table: rows}."""
+    engine = storage.get_engine(engine)
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    sizes = table_sizes(rows)
+    for table, path in config.table_files(data_dir).items():
+        engine.write(make_table(table, sizes[table], seed), engine.path(path))
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('out')
+    parser.add_argument('--rows', type=int, default=100_000, help="Rows per grade table (side tables scale down)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engine', default=config.STORAGE_ENGINE)
+    args = parser.parse_args()
+    sizes = generate(args.out, args.rows, args.seed, args.engine)
+    print(f"✅ Wrote {sum(sizes.values()):,} rows across {len(sizes)} tables to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
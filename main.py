@@ -1,3 +1,4 @@
+import argparse
 import sys
 from pathlib import Path
 
@@ -5,13 +6,182 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 
 
+from app import config, profiling
 from app.core import GradeSystem
 from app.ui import ConsoleUI
 
 
+def build_parser():
+    parser = argparse.ArgumentParser(description="Student Academic Management System")
+    parser.add_argument('--student', help="Work on students/<STUDENT>/ instead of mydata/")
+    parser.add_argument('--profile', action='store_true', help="Time the hot paths and print a latency summary on exit")
+    parser.add_argument('--profile-json', metavar='PATH', help="With --profile, also write the summary as JSON")
+    commands = parser.add_subparsers(dest='command')
+
+    migrate = commands.add_parser('migrate', help="Convert mydata/ between storage engines")
+    migrate.add_argument('--from', dest='src', default=config.STORAGE_ENGINE,
+                         help="Source engine (default: config.STORAGE_ENGINE)")
+    migrate.add_argument('--to', dest='dst', required=True, help="Target engine: csv, npy, parquet or sqlite")
+    migrate.add_argument('--remove-source', action='store_true', help="Delete the source files after converting")
+
+    importer = commands.add_parser('import', help="Bulk-load rows from a CSV or JSONL file into a table")
+    importer.add_argument('table', choices=list(config.FILES))
+    importer.add_argument('path')
+    importer.add_argument('--format', choices=['csv', 'jsonl'], help="Default: guessed from the file extension")
+    importer.add_argument('--chunk-size', type=int, default=config.BATCH_CHUNK_ROWS)
+
+    exporter = commands.add_parser('export', help="Write a table to a CSV or JSONL file ('-' for stdout)")
+    exporter.add_argument('table', choices=list(config.FILES))
+    exporter.add_argument('path')
+    exporter.add_argument('--format', choices=['csv', 'jsonl'], help="Default: guessed from the file extension")
+    exporter.add_argument('--chunk-size', type=int, default=config.BATCH_CHUNK_ROWS)
+
+    apply = commands.add_parser('apply', help="Apply a JSONL file of add/update/delete operations")
+    apply.add_argument('path')
+    apply.add_argument('--chunk-size', type=int, default=config.BATCH_CHUNK_ROWS)
+
+    cohort = commands.add_parser('cohort', help="Aggregate every student directory in parallel")
+    cohort.add_argument('--root', default=str(config.STUDENTS_DIR), help="Directory holding one folder per student")
+    cohort.add_argument('--workers', type=int, help="Worker processes (default: all cores)")
+    cohort.add_argument('--out', help="Also write students/levels/subjects CSVs into this directory")
+
+    render = commands.add_parser('render', help="Render charts to image files without a display")
+    render.add_argument('--charts', nargs='+', choices=['breakdown', 'trend', 'radar', 'gpa'], help="Default: all")
+    render.add_argument('--grades', nargs='+', choices=['G9', 'G10', 'G11', 'G12'], help="Default: all")
+    render.add_argument('--subjects', nargs='+', help="Subject codes for the trend chart (default: all)")
+    render.add_argument('--format', choices=['png', 'svg'], default='png')
+    render.add_argument('--out', default=str(config.RENDER_DIR))
+    render.add_argument('--workers', type=int, help="Worker processes (default: all cores)")
+    render.add_argument('--all-students', action='store_true', help="Render for every folder under students/")
+
+    serve = commands.add_parser('serve', help="Serve the data over a local HTTP/JSON API")
+    serve.add_argument('--host', default=config.SERVER['host'])
+    serve.add_argument('--port', type=int, default=config.SERVER['port'])
+    serve.add_argument('--workers', type=int, default=config.SERVER['workers'], help="Request handler threads")
+    return parser
+
+
+def data_dir(args):
+    return config.STUDENTS_DIR / args.student if args.student else None
+
+
+def run_migrate(args):
+    from app import storage
+
+    ok, msg = GradeSystem(engine=args.src, data_dir=data_dir(args)).save_all()
+    if not ok:
+        print(f"❌ Could not compact '{args.src}' tables: {msg}")
+        return 1
+    files = config.table_files(data_dir(args)) if args.student else None
+    converted = storage.migrate(args.src, args.dst, remove_source=args.remove_source, files=files)
+    print(f"✅ Converted {len(converted)} table(s) from {args.src} to {args.dst}: {', '.join(converted) or '-'}")
+    if args.dst != config.STORAGE_ENGINE:
+        print(f"👉 Set STORAGE_ENGINE = '{args.dst}' in app/config.py to use the new files.")
+    return 0
+
+
+def run_batch(args):
+    from app import batch
+
+    system = GradeSystem(data_dir=data_dir(args))
+    if args.command == 'export':
+        rows = batch.export_file(system, args.table, args.path, args.format, args.chunk_size)
+        if args.path != '-':
+            print(f"✅ Exported {rows:,} row(s) from {args.table} to {args.path}")
+        return 0
+
+    if args.command == 'import':
+        report = batch.import_file(system, args.table, args.path, args.format, args.chunk_size)
+    else:
+        report = batch.apply_file(system, args.path, args.chunk_size)
+    print(f"{'✅' if not report.rejected else '⚠️ '} {report.summary()}")
+    return 0 if not report.rejected else 2
+
+
+def run_cohort(args):
+    from tabulate import tabulate
+    from app import cohort
+
+    stats = cohort.cohort_stats(args.root, workers=args.workers)
+    if stats['levels'].empty:
+        print(f"⚠️ No grade data found under {args.root} ({stats['student_count']} student folder(s)).")
+        return 1
+
+    print(f"\n🎓 Cohort: {stats['student_count']:,} student(s)")
+    print(tabulate(stats['levels'].round(2), headers='keys', tablefmt='rounded_outline'))
+    print(tabulate(stats['subjects'].head(20).round(2), headers='keys', tablefmt='rounded_outline'))
+    if args.out:
+        out = Path(args.out)
+        out.mkdir(parents=True, exist_ok=True)
+        for name in ('students', 'levels', 'subjects'):
+            stats[name].to_csv(out / f"{name}.csv", index=(name != 'students'))
+        print(f"✅ Wrote cohort tables to {out}")
+    return 0
+
+
+def run_render(args):
+    from app import cohort, render
+
+    if args.all_students:
+        systems = [(Path(d).name + '/', GradeSystem(data_dir=d)) for d in cohort.student_dirs()]
+    else:
+        systems = [(f"{args.student}/" if args.student else '', GradeSystem(data_dir=data_dir(args)))]
+
+    jobs = []
+    for prefix, system in systems:
+        jobs += render.jobs_for(system, args.charts, args.grades, args.subjects, prefix)
+    results = render.render_charts(jobs, args.out, args.format, args.workers)
+
+    counts = {status: sum(1 for *_, s in results if s == status) for status in ('rendered', 'cached', 'empty')}
+    print(f"✅ {counts['rendered']} rendered, {counts['cached']} cached, {counts['empty']} empty -> {args.out}")
+    return 0
+
+
+def run_serve(args):
+    from app import server
+
+    httpd = server.make_server(GradeSystem(data_dir=data_dir(args)), args.host, args.port, args.workers)
+    host, port = httpd.server_address[:2]
+    print(f"🌐 Serving on http://{host}:{port} with {args.workers} worker(s). Press Ctrl+C to stop.")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        ok, msg = httpd.api.close()
+        print(f"👋 Server stopped. {msg}" if ok else f"❌ Save failed: {msg}")
+    return 0 if ok else 1
+
+
 def main():
+    args = build_parser().parse_args()
+    if args.profile or args.profile_json:
+        profiling.enable()
     try:
-        system = GradeSystem()
+        return run(args)
+    finally:
+        if profiling.ENABLED:
+            print(profiling.report())
+            if args.profile_json:
+                profiling.dump(args.profile_json)
+                print(f"✅ Profile written to {args.profile_json}")
+
+
+def run(args):
+    try:
+        if args.command == 'migrate':
+            return run_migrate(args)
+        if args.command in ('import', 'export', 'apply'):
+            return run_batch(args)
+        if args.command == 'cohort':
+            return run_cohort(args)
+        if args.command == 'render':
+            return run_render(args)
+        if args.command == 'serve':
+            return run_serve(args)
+
+        system = GradeSystem(data_dir=data_dir(args))
         
         ui = ConsoleUI(system)
         
@@ -25,4 +195,4 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
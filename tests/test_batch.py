@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from app import batch, config
+from app.core import GradeSystem
+
+
+@pytest.fixture
+def system(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.HISTORY, 'enabled', False)
+    return GradeSystem(engine='csv', data_dir=tmp_path)
+
+
+def test_csv_import_rejects_bad_numbers_by_line(system, tmp_path):
+    src = tmp_path / 'in.csv'
+    src.write_text('Code,Q1_Points,Q2_Points\nA,90,\nB,abc,80\nC,70,x\nD,,\n')
+    report = batch.import_file(system, 'G9', src, chunk_size=2)  # Line numbers carry across chunks
+    assert (report.accepted, report.rejected) == (2, 2)
+    assert report.errors == ["line 3: 'abc' is not a number in 'Q1_Points'",
+                             "line 4: 'x' is not a number in 'Q2_Points'"]
+    assert list(system.get_data('G9')['Code']) == ['A', 'D']
+
+
+def test_csv_import_with_unknown_column_adds_nothing(system, tmp_path):
+    src = tmp_path / 'in.csv'
+    src.write_text('Code,Nope\nA,1\n')
+    with pytest.raises(ValueError):
+        batch.import_file(system, 'G9', src)
+    assert system.row_count('G9') == 0
+
+
+def test_jsonl_import_rejects_bad_lines(system, tmp_path):
+    src = tmp_path / 'in.jsonl'
+    src.write_text('\n'.join([json.dumps({'Code': 'A', 'Q1_Points': '91'}), '{broken', '[1, 2]',
+                              json.dumps({'Code': 'B', 'Extra': 1}), '', json.dumps({'Code': 'C'})]) + '\n')
+    report = batch.import_file(system, 'G9', src)
+    assert report.accepted == 2
+    assert [e.split(':')[0] for e in report.errors] == ['line 2', 'line 3', 'line 4']
+    assert list(system.get_data('G9')['Q1_Points'].fillna(-1)) == [91.0, -1]
+
+
+def test_apply_runs_mutations_in_order(system, tmp_path):
+    system.add_rows('G9', [{'Code': 'A'}, {'Code': 'B'}])
+    src = tmp_path / 'ops.jsonl'
+    ops = [{'op': 'add', 'table': 'G9', 'row': {'Code': 'C'}},
+           {'op': 'update', 'table': 'G9', 'row': 0, 'col': 'Code', 'value': 'A2'},
+           {'op': 'delete', 'table': 'G9', 'row': 1},
+           {'op': 'delete', 'table': 'G9', 'row': 40},
+           {'op': 'add', 'table': 'Nope', 'row': {}}]
+    src.write_text(''.join(json.dumps(op) + '\n' for op in ops))
+    report = batch.apply_file(system, src)
+    assert report.rejected == 2
+    assert [e.split(':')[0] for e in report.errors] == ['line 4', 'line 5']
+    assert list(system.get_data('G9')['Code']) == ['A2', 'C']
@@ -0,0 +1,97 @@
+import sys
+import threading
+
+import pytest
+
+from app import config
+from app.core import GradeSystem
+
+
+@pytest.fixture
+def system(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'JOURNAL_COMPACT_THRESHOLD', 3)
+    monkeypatch.setitem(config.HISTORY, 'enabled', False)
+    system = GradeSystem(engine='csv', data_dir=tmp_path)
+    system.add_rows('G9', [{'Code': f'C{i}', 'Q1_Points': float(i)} for i in range(3)])
+    assert system.save_all()[0]
+    return system
+
+
+def codes(system):
+    return list(system.get_data('G9')['Code'])
+
+
+def on_disk(system):
+    return codes(GradeSystem(engine='csv', data_dir=system.files['G9'].parent))
+
+
+def test_read_during_compaction_keeps_deletes(system):
+    # Hold a background compaction in its write, after it took its snapshot.
+    writing, release = threading.Event(), threading.Event()
+    write = system.storage.write
+
+    def slow_write(df, path):
+        writing.set()
+        release.wait(5)
+        write(df, path)
+    system.storage.write = slow_write
+    system.add_row('G9', {'Code': 'C3'})
+    system.add_row('G9', {'Code': 'C4'})
+    system.delete_row('G9', 0)  # Third journal entry: starts the compaction
+    assert writing.wait(5)
+    system.delete_row('G9', 0)
+    assert system.row_count('G9') == 3
+    assert codes(system) == ['C2', 'C3', 'C4']
+    release.set()
+    system.storage.write = write
+    assert system.save_all()[0]
+    assert codes(system) == on_disk(system) == ['C2', 'C3', 'C4']
+
+
+def test_concurrent_reads_and_compactions_agree_with_disk(system):
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads as often as possible
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            system.row_count('G9')
+            system.get_data('G9')
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    try:
+        expected = codes(system)
+        for i in range(60):
+            if i % 3 == 2 and expected:
+                system.delete_row('G9', 0)
+                del expected[0]
+            else:
+                system.add_row('G9', {'Code': f'N{i}'})
+                expected.append(f'N{i}')
+    finally:
+        stop.set()
+        reader.join()
+        sys.setswitchinterval(interval)
+    assert system.save_all()[0]
+    assert codes(system) == on_disk(system) == expected
+
+
+def test_rollback_after_deferred_compaction(system):
+    with pytest.raises(RuntimeError):
+        with system.transaction():
+            system.delete_row('G9', 0)
+            system._compact('G9', snapshot=True)  # What a background compaction runs
+            raise RuntimeError('abort')
+    assert codes(system) == ['C0', 'C1', 'C2']
+    assert system.save_all()[0]
+    assert on_disk(system) == ['C0', 'C1', 'C2']
+
+
+def test_deferred_compaction_runs_after_commit(system):
+    with system.transaction():
+        system.delete_row('G9', 0)
+        system._compact('G9', snapshot=True)
+        assert 'G9' in system._deferred
+    assert not system._deferred
+    system._compactions['G9'].join()
+    assert on_disk(system) == ['C1', 'C2']
@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+from app import batch, config
+from app.core import GradeSystem
+
+
+@pytest.fixture
+def system(tmp_path):
+    system = GradeSystem(engine='csv', data_dir=tmp_path)
+    system.add_rows('G9', [{'Code': f'C{i}', 'Q1_Points': float(i)} for i in range(3)])
+    return system
+
+
+def codes(system):
+    return list(system.get_data('G9')['Code'])
+
+
+def test_import_is_one_step_without_row_deltas(system, tmp_path):
+    src = tmp_path / 'import.csv'
+    src.write_text('Code,Q1_Points\n' + ''.join(f'N{i},{i}\n' for i in range(500)))
+    batch.import_file(system, 'G9', src)
+    step = system.history.steps[-1]
+    assert step['bulk'] and step['tables'] == ['G9']
+    deltas = tmp_path / config.HISTORY['dirname'] / 'deltas.jsonl'
+    assert len(deltas.read_bytes().splitlines()[-1]) < 100  # A row count, not 500 rows
+
+    system.undo()
+    assert codes(system) == ['C0', 'C1', 'C2']
+    system.redo()
+    assert system.row_count('G9') == 503
+    system.save_all()
+    reopened = GradeSystem(engine='csv', data_dir=tmp_path)
+    reopened.undo()
+    assert codes(reopened) == ['C0', 'C1', 'C2']
+
+
+def test_undo_keeps_changes_loaded_by_refresh(system, tmp_path):
+    src = tmp_path / 'import.csv'
+    src.write_text('Code,Q1_Points\nN0,10\nN1,11\n')
+    batch.import_file(system, 'G9', src)
+    assert system.save_all()[0]
+    path = system.files['G9']
+    df = pd.read_csv(path)
+    df.loc[0, 'Q1_Points'] = 99.0  # Another program edits the file
+    df.to_csv(path, index=False)
+    assert system.refresh() == (['G9'], {})
+
+    with pytest.raises(ValueError, match='no longer matches'):
+        system.undo()
+    assert system.get_data('G9')['Q1_Points'].iloc[0] == 99.0
+    assert system.row_count('G9') == 5
+    assert pd.read_csv(path)['Q1_Points'].iloc[0] == 99.0
+    assert system.history.position == len(system.history.steps)
+
+
+def test_old_steps_are_dropped_past_max_steps(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.HISTORY, 'checkpoint_every', 5)
+    monkeypatch.setitem(config.HISTORY, 'max_steps', 10)
+    system = GradeSystem(engine='csv', data_dir=tmp_path)
+    system.add_rows('G10', [{'Code': 'X'}])
+    for i in range(30):
+        system.add_row('G9', {'Code': f'C{i}'})
+    system.snapshot('late')
+    history = system.history
+    assert 10 <= len(history.steps) < 15 and history.position == len(history.steps)
+    assert len(list((history.folder / 'checkpoints').iterdir())) == len(history.checkpoints) <= 3
+
+    reopened = GradeSystem(engine='csv', data_dir=tmp_path)
+    while reopened.undo():
+        pass
+    assert reopened.row_count('G9') == 30 - len(history.steps)
+    assert list(reopened.get_data('G10')['Code']) == ['X']
+    reopened.restore('late')
+    assert reopened.row_count('G9') == 30
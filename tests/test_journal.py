@@ -0,0 +1,93 @@
+import pytest
+
+from app import config
+from app.core import GradeSystem
+from app.journal import TableJournal
+
+
+@pytest.fixture(autouse=True)
+def no_history(monkeypatch):
+    monkeypatch.setitem(config.HISTORY, 'enabled', False)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = TableJournal(tmp_path / 'G9.csv')
+    yield journal
+    journal.close()
+
+
+def codes(system, table='G9'):
+    return list(system.get_data(table)['Code'])
+
+
+def test_torn_tail_is_ignored(journal):
+    journal.append({'op': 'add', 'rows': [{'Code': 'A'}]})
+    journal.append({'op': 'add', 'rows': [{'Code': 'B'}]})
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"op": "add", "rows": [{"Co')
+    assert [e['rows'][0]['Code'] for e in journal.recover()] == ['A', 'B']
+    assert len(journal) == 2
+
+
+def test_batch_counts_its_entries(journal):
+    journal.append({'op': 'batch', 'entries': [{'op': 'delete', 'row': 0}] * 3}, 3)
+    journal.close()
+    journal.recover()
+    assert len(journal) == 3
+
+
+def test_crash_before_commit_keeps_rotated_entries(journal):
+    journal.append({'op': 'add', 'rows': [{'Code': 'A'}]})
+    journal.rotate()  # Compaction dies here: the marker and journal.old are left behind
+    journal.append({'op': 'add', 'rows': [{'Code': 'B'}]})
+    journal.close()
+    assert journal.tmp_path.exists() and journal.rotated_path.exists()
+    assert [e['rows'][0]['Code'] for e in journal.recover()] == ['A', 'B']
+    assert not journal.rotated_path.exists() and not journal.tmp_path.exists()
+    assert [e['rows'][0]['Code'] for e in TableJournal._read(journal.path)] == ['A', 'B']
+
+
+def test_crash_after_commit_drops_rotated_entries(journal):
+    journal.append({'op': 'add', 'rows': [{'Code': 'A'}]})
+    journal.rotate()
+    journal.base_path.write_text('Code\nA\n')
+    journal.tmp_path.replace(journal.base_path)  # Base file replaced, journal.old not yet unlinked
+    assert journal.recover() == []
+    assert not journal.rotated_path.exists()
+
+
+def test_failed_commit_keeps_entries_in_order(journal):
+    journal.append({'op': 'add', 'rows': [{'Code': 'A'}]})
+    journal.rotate()
+
+    def failing_write(path):
+        raise OSError('disk full')
+    with pytest.raises(OSError):
+        journal.commit(failing_write)
+    journal.append({'op': 'add', 'rows': [{'Code': 'B'}]})
+    journal.rotate()
+    journal.commit(lambda path: path.write_text('Code\nA\nB\n'))
+    assert journal.base_path.read_text() == 'Code\nA\nB\n'
+    assert journal.recover() == []
+
+
+def test_unsaved_changes_survive_a_restart(tmp_path):
+    system = GradeSystem(engine='csv', data_dir=tmp_path)
+    system.add_rows('G9', [{'Code': f'C{i}'} for i in range(4)])
+    assert system.save_all()[0]
+    system.update_cell('G9', 1, 'Code', 'X1')
+    system.delete_row('G9', 0)
+    system.add_row('G9', {'Code': 'C4'})
+    with system.transaction():
+        system.delete_row('G9', 0)
+        system.add_row('G9', {'Code': 'C5'})
+    system._journals['G9'].close()
+    with open(system._journals['G9'].path, 'a', encoding='utf-8') as f:
+        f.write('{"op": "delete", "ro')  # Crash in the middle of the next append
+
+    reopened = GradeSystem(engine='csv', data_dir=tmp_path)
+    assert codes(reopened) == ['C2', 'C3', 'C4', 'C5']
+    assert reopened.save_all()[0]
+    assert codes(GradeSystem(engine='csv', data_dir=tmp_path)) == ['C2', 'C3', 'C4', 'C5']
@@ -0,0 +1,91 @@
+import pandas as pd
+import pytest
+
+from app import config
+from app.core import GradeSystem
+
+
+@pytest.fixture
+def system(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.HISTORY, 'enabled', False)
+    system = GradeSystem(engine='csv', data_dir=tmp_path)
+    system.add_rows('G9', [{'Code': f'C{i}', 'Q1_Points': float(i)} for i in range(3)])
+    assert system.save_all()[0]
+    return system
+
+
+def edit_on_disk(system, row, col, value):
+    # Another program (a sync job, a spreadsheet) rewrites the file.
+    path = system.files['G9']
+    df = pd.read_csv(path)
+    df.loc[row, col] = value
+    df.to_csv(path, index=False)
+
+
+def points(system):
+    return list(system.get_data('G9')['Q1_Points'])
+
+
+def disk_points(system):
+    return list(pd.read_csv(system.files['G9'])['Q1_Points'])
+
+
+def test_unchanged_files_are_left_alone(system):
+    assert system.refresh() == ([], {})
+
+
+def test_clean_table_is_reloaded(system):
+    edit_on_disk(system, 1, 'Q1_Points', 99.0)
+    assert system.refresh() == (['G9'], {})
+    assert points(system) == [0.0, 99.0, 2.0]
+
+
+def test_local_edits_merge_with_disk_changes(system):
+    system.update_cell('G9', 0, 'Q1_Points', 50.0)
+    edit_on_disk(system, 1, 'Q1_Points', 99.0)
+    assert system.refresh() == (['G9'], {})
+    assert points(system) == [50.0, 99.0, 2.0]
+    assert system.save_all()[0]
+    assert disk_points(system) == [50.0, 99.0, 2.0]
+
+
+def test_conflict_blocks_saving(system):
+    system.update_cell('G9', 1, 'Q1_Points', 50.0)
+    edit_on_disk(system, 1, 'Q1_Points', 99.0)
+    reloaded, conflicts = system.refresh()
+    assert reloaded == [] and list(conflicts) == ['G9']
+    assert points(system) == [0.0, 50.0, 2.0]
+    ok, message = system.save_all()
+    assert not ok and 'G9' in message
+    assert disk_points(system) == [0.0, 99.0, 2.0]
+    assert system.refresh() == ([], {})  # Reported once, still pending
+    assert list(system.conflicts) == ['G9']
+
+
+def test_resolve_mine_writes_local_version(system):
+    system.update_cell('G9', 1, 'Q1_Points', 50.0)
+    edit_on_disk(system, 1, 'Q1_Points', 99.0)
+    system.refresh()
+    system.resolve('G9', 'mine')
+    assert system.conflicts == {}
+    assert disk_points(system) == [0.0, 50.0, 2.0]
+    assert system.save_all()[0]
+
+
+def test_resolve_theirs_discards_local_edits(system):
+    system.update_cell('G9', 1, 'Q1_Points', 50.0)
+    system.delete_row('G9', 0)
+    edit_on_disk(system, 1, 'Q1_Points', 99.0)
+    system.refresh()
+    system.resolve('G9', 'theirs')
+    assert points(system) == [0.0, 99.0, 2.0]
+    assert not system._journals['G9'].pending()
+    reopened = GradeSystem(engine='csv', data_dir=system.files['G9'].parent)
+    assert points(reopened) == [0.0, 99.0, 2.0]
+
+
+def test_deleted_row_changed_on_disk_is_a_conflict(system):
+    system.delete_row('G9', 2)
+    edit_on_disk(system, 2, 'Code', 'Z9')
+    _, conflicts = system.refresh()
+    assert 'changed on disk, deleted here' in conflicts['G9'][0]
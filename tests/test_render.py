@@ -0,0 +1,27 @@
+import pytest
+
+from app import config, render
+from app.core import GradeSystem
+
+
+@pytest.fixture
+def system(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.HISTORY, 'enabled', False)
+    system = GradeSystem(engine='csv', data_dir=tmp_path / 'data')
+    system.add_rows('G9', [{'Code': 'MATH', 'Q1_Points': 80.0}])
+    return system
+
+
+def test_new_version_replaces_the_old_file(system, tmp_path):
+    out = tmp_path / 'charts'
+    (out / 'alice').mkdir(parents=True)
+    (out / 'alice' / 'G9-breakdown-notes.png').write_text('kept')
+    paths = []
+    for points in (80.0, 90.0, 80.0):
+        system.update_cell('G9', 0, 'Q1_Points', points)
+        (_, path, status), = render.render_charts(render.jobs_for(system, ['breakdown'], ['G9'], prefix='alice/'),
+                                                  out, workers=1)
+        assert status == 'rendered'
+        paths.append(path)
+    assert paths[0] == paths[2]
+    assert sorted(p.name for p in (out / 'alice').iterdir()) == sorted(['G9-breakdown-notes.png', paths[2].name])
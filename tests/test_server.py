@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+from app import config
+from app.core import GradeSystem
+from app.server import APIError, RWLock, WriteBatcher
+
+
+@pytest.fixture
+def batcher(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.HISTORY, 'enabled', False)
+    batcher = WriteBatcher(GradeSystem(engine='csv', data_dir=tmp_path), RWLock(), max_ops=50)
+    yield batcher
+    batcher.close()
+
+
+def test_queued_writes_share_a_batch(batcher):
+    running, release = threading.Event(), threading.Event()
+
+    def slow(system):
+        running.set()
+        release.wait(5)
+    blocker = threading.Thread(target=batcher.submit, args=(slow,))
+    blocker.start()
+    assert running.wait(5)  # The writer is busy: everything below queues up behind it
+    threads = [threading.Thread(target=batcher.submit, args=(lambda s, i=i: s.add_row('G9', {'Code': f'C{i}'}),))
+               for i in range(10)]
+    for t in threads:
+        t.start()
+    while batcher._queue.qsize() < 10:
+        time.sleep(0.01)
+    release.set()
+    for t in [blocker] + threads:
+        t.join()
+    assert (batcher.batches, batcher.writes) == (2, 11)
+    assert batcher.system.row_count('G9') == 10
+
+
+def test_bad_request_fails_alone(batcher):
+    batcher.submit(lambda s: s.add_row('G9', {'Code': 'A'}))
+    with pytest.raises(TypeError):
+        batcher.submit(lambda s: s.update_cell('G9', 0, 'Q1_Points', 'abc'))
+    batcher.submit(lambda s: s.add_row('G9', {'Code': 'B'}))
+    assert list(batcher.system.get_data('G9')['Code']) == ['A', 'B']
+
+
+def test_submit_after_close_is_refused(batcher):
+    batcher.close()
+    with pytest.raises(APIError) as err:
+        batcher.submit(lambda s: None)
+    assert err.value.status == 503
@@ -0,0 +1,51 @@
+import pytest
+
+from app import config, storage
+from app.core import GradeSystem
+
+ENGINES = ['csv', 'npy', 'sqlite',
+           pytest.param('parquet', marks=pytest.mark.skipif(not storage.PARQUET_AVAILABLE, reason="needs pyarrow"))]
+
+
+@pytest.fixture(autouse=True)
+def no_history(monkeypatch):
+    monkeypatch.setitem(config.HISTORY, 'enabled', False)
+
+
+def rows(system, table='G9'):
+    df = system.get_data(table)
+    return list(zip(df['Code'], df['Q1_Points']))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_changes_round_trip(tmp_path, engine):
+    system = GradeSystem(engine=engine, data_dir=tmp_path)
+    system.add_rows('G9', [{'Code': f'C{i}', 'Q1_Points': float(i)} for i in range(4)])
+    system.add_row('Self_Dev', {'Skill': 'Piano', 'Proficiency': 3.0})
+    assert system.save_all()[0]
+    system.update_cell('G9', 2, 'Q1_Points', 95.5)
+    system.delete_row('G9', 0)
+    with system.transaction():
+        system.add_row('G9', {'Code': 'C4', 'Q1_Points': 4.0})
+        system.delete_row('G9', 0)
+    expected = [('C2', 95.5), ('C3', 3.0), ('C4', 4.0)]
+    assert rows(system) == expected
+
+    unsaved = GradeSystem(engine=engine, data_dir=tmp_path)  # Journal replayed on load
+    assert rows(unsaved) == expected
+    assert unsaved.save_all()[0]
+    reopened = GradeSystem(engine=engine, data_dir=tmp_path)
+    assert rows(reopened) == expected
+    assert list(reopened.get_data('Self_Dev')['Skill']) == ['Piano']
+    assert len(reopened.get_data('G10')) == 0
+
+
+@pytest.mark.parametrize('engine', ['npy', 'sqlite'])
+def test_migrate_from_csv(tmp_path, engine):
+    system = GradeSystem(engine='csv', data_dir=tmp_path)
+    system.add_rows('G9', [{'Code': 'MA101', 'Q1_Points': 90.0}, {'Code': 'EN101', 'Q1_Points': None}])
+    assert system.save_all()[0]
+    storage.migrate('csv', engine, files=system.files)
+    migrated = GradeSystem(engine=engine, data_dir=tmp_path)
+    assert rows(migrated)[0] == ('MA101', 90.0)
+    assert migrated.get_data('G9')['Q1_Points'].isna().tolist() == [False, True]